@@ -1,6 +1,33 @@
 import sys
-import requests
+import array
+import codecs
+import contextlib
+import hashlib
+import hmac
+import io
+import mmap
+import os
+import random
+import functools
+import importlib
+import re
+import struct
+import time
+import bisect
+import bz2
+import datetime
+import itertools
+import sqlite3
+import queue
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 import json
+import lzma
+import zlib
+from urllib.parse import quote, urlparse
 
 """
 
@@ -13,566 +40,4557 @@ Author: Alberto Lavatelli - 2019
 
 """
 
+class _DeferredModule(object):
+    """ 
+    Name: actiPyme._DeferredModule(Name: str)
+
+    Args:   Name, module name
+
+    Desc:   Stand-in of a module imported on first attribute access, under a lock so that concurrent threads wait for
+            one complete import. requests (with urllib3) takes most of the import time of the module, while short
+            scripts may never send a request (see Driver(CacheFile=...)). sys.modules is left alone: other users
+            of the module always get the real one.
+    
+    """
+    _Lock=threading.Lock()
+
+    def __init__(self,Name: str):
+        self._Name=Name
+        self._Module=None
+
+    def __getattr__(self,Attribute: str):
+        Module=self._Module
+        if Module is None:
+            with self._Lock:
+                if self._Module is None:
+                    self._Module=importlib.import_module(self._Name)
+                Module=self._Module
+        return getattr(Module,Attribute)
+
+
+requests=_DeferredModule("requests")
+
+
+class _ConnectTimerLocal(threading.local):
+    """ 
+    Name: actiPyme._ConnectTimerLocal
+
+    Desc: Per-thread accumulator of the time spent opening connections (name resolution and TCP connect) and in the TLS handshake
+    
+    """
+    def __init__(self):
+        self.Connect=0.0
+        self.Tls=0.0
+
+    def Reset(self):
+        self.Connect=0.0
+        self.Tls=0.0
+
+    def Read(self):
+        return self.Connect,self.Tls
+
+
+_ConnectTimer=_ConnectTimerLocal()
+
+
+@functools.lru_cache(maxsize=None)
+def _TimedAdapterClass():
+    """ 
+        Name: actiPyme._TimedAdapterClass()
+
+        Args:  Void
+
+        Desc: Builds the transport adapter of the driver on first use, when requests and urllib3 are imported.
+              The output is the _TimedAdapter class: an HTTPAdapter whose connections record their connect and
+              TLS handshake times, see Driver.AddHook()
+    """
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class _TimedHTTPConnection(HTTPConnection):
+        def _new_conn(self):
+            Start=time.perf_counter()
+            try:
+                return super()._new_conn()
+            finally:
+                _ConnectTimer.Connect+=time.perf_counter()-Start
+
+    class _TimedHTTPSConnection(HTTPSConnection):
+        def _new_conn(self):
+            Start=time.perf_counter()
+            try:
+                return super()._new_conn()
+            finally:
+                _ConnectTimer.Connect+=time.perf_counter()-Start
+
+        def connect(self):
+            # the TLS handshake is what connect() adds to _new_conn()
+            Start=time.perf_counter()
+            ConnectBefore=_ConnectTimer.Connect
+            try:
+                super().connect()
+            finally:
+                _ConnectTimer.Tls+=time.perf_counter()-Start-(_ConnectTimer.Connect-ConnectBefore)
+
+    class _TimedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls=_TimedHTTPConnection
+
+    class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls=_TimedHTTPSConnection
+
+    class _TimedAdapter(HTTPAdapter):
+        def init_poolmanager(self,*Args,**Kwargs):
+            super().init_poolmanager(*Args,**Kwargs)
+            self.poolmanager.pool_classes_by_scheme={'http': _TimedHTTPConnectionPool,'https': _TimedHTTPSConnectionPool}
+
+    return _TimedAdapter
+
+
+def _EndpointTemplate(Path: str):
+    """ 
+        Name: actiPyme._EndpointTemplate(Path: str)
+
+        Args:  Path, path of a request url relative to the driver Target
+
+        Desc: Replaces ids and dates in a path, e.g. /timetrack/12/2019-08-01/558 -> /timetrack/{id}/{date}/{id}
+    """
+    Segments=[]
+    for Segment in Path.split('?')[0].strip('/').split('/'):
+        if Segment.isdigit():
+            Segments.append("{id}")
+        elif re.fullmatch(r"\d{4}-\d{2}-\d{2}",Segment):
+            Segments.append("{date}")
+        else:
+            Segments.append(Segment)
+    return "/"+"/".join(Segments)
+
+
+def _RequestInfo(Method: str,requrl: str,Target: str,Data):
+    """ 
+        Name: actiPyme._RequestInfo(Method: str,requrl: str,Target: str,Data)
+
+        Desc: Builds the dictionary describing one HTTP call, passed to the RequestHook methods
+    """
+    Path=requrl[len(Target):] if requrl.startswith(Target) else urlparse(requrl).path
+    return {'method': Method,'url': requrl,'endpoint': _EndpointTemplate(Path),'status': None,
+            'bytes_out': len(Data.encode('utf-8') if isinstance(Data,str) else Data or b""),'bytes_in': 0,
+            'streamed': False,'connect': 0.0,'tls': 0.0,'ttfb': None,'total': None,'decode': None,'error': None}
+
+
+class RequestHook(object):
+    """ 
+    Name: actiPyme.RequestHook
+
+    Desc:   Base class of the instrumentation hooks registered with Driver.AddHook(). Override the methods you need.
+            Every method receives the same dictionary describing the HTTP call:
+
+                method, url, endpoint       HTTP method, full url and endpoint template (e.g. /tasks/{id})
+                status, error               HTTP status code (None on failure) and repr of the exception (None on success)
+                bytes_out, bytes_in         request body size and response size (Content-Length when sent by the server).
+                                            For a streamed body without Content-Length bytes_in is None in OnResponse,
+                                            streamed is True and bytes_in holds the bytes actually read in OnDecode
+                connect                     seconds spent opening a new connection, name resolution included (0 when reused)
+                tls                         seconds spent in the TLS handshake of a new connection
+                ttfb, total                 seconds to the response headers and to the whole response
+                decode                      seconds spent decoding the JSON body (waiting for the streamed chunks excluded)
+
+            Hooks are called from the thread making the request and must be thread safe.
+    
+    """
+    def OnRequest(self,Info: dict):
+        """ Called before sending the request """
+        pass
+
+    def OnResponse(self,Info: dict):
+        """ Called when the response has been received, or the request failed """
+        pass
+
+    def OnDecode(self,Info: dict):
+        """ Called after the JSON body has been decoded (or a streamed body has been read) """
+        pass
+
+
+class MetricsCollector(RequestHook):
+    """ 
+    Name: actiPyme.MetricsCollector(Buckets=None)
+
+    Args:   Buckets, upper bounds in seconds of the latency histograms
+
+    Desc:   Built-in hook keeping in memory request counters, byte counters and latency histograms by endpoint and method:
+
+                Metrics=actiPyme.MetricsCollector()
+                Drv.AddHook(Metrics)
+                ...
+                print(Metrics.AsPrometheus())
+    
+    """
+    DefaultBuckets=(0.005,0.01,0.025,0.05,0.1,0.25,0.5,1.0,2.5,5.0,10.0)
+    Timings=("connect","tls","ttfb","total","decode")
+
+    def __init__(self,Buckets=None):
+        self.Buckets=tuple(Buckets) if Buckets is not None else self.DefaultBuckets
+        self._Lock=threading.Lock()
+        self.Reset()
+
+    def Reset(self):
+        """ 
+            Name: actiPyme.MetricsCollector.Reset()
+
+            Desc: Drops all the collected metrics
+        """
+        with self._Lock:
+            self._Requests={}
+            self._Bytes={}
+            self._Histograms={}
+
+    def _Observe(self,Timing: str,Endpoint: str,Method: str,Seconds: float):
+        Key=(Timing,Endpoint,Method)
+        Histogram=self._Histograms.get(Key)
+        if Histogram is None:
+            Histogram=self._Histograms[Key]={'buckets': [0]*len(self.Buckets),'count': 0,'sum': 0.0}
+        Pos=bisect.bisect_left(self.Buckets,Seconds)
+        if Pos<len(self.Buckets):
+            Histogram['buckets'][Pos]+=1
+        Histogram['count']+=1
+        Histogram['sum']+=Seconds
+
+    def OnResponse(self,Info: dict):
+        Status="error" if Info['status'] is None else str(Info['status'])
+        with self._Lock:
+            Key=(Info['endpoint'],Info['method'],Status)
+            self._Requests[Key]=self._Requests.get(Key,0)+1
+            Key=(Info['endpoint'],Info['method'])
+            In,Out=self._Bytes.get(Key,(0,0))
+            self._Bytes[Key]=(In+(Info['bytes_in'] or 0),Out+Info['bytes_out'])
+            for Timing in ("connect","tls","ttfb","total"):
+                if Info[Timing] is not None and (Info[Timing]>0 or Timing in ("ttfb","total")):
+                    self._Observe(Timing,Info['endpoint'],Info['method'],Info[Timing])
+
+    def OnDecode(self,Info: dict):
+        with self._Lock:
+            self._Observe("decode",Info['endpoint'],Info['method'],Info['decode'])
+            if Info['streamed']:
+                # the size of a streamed body is known once it has been read
+                Key=(Info['endpoint'],Info['method'])
+                In,Out=self._Bytes.get(Key,(0,0))
+                self._Bytes[Key]=(In+(Info['bytes_in'] or 0),Out)
+
+    def AsDict(self):
+        """ 
+            Name: actiPyme.MetricsCollector.AsDict()
+
+            Desc: Snapshot of the metrics. The output is {'requests': [...],'bytes': [...],'timings': [...]},
+                  histogram buckets are cumulative as in Prometheus
+        """
+        with self._Lock:
+            Requests=[{'endpoint': Endpoint,'method': Method,'status': Status,'count': Count}
+                      for (Endpoint,Method,Status),Count in sorted(self._Requests.items())]
+            Bytes=[{'endpoint': Endpoint,'method': Method,'in': In,'out': Out} for (Endpoint,Method),(In,Out) in sorted(self._Bytes.items())]
+            Timings=[]
+            for (Timing,Endpoint,Method),Histogram in sorted(self._Histograms.items()):
+                Cumulative=list(itertools.accumulate(Histogram['buckets']))
+                Timings.append({'timing': Timing,'endpoint': Endpoint,'method': Method,'count': Histogram['count'],'sum': Histogram['sum'],
+                                'buckets': dict(zip(self.Buckets,Cumulative))})
+        return {'requests': Requests,'bytes': Bytes,'timings': Timings}
+
+    def AsPrometheus(self,Prefix: str="actipyme"):
+        """ 
+            Name: actiPyme.MetricsCollector.AsPrometheus(Prefix: str="actipyme")
+
+            Args:  Prefix, prefix of the metric names
+
+            Desc: Metrics in the Prometheus text exposition format. The output is a string
+        """
+        Snapshot=self.AsDict()
+        Lines=["# TYPE "+Prefix+"_requests_total counter"]
+        for Row in Snapshot['requests']:
+            Lines.append(Prefix+'_requests_total{endpoint="'+Row['endpoint']+'",method="'+Row['method']+'",status="'+Row['status']+'"} '+str(Row['count']))
+        for Direction in ("in","out"):
+            Lines.append("# TYPE "+Prefix+"_bytes_"+Direction+"_total counter")
+            for Row in Snapshot['bytes']:
+                Lines.append(Prefix+"_bytes_"+Direction+'_total{endpoint="'+Row['endpoint']+'",method="'+Row['method']+'"} '+str(Row[Direction]))
+        for Timing in self.Timings:
+            Name=Prefix+"_"+Timing+"_seconds"
+            Rows=[Row for Row in Snapshot['timings'] if Row['timing']==Timing]
+            if not Rows:
+                continue
+            Lines.append("# TYPE "+Name+" histogram")
+            for Row in Rows:
+                Labels='endpoint="'+Row['endpoint']+'",method="'+Row['method']+'"'
+                for Bound,Count in Row['buckets'].items():
+                    Lines.append(Name+"_bucket{"+Labels+',le="'+repr(float(Bound))+'"} '+str(Count))
+                Lines.append(Name+"_bucket{"+Labels+',le="+Inf"} '+str(Row['count']))
+                Lines.append(Name+"_sum{"+Labels+"} "+repr(Row['sum']))
+                Lines.append(Name+"_count{"+Labels+"} "+str(Row['count']))
+        return "\n".join(Lines)+"\n"
+
+
+def _RetryAfter(Response):
+    """ 
+        Name: actiPyme._RetryAfter(Response)
+
+        Args:  Response, response object
+
+        Desc: Seconds to wait according to the Retry-After header (delay in seconds or HTTP date). The output is a float or None
+    """
+    Value=Response.headers.get('Retry-After')
+    if not Value:
+        return None
+    try:
+        return max(0.0,float(Value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        When=parsedate_to_datetime(Value)
+    except (TypeError,ValueError):
+        return None
+    if When.tzinfo is None:
+        When=When.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0,(When-datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+class AdaptiveLimiter(object):
+    """ 
+    Name: actiPyme.AdaptiveLimiter(Initial=4,Minimum=1,Maximum=64,Increase=1.0,Decrease=0.5)
+
+    Args:   Initial, starting number of requests allowed in flight
+            Minimum, Maximum, bounds of the limit
+            Increase, additive increase of the limit for every window of successful requests
+            Decrease, multiplicative decrease of the limit when the server is overloaded
+
+    Desc:   AIMD (additive increase, multiplicative decrease) concurrency limiter, the same control loop used by TCP.
+            Every success of a request that was in flight while the window was full raises the limit by Increase/limit
+            (about +Increase per round trip of a full window); a caller keeping fewer requests in flight than the limit
+            does not raise it. An overload signal (429, 5xx gateway errors, timeouts) multiplies it by Decrease. Requests already in flight
+            when the limit is cut do not cut it again, so a burst of failures counts as one congestion event.
+            The limiter is thread safe and can be shared by many drivers:
+
+                Ticket=Limiter.Acquire()
+                ...send the request...
+                Limiter.Release(Ticket,Overloaded)
+    
+    """
+    def __init__(self,Initial=4,Minimum=1,Maximum=64,Increase=1.0,Decrease=0.5):
+        self.Minimum=Minimum
+        self.Maximum=Maximum
+        self.Increase=Increase
+        self.Decrease=Decrease
+        self.Limit=float(min(max(Initial,Minimum),Maximum))
+        self.InFlight=0
+        self._Sequence=0
+        self._LastDecrease=0
+        # sequence of the last request filling the window
+        self._LastFull=0
+        self._Condition=threading.Condition()
+
+    def Acquire(self):
+        """ 
+            Name: actiPyme.AdaptiveLimiter.Acquire()
+
+            Desc: Waits for a free slot. The output is the ticket to be given back to Release()
+        """
+        with self._Condition:
+            while self.InFlight>=int(self.Limit):
+                self._Condition.wait()
+            self.InFlight+=1
+            self._Sequence+=1
+            if self.InFlight>=int(self.Limit):
+                self._LastFull=self._Sequence
+            return self._Sequence
+
+    def Release(self,Ticket: int,Overloaded: bool=False):
+        """ 
+            Name: actiPyme.AdaptiveLimiter.Release(Ticket: int,Overloaded: bool=False)
+
+            Args:   Ticket, output of Acquire()
+                    Overloaded, the request was throttled or failed because of the server load
+
+            Desc: Frees the slot and adapts the limit
+        """
+        with self._Condition:
+            self.InFlight-=1
+            if Overloaded:
+                if Ticket>self._LastDecrease:
+                    self.Limit=max(float(self.Minimum),self.Limit*self.Decrease)
+                    self._LastDecrease=self._Sequence
+            elif self._LastFull>=Ticket:
+                # the limit is probed only when it is actually what bounds the traffic
+                self.Limit=min(float(self.Maximum),self.Limit+self.Increase/self.Limit)
+            self._Condition.notify_all()
+
+
+def _FastJsonLoads():
+    """ 
+        Name: actiPyme._FastJsonLoads()
+
+        Args:  Void
+
+        Desc: Picks the JSON decoder of the driver: orjson.loads when orjson is installed, json.loads otherwise.
+              Both accept the raw bytes of the response body
+    """
+    try:
+        import orjson
+    except ImportError:
+        return json.loads
+    return orjson.loads
+
+
+class JsonArrayStream(object):
+    """ 
+    Name: actiPyme.JsonArrayStream(Chunks,ArrayKey: str)
+
+    Args:   Chunks, iterable of UTF-8 encoded bytes (e.g. Response.iter_content())
+            ArrayKey, name of the top level array to stream ("data" for timetrack and leavetime, "items" for collections)
+
+    Desc:   Incremental decoder of a JSON object holding one large array. Iterating yields the elements of the array
+            as soon as each of them is complete, so the whole body is never buffered. The other top level members
+            (e.g. nextDateFrom) are collected in Fields, which is complete once the iteration is over.
+
+                Stream=actiPyme.JsonArrayStream(Response.iter_content(65536),"data")
+                for Day in Stream:
+                    ...
+                Stream.Fields['nextDateFrom']
+    
+    """
+    _Decoder=json.JSONDecoder()
+    _Space=re.compile(r'[ \t\n\r]*')
+
+    def __init__(self,Chunks,ArrayKey: str):
+        self._Chunks=iter(Chunks)
+        self._Text=codecs.getincrementaldecoder('utf-8')()
+        self._Buffer=""
+        self._Pos=0
+        self._Eof=False
+        self.ArrayKey=ArrayKey
+        self.Fields={}
+
+    def _More(self):
+        # appends the next chunk to the unread part of the buffer, False at the end of the body
+        if self._Eof:
+            return False
+        Chunk=next(self._Chunks,None)
+        if Chunk is None:
+            self._Eof=True
+            Text=self._Text.decode(b"",final=True)
+        else:
+            Text=self._Text.decode(Chunk)
+        self._Buffer=self._Buffer[self._Pos:]+Text
+        self._Pos=0
+        return True
+
+    def _Peek(self):
+        while True:
+            self._Pos=self._Space.match(self._Buffer,self._Pos).end()
+            if self._Pos<len(self._Buffer):
+                return self._Buffer[self._Pos]
+            if not self._More():
+                return ""
+
+    def _Expect(self,Chars: str):
+        Char=self._Peek()
+        if not Char or Char not in Chars:
+            raise json.JSONDecodeError("Expecting "+" or ".join(repr(Char) for Char in Chars),self._Buffer,self._Pos)
+        self._Pos+=1
+        return Char
+
+    def _Value(self):
+        self._Peek()
+        while True:
+            try:
+                Value,End=self._Decoder.raw_decode(self._Buffer,self._Pos)
+            except json.JSONDecodeError:
+                if not self._More():
+                    raise
+                continue
+            # a number ending with the buffer may go on in the next chunk
+            if End==len(self._Buffer) and self._More():
+                continue
+            self._Pos=End
+            return Value
+
+    def __iter__(self):
+        self._Expect("{")
+        if self._Peek()=="}":
+            self._Pos+=1
+            return
+        while True:
+            Key=self._Value()
+            self._Expect(":")
+            if Key==self.ArrayKey and self._Peek()=="[":
+                self._Pos+=1
+                if self._Peek()=="]":
+                    self._Pos+=1
+                else:
+                    while True:
+                        yield self._Value()
+                        if self._Expect(",]")=="]":
+                            break
+            else:
+                self.Fields[Key]=self._Value()
+            if self._Expect(",}")=="}":
+                break
+
+
+class SingleFlightGroup(object):
+    """ 
+    Name: actiPyme.SingleFlightGroup()
+
+    Desc:   Collapses identical calls running at the same time. The first caller of a key runs the call, the callers
+            arriving while it is in flight wait and get its result (or its exception). Nothing is kept once the call
+            is over, so this is not a cache. Used by Driver(SingleFlight=True):
+
+                Group=actiPyme.SingleFlightGroup()
+                Task=Group.Do(url,lambda: FetchTask(url))
+    
+    """
+    def __init__(self):
+        self._Lock=threading.Lock()
+        self._Calls={}
+
+    def Do(self,Key,Function):
+        """ 
+            Name: actiPyme.SingleFlightGroup.Do(Key,Function)
+
+            Args:   Key, identity of the call
+                    Function, callable doing the call
+
+            Desc: Runs Function once for all the concurrent callers of the same key. The output is the result of Function
+        """
+        with self._Lock:
+            Call=self._Calls.get(Key)
+            Leader=Call is None
+            if Leader:
+                Call=self._Calls[Key]=Future()
+        if not Leader:
+            return Call.result()
+        try:
+            Result=Function()
+        except BaseException as Err:
+            Call.set_exception(Err)
+            raise
+        else:
+            Call.set_result(Result)
+        finally:
+            with self._Lock:
+                del self._Calls[Key]
+        return Result
+
+    def InFlight(self):
+        """ 
+            Name: actiPyme.SingleFlightGroup.InFlight()
+
+            Desc: Number of calls currently running
+        """
+        with self._Lock:
+            return len(self._Calls)
+
+
+class Record(object):
+    """ 
+    Name: actiPyme.Record
+
+    Desc:   Base class of the compact record types returned by a Driver(Records=True) instead of the JSON objects.
+            Records keep only the known fields of the object in slots, the other ones are dropped and the missing ones
+            are None. Fields are read as attributes (Task.projectId) or, as for the JSON objects, with Task['projectId']
+            and Task.get('projectId'), so the rest of the module accepts both.
+            A record does not tell a missing field from a null one: both are None, and get() gives its default for both
+            (dict.get() gives None for a null member).
+    
+    """
+    __slots__=()
+
+    def __init__(self,*Values,**Fields):
+        if len(Values)>len(self.__slots__):
+            raise TypeError(type(self).__name__+"() takes at most "+str(len(self.__slots__))+" positional values ("+str(len(Values))+" given)")
+        for Field,Value in itertools.zip_longest(self.__slots__,Values):
+            setattr(self,Field,Value)
+        for Field,Value in Fields.items():
+            if Field not in self.__slots__:
+                raise TypeError(type(self).__name__+"() got an unexpected field "+repr(Field))
+            setattr(self,Field,Value)
+
+    @classmethod
+    def FromDict(cls,Data: dict):
+        """ 
+            Name: actiPyme.Record.FromDict(Data: dict)
+
+            Args:  Data, JSON object sent by the server
+
+            Desc: The output is a new record holding the fields of Data
+        """
+        return cls(*map(Data.get,cls.__slots__))
+
+    @classmethod
+    def Lazy(cls,Items):
+        """ 
+            Name: actiPyme.Record.Lazy(Items)
+
+            Args:  Items, iterable of JSON objects
+
+            Desc: The output is an iterator converting the objects one at a time, while they are consumed
+        """
+        return map(cls.FromDict,Items)
+
+    def AsDict(self):
+        """ 
+            Name: actiPyme.Record.AsDict()
+
+            Args:  Void
+
+            Desc: The output is the record as JSON object (fields set to None are left out)
+        """
+        return {Field: getattr(self,Field) for Field in self.__slots__ if getattr(self,Field) is not None}
+
+    def __getitem__(self,Field: str):
+        if Field not in self.__slots__:
+            raise KeyError(Field)
+        return getattr(self,Field)
+
+    def get(self,Field: str,Default=None):
+        """ 
+            Name: actiPyme.Record.get(Field: str,Default=None)
+
+            Desc: The output is the value of Field, or Default when the field is unknown, missing or null (None)
+        """
+        Value=getattr(self,Field,None) if Field in self.__slots__ else None
+        return Default if Value is None else Value
+
+    def __eq__(self,Other):
+        if type(Other) is not type(self):
+            return NotImplemented
+        return all(getattr(self,Field)==getattr(Other,Field) for Field in self.__slots__)
+
+    __hash__=None
+
+    def __repr__(self):
+        return type(self).__name__+"("+", ".join(Field+"="+repr(Value) for Field,Value in self.AsDict().items())+")"
+
+    def __getstate__(self):
+        return tuple(getattr(self,Field) for Field in self.__slots__)
+
+    def __setstate__(self,State):
+        for Field,Value in zip(self.__slots__,State):
+            setattr(self,Field,Value)
+
+
+class Customer(Record):
+    """ 
+    Name: actiPyme.Customer
+
+    Desc: Customer record (see Record)
+    """
+    __slots__=('id','name','description','created','archived','url')
+
+
+class Project(Record):
+    """ 
+    Name: actiPyme.Project
+
+    Desc: Project record (see Record)
+    """
+    __slots__=('id','name','description','created','archived','customerId','customerName','url')
+
+
+class Task(Record):
+    """ 
+    Name: actiPyme.Task
+
+    Desc: Task record (see Record)
+    """
+    __slots__=('id','name','description','created','status','workflowStatusId','typeOfWorkId','deadline','estimatedTime',
+               'projectId','projectName','customerId','customerName','url')
+
+
+class User(Record):
+    """ 
+    Name: actiPyme.User
+
+    Desc: User record (see Record)
+    """
+    __slots__=('id','username','firstName','middleName','lastName','fullName','email','departmentId','timeZoneGroupId',
+               'hired','releaseDate','active')
+
+
+class TimeTrackCell(Record):
+    """ 
+    Name: actiPyme.TimeTrackCell
+
+    Desc: Time track of a user on a task in a day (see Record), time in minutes
+    """
+    __slots__=('userId','date','taskId','time','comment')
+
+
+class LeaveCell(Record):
+    """ 
+    Name: actiPyme.LeaveCell
+
+    Desc: Leave time of a user in a day (see Record), leaveTime in minutes
+    """
+    __slots__=('userId','date','leaveTypeId','leaveTime')
+
+
+def _IsErrorBody(Data):
+    """ 
+        Name: actiPyme._IsErrorBody(Data)
+
+        Desc: True when Data is not a JSON object or is the error body of the server ({'key','message'})
+    """
+    return not isinstance(Data,dict) or ('key' in Data and 'message' in Data)
+
+
 class Driver(object):
     """ 
-    Name: actiPyme.Driver(Target,actitimeUserName,actitimePsw)
+    Name: actiPyme.Driver(Target,actitimeUserName,actitimePsw,PoolSize=10,KeepAlive=True,Gzip=True,Timeout=(3.05,60),Limiter=None,SingleFlight=False,FastJson=True,Streaming=True,Records=False,CacheFile=None)
+
+    Args:   Target, url of the actitime server
+            actitimeUserName, account user name
+            actitimePsw, account password
+            PoolSize, max number of kept-alive connections towards the server
+            KeepAlive, reuse the connections between calls (HTTP keep-alive)
+            Gzip, ask the server for gzip/deflate compressed responses
+            Timeout, per-call timeout in seconds, either a number or a (connect, read) tuple
+            Limiter, actiPyme.AdaptiveLimiter of the write and bulk read paths (share one between drivers talking to the same server);
+                     by default one bounded by PoolSize
+            SingleFlight, collapse identical GET calls running at the same time in different threads into one request;
+                          the waiting callers get the same JSON object, which must not be modified
+            FastJson, decode the responses with orjson when it is installed
+            Streaming, the bulk read paths (Iter*, Fetch*) decode the responses incrementally, yielding the records
+                       while the body is still being received instead of buffering and decoding it whole
+            Records, return compact record objects (Task, Project, Customer, User, TimeTrackCell, LeaveCell, see Record)
+                     instead of the JSON objects of tasks, projects, customers, users and time track / leave cells.
+                     Lists keep their JSON envelope ({'offset','limit','items': [...]}), only the items are converted
+            CacheFile, path of an actiPyme.PersistentCache (or the cache itself) keeping the user identity and the
+                       reference lists across processes: while they are fresh Start() sends no request and the
+                       connection pool is opened by the first call actually reaching the server
+
+    Desc: This is the core driver with communication protocol API.
+          The connection pool is opened by Start() and closed by Stop(). A single driver instance
+          can be shared across worker threads: every thread gets its own session on top of the shared pool.
+    
+    """
+    # search method -> query field of the collection endpoints
+    TaskSearchFields={1: "words", 2: "ids", 3: "customerIds", 4: "projectIds"}
+    ProjectSearchFields={1: "words", 2: "ids", 3: "customerIds"}
+    UserSearchFields={1: "name", 2: "ids", 3: "department", 4: "email"}
+    # status codes telling that the server is overloaded
+    RetryStatus=(429,502,503,504)
+    # largest limit served by the collection endpoints
+    MaxPageSize=1000
+
+    def __init__(self,Target="",actitimeUserName="",actitimePsw="",PoolSize=10,KeepAlive=True,Gzip=True,Timeout=(3.05,60),Limiter=None,SingleFlight=False,FastJson=True,Streaming=True,Records=False,CacheFile=None):
+        self.Target=Target
+        self.actitimeUserName=actitimeUserName
+        self.actitimePsw=actitimePsw
+        self.IsStarted=False
+        self.ServerHeaders= {'accept': 'application/json; charset=UTF-8'}
+        self.writeDefheaders={'accept': 'application/json; charset=UTF-8', 'Content-Type': 'application/json' }
+        self.IdNumber=0
+        self.IdName=""
+        self.IdSurname=""
+        # connection pool settings
+        self.PoolSize=PoolSize
+        self.KeepAlive=KeepAlive
+        self.Gzip=Gzip
+        self.Timeout=Timeout
+        self.HandshakeTimeout=3
+        self.Adapter=None
+        self._PoolLock=threading.Lock()
+        self._PoolGeneration=0
+        # sessions of the live threads, a session goes away with the thread local of its thread
+        self._Sessions=weakref.WeakSet()
+        self._Local=threading.local()
+        # reference data cache, see EnableCache()
+        self.Cache=None
+        # identical GET calls in flight, see _SingleFlight()
+        self.Flights=SingleFlightGroup() if SingleFlight else None
+        # instrumentation hooks, see AddHook()
+        self.Hooks=[]
+        # adaptive concurrency and retries of the write and bulk read paths, see _Resilient()
+        self.Limiter=Limiter if Limiter is not None else AdaptiveLimiter(Initial=PoolSize,Maximum=PoolSize)
+        self.MaxRetries=5
+        self.BackoffBase=0.25
+        self.BackoffMax=20.0
+        self.RetryAfterMax=120.0
+        # JSON decoding, see _Decode() and _StreamJson()
+        self.JsonLoads=_FastJsonLoads() if FastJson else json.loads
+        self.Streaming=Streaming
+        self.StreamChunkSize=65536
+        # records of a bulk read chunk handed over at once, and max number of such batches waiting, see _FetchChunked()
+        self.StreamBatchRecords=256
+        self.StreamQueueBatches=16
+        # compact records instead of JSON objects, see _AsRecord()
+        self.Records=Records
+        # on-disk identity and reference data, see _GetCached() and Handshake()
+        self.Persistent=PersistentCache(CacheFile) if isinstance(CacheFile,str) else CacheFile
+        self._Secret=None
+
+    def _OpenPool(self):
+        """ 
+            Name: actiPyme.Driver._OpenPool()
+
+            Args:  Void
+
+            Desc: Opens the connection pool shared by every thread using this driver instance.
+        """
+        with self._PoolLock:
+            if self.Adapter is None:
+                self.Adapter=_TimedAdapterClass()(pool_connections=1,pool_maxsize=self.PoolSize)
+                self._PoolGeneration+=1
+
+    def _ClosePool(self):
+        """ 
+            Name: actiPyme.Driver._ClosePool()
+
+            Args:  Void
+
+            Desc: Closes every session and the underlying connection pool.
+        """
+        with self._PoolLock:
+            for Session in list(self._Sessions):
+                Session.close()
+            self._Sessions=weakref.WeakSet()
+            if self.Adapter is not None:
+                self.Adapter.close()
+                self.Adapter=None
+
+    def _Session(self):
+        """ 
+            Name: actiPyme.Driver._Session()
+
+            Args:  Void
+
+            Desc: Returns the session of the calling thread, mounted on the shared connection pool.
+                  Sessions (and the pool itself, when the handshake was skipped) are created on first use and carry
+                  the auth and the default headers. Only the thread holds its session, so the sessions of the worker
+                  threads of an executor are released together with the threads.
+        """
+        Session=getattr(self._Local,'Session',None)
+        if Session is not None and self._Local.Generation==self._PoolGeneration:
+            return Session
+        with self._PoolLock:
+            if self.Adapter is None:
+                if not self.IsStarted:
+                    raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+                # started from the persistent cache, the pool is opened by the first request
+                self.Adapter=_TimedAdapterClass()(pool_connections=1,pool_maxsize=self.PoolSize)
+                self._PoolGeneration+=1
+            Session=requests.Session()
+            Session.mount('http://',self.Adapter)
+            Session.mount('https://',self.Adapter)
+            Session.auth=(self.actitimeUserName,self.actitimePsw)
+            Session.headers.update(self.ServerHeaders)
+            Session.headers['Accept-Encoding']='gzip, deflate' if self.Gzip else 'identity'
+            Session.headers['Connection']='keep-alive' if self.KeepAlive else 'close'
+            self._Sessions.add(Session)
+            self._Local.Session=Session
+            self._Local.Generation=self._PoolGeneration
+        return Session
+
+    def _Request(self,Method: str,requrl: str,Timeout=None,Headers=None,Data=None,Stream=False):
+        """ 
+            Name: actiPyme.Driver._Request(Method: str,requrl: str,Timeout=None,Headers=None,Data=None,Stream=False)
+
+            Args:   Method, HTTP method
+                    requrl, full url of the resource
+                    Timeout, overrides the driver timeout for this call
+                    Headers, extra headers for this call
+                    Data, request body
+                    Stream, return as soon as the headers are received, the body is read by the caller
+
+            Desc: Performs a request through the connection pool, firing the instrumentation hooks (see AddHook()).
+                  The output is the response object
+        """
+        Timeout=self.Timeout if Timeout is None else Timeout
+        if not self.Hooks:
+            return self._Session().request(Method,requrl,headers=Headers,data=Data,timeout=Timeout,stream=Stream)
+        Info=_RequestInfo(Method,requrl,self.Target,Data)
+        for Hook in self.Hooks:
+            Hook.OnRequest(Info)
+        _ConnectTimer.Reset()
+        Start=time.perf_counter()
+        try:
+            Response=self._Session().request(Method,requrl,headers=Headers,data=Data,timeout=Timeout,stream=Stream)
+        except Exception as Err:
+            Info['total']=time.perf_counter()-Start
+            Info['connect'],Info['tls']=_ConnectTimer.Read()
+            Info['error']=repr(Err)
+            for Hook in self.Hooks:
+                Hook.OnResponse(Info)
+            raise
+        Info['total']=time.perf_counter()-Start
+        Info['connect'],Info['tls']=_ConnectTimer.Read()
+        Info['ttfb']=Response.elapsed.total_seconds()
+        Info['status']=Response.status_code
+        Length=Response.headers.get('Content-Length')
+        if Length is not None and Length.isdigit():
+            Info['bytes_in']=int(Length)
+        elif Stream:
+            # a streamed body is not read here, its size is reported by _StreamJson()
+            Info['bytes_in']=None
+            Info['streamed']=True
+        else:
+            Info['bytes_in']=len(Response.content)
+        Response._actiPymeInfo=Info
+        for Hook in self.Hooks:
+            Hook.OnResponse(Info)
+        return Response
+
+    def _Decode(self,Response):
+        """ 
+            Name: actiPyme.Driver._Decode(Response)
+
+            Args:  Response, response object of _Request()
+
+            Desc: Decodes a JSON response from its raw bytes (see FastJson), timing the decoding for the instrumentation hooks.
+                  The output is a JSON object
+        """
+        Info=getattr(Response,'_actiPymeInfo',None)
+        if Info is None:
+            return self.JsonLoads(Response.content)
+        Start=time.perf_counter()
+        Data=self.JsonLoads(Response.content)
+        Info['decode']=time.perf_counter()-Start
+        for Hook in self.Hooks:
+            Hook.OnDecode(Info)
+        return Data
+
+    def AddHook(self,Hook):
+        """ 
+            Name: actiPyme.Driver.AddHook(Hook)
+
+            Args:  Hook, an actiPyme.RequestHook (e.g. an actiPyme.MetricsCollector)
+
+            Desc: Registers a hook fired around every HTTP call of the driver. Hooks are called from the thread making the request
+        """
+        self.Hooks=self.Hooks+[Hook]
+
+    def RemoveHook(self,Hook):
+        """ 
+            Name: actiPyme.Driver.RemoveHook(Hook)
+
+            Args:  Hook, a hook registered with AddHook()
+
+            Desc: Unregisters a hook
+        """
+        self.Hooks=[Registered for Registered in self.Hooks if Registered is not Hook]
+
+    def _Get(self,requrl: str,Timeout=None,Headers=None):
+        """ 
+            Name: actiPyme.Driver._Get(requrl: str,Timeout=None,Headers=None)
+
+            Args:   requrl, full url of the resource
+                    Timeout, overrides the driver timeout for this call
+                    Headers, extra headers for this call
+
+            Desc: Performs a GET through the connection pool. The output is the response object
+        """
+        return self._Request("GET",requrl,Timeout,Headers)
+
+    def _GetJson(self,requrl: str):
+        """ 
+            Name: actiPyme.Driver._GetJson(requrl: str)
+
+            Args:  requrl, full url of the resource
+
+            Desc: GET and JSON decoding, collapsed with the identical calls in flight when single-flight is enabled. The output is a JSON object
+        """
+        return self._SingleFlight(requrl,lambda: self._Decode(self._Get(requrl)))
+
+    def _SingleFlight(self,Key: str,Function):
+        """ 
+            Name: actiPyme.Driver._SingleFlight(Key: str,Function)
+
+            Args:   Key, identity of the call (the url)
+                    Function, callable doing the call
+
+            Desc: Runs Function, or waits for the identical call already running in another thread and shares its result
+        """
+        if self.Flights is None:
+            return Function()
+        return self.Flights.Do(Key,Function)
+
+    def _GetCached(self,Endpoint: str,requrl: str):
+        """ 
+            Name: actiPyme.Driver._GetCached(Endpoint: str,requrl: str)
+
+            Args:   Endpoint, name of the endpoint, used to pick the time to live of the entry
+                    requrl, full url of the resource
+
+            Desc: GET of reference data going through the caches, when enabled: the in-memory one (see EnableCache()),
+                  then the persistent one (see CacheFile). Expired in-memory entries are revalidated with
+                  If-None-Match/If-Modified-Since when the server sent an ETag/Last-Modified. The output is a JSON object
+        """
+        Persisted=self.Persistent is not None and self.Persistent.TTL.get(Endpoint,0)>0
+        if self.Cache is None and not Persisted:
+            return self._GetJson(requrl)
+        Entry=None
+        if self.Cache is not None:
+            Entry=self.Cache.Lookup(requrl)
+            if Entry is not None and Entry['expires']>time.monotonic():
+                return Entry['data']
+        if Persisted:
+            Data=self.Persistent.Lookup(self.Target,self.actitimeUserName,self._PersistentSecret(),requrl)
+            if Data is not None:
+                if self.Cache is not None:
+                    self.Cache.Store(requrl,Endpoint,Data)
+                return Data
+        return self._SingleFlight(requrl,lambda: self._Revalidate(Endpoint,requrl,Entry))
+
+    def _Revalidate(self,Endpoint: str,requrl: str,Entry):
+        """ 
+            Name: actiPyme.Driver._Revalidate(Endpoint: str,requrl: str,Entry)
+
+            Args:   Endpoint, requrl, see _GetCached()
+                    Entry, expired cache entry or None
+
+            Desc: Fetches (or revalidates) a cache entry and stores the answer in the caches. The output is a JSON object
+        """
+        Headers={}
+        if Entry is not None:
+            if Entry['etag']:
+                Headers['If-None-Match']=Entry['etag']
+            if Entry['lastmodified']:
+                Headers['If-Modified-Since']=Entry['lastmodified']
+        CacheReq=self._Get(requrl,Headers=Headers)
+        if Entry is not None and CacheReq.status_code==304:
+            Data=Entry['data']
+            self.Cache.Store(requrl,Endpoint,Data,Entry['etag'],Entry['lastmodified'])
+        else:
+            Data=self._Decode(CacheReq)
+            if CacheReq.status_code!=200:
+                return Data
+            if self.Cache is not None:
+                self.Cache.Store(requrl,Endpoint,Data,CacheReq.headers.get('ETag'),CacheReq.headers.get('Last-Modified'))
+        if self.Persistent is not None:
+            self.Persistent.Store(self.Target,self.actitimeUserName,self._PersistentSecret(),requrl,Endpoint,Data)
+        return Data
+
+    def _PersistentSecret(self):
+        """ 
+            Name: actiPyme.Driver._PersistentSecret()
+
+            Args:  Void
+
+            Desc: Keyed hash of the password of the persistent cache entries, computed once per driver
+        """
+        if self._Secret is None:
+            self._Secret=self.Persistent.Secret(self.Target,self.actitimeUserName,self.actitimePsw)
+        return self._Secret
+
+    def EnableCache(self,TTL: dict=None,MaxEntries: int=1024):
+        """ 
+            Name: actiPyme.Driver.EnableCache(TTL: dict=None,MaxEntries: int=1024)
+
+            Args:   TTL, time to live in seconds by endpoint, overriding actiPyme.ResponseCache.DefaultTTL
+                         (customers, leaveTypes, departments, info, tasks, projects)
+                    MaxEntries, max number of cached responses, the least recently used are dropped first
+
+            Desc: Turns on the cache of the reference data: CustomerList, LeaveTypesList, DepartmentList, GetDepartmentInfo,
+                  GetProjectInfo, GetTaskInfo and GetActiTimeInfo. Cached JSON objects are shared between calls and must not be modified.
+        """
+        self.Cache=ResponseCache(TTL,MaxEntries)
+
+    def DisableCache(self):
+        """ 
+            Name: actiPyme.Driver.DisableCache()
+
+            Args:  Void
+
+            Desc: Turns off the cache and drops its content
+        """
+        self.Cache=None
+
+    def InvalidateCache(self,Endpoint: str=None):
+        """ 
+            Name: actiPyme.Driver.InvalidateCache(Endpoint: str=None)
+
+            Args:  Endpoint, drop only the entries of this endpoint (e.g. "tasks"); all the entries when None
+
+            Desc: Forces the next calls to fetch the reference data again. The persistent entries of the driver user
+                  are dropped as well ("me" is the cached identity)
+        """
+        if self.Cache is not None:
+            self.Cache.Invalidate(Endpoint)
+        if self.Persistent is not None:
+            self.Persistent.Invalidate(self.Target,self.actitimeUserName,Endpoint)
+
+    def _Resilient(self,Method: str,requrl: str,Headers=None,Data=None,Timeout=None,Stream=False):
+        """ 
+            Name: actiPyme.Driver._Resilient(Method: str,requrl: str,Headers=None,Data=None,Timeout=None,Stream=False)
+
+            Args:   Method, HTTP method
+                    requrl, full url of the resource
+                    Headers, extra headers for this call
+                    Data, request body
+                    Timeout, overrides the driver timeout for this call
+                    Stream, see _Request()
+
+            Desc: Request used by the write and bulk read paths. Every attempt holds a slot of the adaptive limiter;
+                  throttling (429), gateway errors (502, 503, 504), timeouts and connection errors are retried up to
+                  MaxRetries times, waiting Retry-After when sent by the server or an exponential backoff with full jitter.
+                  HTTP errors left are raised as requests.exceptions.HTTPError. The output is the response object
+        """
+        Attempt=0
+        while True:
+            Ticket=self.Limiter.Acquire() if self.Limiter is not None else None
+            Overloaded=False
+            try:
+                Response=self._Request(Method,requrl,Timeout,Headers,Data,Stream)
+                Overloaded=Response.status_code in self.RetryStatus
+            except (requests.exceptions.ConnectionError,requests.exceptions.Timeout):
+                Overloaded=True
+                if Attempt>=self.MaxRetries:
+                    raise
+                Response=None
+            finally:
+                if Ticket is not None:
+                    self.Limiter.Release(Ticket,Overloaded)
+            if not Overloaded or Attempt>=self.MaxRetries:
+                if Stream and not Response.ok:
+                    Response.close()
+                Response.raise_for_status()
+                return Response
+            if Stream and Response is not None:
+                Response.close()
+            Delay=_RetryAfter(Response) if Response is not None else None
+            if Delay is None:
+                Delay=random.uniform(0,min(self.BackoffMax,self.BackoffBase*2**Attempt))
+            time.sleep(min(Delay,self.RetryAfterMax))
+            Attempt+=1
+
+    def _GetBulk(self,requrl: str):
+        """ 
+            Name: actiPyme.Driver._GetBulk(requrl: str)
+
+            Args:  requrl, full url of the resource
+
+            Desc: GET of the bulk read paths (pages, batches, date intervals), see _Resilient(). The output is the response object
+        """
+        return self._Resilient("GET",requrl)
+
+    def _StreamJson(self,requrl: str,ArrayKey: str,Fields: dict):
+        """ 
+            Name: actiPyme.Driver._StreamJson(requrl: str,ArrayKey: str,Fields: dict)
+
+            Args:   requrl, full url of the resource
+                    ArrayKey, top level array of the response to iterate
+                    Fields, dictionary filled with the other top level members of the response
+
+            Desc: Generator of the elements of a bulk GET response, see JsonArrayStream. Without Streaming the response
+                  is decoded whole and the elements are yielded afterwards.
+        """
+        if not self.Streaming:
+            Page=self._Decode(self._GetBulk(requrl))
+            Fields.update((Key,Value) for Key,Value in Page.items() if Key!=ArrayKey)
+            yield from Page.get(ArrayKey,[])
+            return
+        Response=self._Resilient("GET",requrl,Stream=True)
+        Info=getattr(Response,'_actiPymeInfo',None)
+        if Info is None:
+            try:
+                Chunks=Response.iter_content(self.StreamChunkSize)
+                Stream=JsonArrayStream(Chunks,ArrayKey)
+                Stream.Fields=Fields
+                yield from Stream
+                # reading up to the end of the body gives the connection back to the pool
+                for _ in Chunks:
+                    pass
+            finally:
+                Response.close()
+            return
+
+        # with hooks the decoding time excludes the time spent waiting for the chunks
+        Waiting=[0.0]
+        Read=[0]
+        def TimedChunks(Chunks):
+            while True:
+                Start=time.perf_counter()
+                Chunk=next(Chunks,None)
+                Waiting[0]+=time.perf_counter()-Start
+                if Chunk is None:
+                    return
+                Read[0]+=len(Chunk)
+                yield Chunk
+
+        Decoding=0.0
+        try:
+            Chunks=TimedChunks(Response.iter_content(self.StreamChunkSize))
+            Stream=JsonArrayStream(Chunks,ArrayKey)
+            Stream.Fields=Fields
+            Items=iter(Stream)
+            while True:
+                Start=time.perf_counter()
+                Item=next(Items,Stream)
+                Decoding+=time.perf_counter()-Start
+                if Item is Stream:
+                    break
+                yield Item
+            for _ in Chunks:
+                pass
+        finally:
+            Response.close()
+            Info['decode']=max(0.0,Decoding-Waiting[0])
+            if Info['streamed']:
+                # bytes pulled from the connection before decompression, when urllib3 tracks them (not for chunked bodies)
+                Info['bytes_in']=Response.raw.tell() or Read[0]
+            for Hook in self.Hooks:
+                Hook.OnDecode(Info)
+
+    def _AsRecord(self,Kind,Data):
+        """ 
+            Name: actiPyme.Driver._AsRecord(Kind,Data)
+
+            Args:   Kind, Record subclass
+                    Data, JSON object
+
+            Desc: The output is Data as Kind record with Records, Data itself otherwise. Error bodies of the server
+                  ({'key','message'}) are given back unchanged
+        """
+        if not self.Records or _IsErrorBody(Data):
+            return Data
+        return Kind.FromDict(Data)
+
+    def _AsRecords(self,Kind,Items):
+        """ 
+            Name: actiPyme.Driver._AsRecords(Kind,Items)
+
+            Desc: Lazy version of _AsRecord() for an iterable of JSON objects
+        """
+        return Kind.Lazy(Items) if self.Records else Items
+
+    def _AsRecordPage(self,Kind,Page: dict,Key: str='items'):
+        """ 
+            Name: actiPyme.Driver._AsRecordPage(Kind,Page: dict,Key: str='items')
+
+            Desc: Converts the items of a list response with Records. A new envelope is built, since the response may be shared
+                  (see EnableCache() and SingleFlight)
+        """
+        if not self.Records or _IsErrorBody(Page):
+            return Page
+        Page=dict(Page)
+        Page[Key]=[Kind.FromDict(Item) for Item in Page.get(Key,[])]
+        return Page
+
+    def _AsRecordDay(self,Day: dict):
+        """ 
+            Name: actiPyme.Driver._AsRecordDay(Day: dict)
+
+            Desc: Converts the records of a time track day in TimeTrackCell with Records
+        """
+        if not self.Records:
+            return Day
+        UserId=Day.get('userId')
+        Date=Day.get('date')
+        Day=dict(Day)
+        Day['records']=[TimeTrackCell(UserId,Date,Record.get('taskId'),Record.get('time'),Record.get('comment')) for Record in Day.get('records',[])]
+        return Day
+
+    def _Patch(self,requrl: str,Data: str):
+        """ 
+            Name: actiPyme.Driver._Patch(requrl: str,Data: str)
+
+            Args:   requrl, full url of the resource
+                    Data, JSON body as string
+
+            Desc: Performs a PATCH through the connection pool, see _Resilient(). The output is the response object
+        """
+        return self._Resilient("PATCH",requrl,self.writeDefheaders,Data)
+
+    def Start(self):
+        """ 
+            Name: actiPyme.Driver.Start()
+
+            Args:  Void
+
+            Desc: This method starts up the driver. Handshake is performed by means of user self identification.
+        """        
+        try:
+            self.Handshake()
+        except requests.exceptions.HTTPError as errh:
+            print ("Http Error:",errh)
+            sys.exit(1)
+        except requests.exceptions.ConnectionError as errc:
+            print ("Error Connecting:",errc)
+            sys.exit(1)
+        except requests.exceptions.Timeout as errt:
+            print ("Timeout Error:",errt)
+            sys.exit(1)
+        except requests.exceptions.RequestException as err:
+            print ("Oops: Something Else",err)
+            sys.exit(1)
+
+    def Handshake(self):
+        """ 
+            Name: actiPyme.Driver.Handshake()
+
+            Args:  Void
+
+            Desc: Same as Start(), but communication errors are raised (requests exceptions) instead of terminating the process.
+                  Useful when many drivers are started by the same program. Transient errors are retried, see _Resilient().
+                  With a CacheFile a fresh cached identity is used instead of the /users/me request
+        """
+        requrl=self.Target
+        requrl+="/users/me"
+        IdData=None
+        if self.Persistent is not None:
+            IdData=self.Persistent.Lookup(self.Target,self.actitimeUserName,self._PersistentSecret(),requrl)
+        if IdData is None:
+            self._OpenPool()
+            MyIdReq=self._Resilient("GET",requrl,Timeout=self.HandshakeTimeout)
+
+            IdData=self._Decode(MyIdReq)
+            if self.Persistent is not None:
+                self.Persistent.Store(self.Target,self.actitimeUserName,self._PersistentSecret(),requrl,"me",IdData)
+        self.IdNumber=IdData['id']
+        self.IdName=IdData['firstName']
+        self.IdSurname=IdData['lastName']
+        self.IsStarted=True
+
+    def Stop(self):
+        """ 
+            Name: actiPyme.Driver.Stop()
+
+            Args:  Void
+
+            Desc: This method shuts down the driver and closes the connection pool. Useful to re initialize the communication.
+        """   
+        self._ClosePool()
+        self.IdNumber=""
+        self.IdName=""
+        self.IdSurname=""
+        self.IsStarted=False
+
+
+    def CustomerList(self):
+        """ 
+            Name: actiPyme.Driver.CustomerList()
+
+            Args:  Void
+
+            Desc: Simply get the info about the customers. The output is a JSON object
+        """
+        if  self.IsStarted:   
+            requrl=self.Target
+            requrl+="/customers"
+            Clients=self._GetCached("customers",requrl)
+        else:
+            Clients={}
+            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+        
+        return self._AsRecordPage(Customer,Clients)
+
+    def LeaveTypesList(self):
+        """ 
+            Name: actiPyme.Driver.LeaveTypesList()
+
+            Args:  Void
+
+            Desc: Simply get the info about the leave types. The output is a JSON object
+        """
+        if  self.IsStarted:   
+            requrl=self.Target
+            requrl+="/leaveTypes"
+            Leaves=self._GetCached("leaveTypes",requrl)
+        else:
+            Leaves={}
+            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+        
+        return Leaves
+
+    def SearchTasks(self,SearchMethod: int,SearchArgument: str):
+        """ 
+            Name: actiPyme.Driver.SearchTasks(SearchMethod: str, SearchArgument: str)
+
+            Args:   SearchMethod, specify how you want to search: 1 - By Name; 2 - By task id; 3 - By customer id; 4 - By project id
+                    SearchArgument, what you want to search as string
+
+            Desc: This function lets you search for a task inside the actitime database. The output is a JSON object
+        """
+
+        MethodDict={1: "ByName", 2: "ByIds", 3: "ByCustomerIds", 4: "ByProjectIds"}
+        if self.IsStarted:
+            #switch on the dictionary   
+            SrcMethTok=MethodDict.get(SearchMethod,"err")
+            if SrcMethTok=="err":
+                SrcResult={}
+                raise Exception('Inappropriate or bad search method')
+            elif SrcMethTok=="ByName":
+                #Here we look for a name
+                requrl=self.Target+"/tasks?offset=0&words="+SearchArgument
+                SrcResult=self._GetJson(requrl)
+            elif SrcMethTok=="ByIds":
+                #Here we look for a task ID
+                requrl=self.Target+"/tasks?offset=0&ids="+SearchArgument
+                SrcResult=self._GetJson(requrl)
+            elif SrcMethTok=="ByCustomerIds":
+                #Here we look for a customer ID
+                requrl=self.Target+"/tasks?offset=0&customerIds="+SearchArgument
+                SrcResult=self._GetJson(requrl)
+            elif SrcMethTok=="ByProjectIds":
+                #Here we look for a project ID
+                requrl=self.Target+"/tasks?offset=0&projectIds="+SearchArgument
+                SrcResult=self._GetJson(requrl)
+            else:
+                SrcResult={}
+                raise Exception('Inappropriate or bad search method')    
+        else:
+            SrcResult={}
+            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+
+        return self._AsRecordPage(Task,SrcResult)
+
+    def SearchProjects(self, SearchMethod: int,SearchArgument: str):
+        """ 
+            Name: actiPyme.Driver.SearchProjects(SearchMethod: str, SearchArgument: str)
+
+            Args:   SearchMethod, specify how you want to search: 1 - By Name; 2 - By task id; 3 - By customer id; 
+                    SearchArgument, what you want to search as string
+
+            Desc: This function lets you search for a task inside the actitime database. The output is a JSON object
+        """
+        MethodDict={1: "ByName", 2: "ByIds", 3: "ByCustomerIds"}
+        if self.IsStarted:
+            #switch on the dictionary   
+            SrcMethTok=MethodDict.get(SearchMethod,"err")
+            if SrcMethTok=="err":
+                SrcResult={}
+                raise Exception('Inappropriate or bad search method')
+            elif SrcMethTok=="ByName":
+                #Here we look for a name
+                requrl=self.Target+"/projects?offset=0&words="+SearchArgument
+                SrcResult=self._GetJson(requrl)
+            elif SrcMethTok=="ByIds":
+                #Here we look for a project ID
+                requrl=self.Target+"/projects?offset=0&ids="+SearchArgument
+                SrcResult=self._GetJson(requrl)
+            elif SrcMethTok=="ByCustomerIds":
+                #Here we look for a customer ID
+                requrl=self.Target+"/projects?offset=0&customerIds="+SearchArgument
+                SrcResult=self._GetJson(requrl)
+            else:
+                SrcResult={}
+                raise Exception('Inappropriate or bad search method')    
+        else:
+            SrcResult={}
+            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+
+        return self._AsRecordPage(Project,SrcResult)
+
+
+
+    def GetDayTimeTrack(self,usrIds: int, Year: int,Month: int,Day: int,TaskId:int):
+        """ 
+            Name: actiPyme.Driver.GetDayTimeTrack(self,usrIds: int, Year: int,Month: int,Day: int,TaskId:int)
+
+            Args:   usrIds, user number for which you want to read the time sheet
+                    Year, when you want to query timesheet data
+                    Month, when you want to query timesheet data
+                    Day, when you want to query timesheet data
+                    TaskId, the identifier of the task (check actitime website)
+
+            Desc: This function lets you query the data from actitime time sheet. The output is a JSON object
+
+        """
+        if  self.IsStarted: 
+            assembler="-"
+            dateQuery=assembler.join([str(Year),str(Month).zfill(2),str(Day).zfill(2)])
+            requrl=self.Target+"/timetrack/"+str(usrIds)+"/"+dateQuery+"/"+str(TaskId)
+            TtrackData=self._GetJson(requrl)
+        else:
+            TtrackData={}
+            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+
+        return self._AsRecord(TimeTrackCell,TtrackData)
+
+    def WriteDayTimeTrack(self,usrIds: int, Year: int,Month: int,Day: int,TaskId:int,TimeAsMinute: int,Comment: str):
+        """ 
+            Name: actiPyme.Driver.WriteDayTimeTrack(self,usrIds: int, Year: int,Month: int,Day: int,TaskId:int,TimeAsMinute: int,Comment: str)
+
+            Args:   usrIds, user number for which you want to write the time sheet
+                    Year, when you want to query timesheet data
+                    Month, when you want to query timesheet data
+                    Day, when you want to query timesheet data
+                    TaskId, the identifier of the task (check actitime website)
+                    TimeAsMinute, time spent on the task in minutes
+                    Comment, comment to the task (empty string if no comment should be posted)
+
+            Desc: This function lets you query the data from actitime time sheet. The output is a JSON object 
+
+        """
+        if  self.IsStarted:
+            assembler="-"
+            dateQuery=assembler.join([str(Year),str(Month).zfill(2),str(Day).zfill(2)])
+            requrl=self.Target+"/timetrack/"+str(usrIds)+"/"+dateQuery+"/"+str(TaskId)
+            #assemble data in json format
+            dataToWrite=json.dumps({'time': TimeAsMinute,'comment': Comment})
+            #finally write
+            WtReq=self._Patch(requrl,dataToWrite)
+            TtrackData=self._Decode(WtReq)
+        else:
+            TtrackData={}
+            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+
+        return TtrackData
+
+    def GetTaskInfo(self, TaskId:int):
+        """ 
+            Name: actiPyme.Driver.GetTaskInfo(self, TaskId:int)
+
+            Args:   TaskId, the ID number of the task 
+
+            Desc: This function returns the info and the properties of a task. The output is a JSON object
+        """
+        if  self.IsStarted: 
+            requrl=self.Target+"/tasks/"+str(TaskId)
+            TaskInfo=self._GetCached("tasks",requrl)
+        else:
+            TaskInfo={}
+            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+
+        return self._AsRecord(Task,TaskInfo)
+
+    def GetActiTimeInfo(self):
+        """ 
+            Name: actiPyme.Driver.GetActiTimeInfo()
+
+            Args:  Void
+
+            Desc: Simply get the info about the actitime installation. The output is a JSON object
+        """
+        if  self.IsStarted: 
+            requrl=self.Target+"/info/"
+            ActiInfo=self._GetCached("info",requrl)
+        else:
+            ActiInfo={}
+            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+        return ActiInfo
+    
+    def DepartmentList(self):
+        """ 
+            Name: actiPyme.Driver.DepartmentList()
+
+            Args:  Void
+
+            Desc: Simply get the list of all departments. The output is a JSON object
+        """
+        if  self.IsStarted: 
+            requrl=self.Target+"/departments/"
+            DepInfo=self._GetCached("departments",requrl)
+        else:
+            DepInfo={}
+            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+
+        return DepInfo
+
+    def GetDepartmentInfo(self,DepartmentId: int):
+        """ 
+            Name: actiPyme.Driver.GetDepartmentInfo(self,DepartmentId: int)
+
+            Args:  DepartmentId, identification number of department
+
+            Desc: get the info of one department. The output is a JSON object
+        """
+        if  self.IsStarted: 
+            requrl=self.Target+"/departments/"+str(DepartmentId)
+            DepInfo=self._GetCached("departments",requrl)
+        else:
+            DepInfo={}
+            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+
+        return DepInfo
+
+    def GetProjectInfo(self, ProjectId: int):
+        """ 
+            Name: actiPyme.Driver.GetProjectInfo(self, ProjectId: int)
+
+            Args:  ProjectId, identification number of the project
+
+            Desc: get the info of one project. The output is a JSON object
+        """
+        if  self.IsStarted: 
+            requrl=self.Target+"/projects/"+str(ProjectId)
+            ProjInfo=self._GetCached("projects",requrl)
+        else:
+            ProjInfo={}
+            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+
+        return self._AsRecord(Project,ProjInfo)
+
+    def SearchUsers(self, SearchMethod: int,SearchArgument: str):
+        """ 
+            Name: actiPyme.Driver.SearchUsers(SearchMethod: str, SearchArgument: str)
+
+            Args:   SearchMethod, specify how you want to search: 1 - By Full Name; 2 - By user Id; 3 - By department; 4 - By email; 
+                    SearchArgument, what you want to search as string
+
+            Desc: This function lets you search for a task inside the actitime database. The output is a JSON object
+        """
+        MethodDict={1: "ByFullName", 2: "ByIds", 3: "ByDepartment", 4: "ByEmail"}
+        if self.IsStarted:
+            #switch on the dictionary   
+            SrcMethTok=MethodDict.get(SearchMethod,"err")
+            if SrcMethTok=="err":
+                SrcResult={}
+                raise Exception('Inappropriate or bad search method')
+            elif SrcMethTok=="ByFullName":
+                #Here we look for a full name
+                requrl=self.Target+"/users?offset=0&name="+SearchArgument
+                SrcResult=self._GetJson(requrl)
+            elif SrcMethTok=="ByIds":
+                #Here we look for a user ID
+                requrl=self.Target+"/users?offset=0&ids="+SearchArgument
+                SrcResult=self._GetJson(requrl)
+            elif SrcMethTok=="ByDepartment":
+                #Here we look for a department
+                requrl=self.Target+"/users?offset=0&department="+SearchArgument
+                SrcResult=self._GetJson(requrl)
+            elif SrcMethTok=="ByEmail":
+                #Here we look for an email addresss
+                requrl=self.Target+"/users?offset=0&email="+SearchArgument
+                SrcResult=self._GetJson(requrl)
+            else:
+                SrcResult={}
+                raise Exception('Inappropriate or bad search method')    
+        else:
+            SrcResult={}
+            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+
+        return self._AsRecordPage(User,SrcResult)
+
+    def _IterPages(self,Resource: str,Query: str,PageSize: int,Prefetch: bool):
+        """ 
+            Name: actiPyme.Driver._IterPages(Resource: str,Query: str,PageSize: int,Prefetch: bool)
+
+            Args:   Resource, collection endpoint (tasks, projects, users)
+                    Query, extra query string appended to offset and limit (starting with &)
+                    PageSize, number of items asked for each page (at most MaxPageSize)
+                    Prefetch, fetch the next page in background while the current one is consumed
+
+            Desc: Generator walking all the pages of a collection endpoint. Items are yielded one by one, without
+                  Prefetch they are yielded while the page is received (see Streaming). Walking stops at the first
+                  page shorter than the limit the server actually applied (the limit member of the page).
+        """
+        PageSize=max(1,min(int(PageSize),self.MaxPageSize))
+
+        def FetchPage(Offset):
+            requrl=self.Target+"/"+Resource+"?offset="+str(Offset)+"&limit="+str(PageSize)+Query
+            return self._Decode(self._GetBulk(requrl))
+
+        if not Prefetch:
+            Offset=0
+            while True:
+                requrl=self.Target+"/"+Resource+"?offset="+str(Offset)+"&limit="+str(PageSize)+Query
+                Count=0
+                Fields={}
+                for Item in self._StreamJson(requrl,'items',Fields):
+                    Count+=1
+                    yield Item
+                Offset+=Count
+                if Count==0 or Count<int(Fields.get('limit') or PageSize):
+                    return
+
+        Prefetcher=ThreadPoolExecutor(max_workers=1) if Prefetch else None
+        try:
+            Offset=0
+            Page=FetchPage(Offset)
+            while True:
+                Items=Page.get('items',[])
+                Offset+=len(Items)
+                HasMore=len(Items)>0 and len(Items)>=int(Page.get('limit') or PageSize)
+                if HasMore and Prefetcher is not None:
+                    NextPage=Prefetcher.submit(FetchPage,Offset)
+                for Item in Items:
+                    yield Item
+                if not HasMore:
+                    break
+                Page=NextPage.result() if Prefetcher is not None else FetchPage(Offset)
+        finally:
+            if Prefetcher is not None:
+                Prefetcher.shutdown(wait=False,cancel_futures=True)
+
+    def _SearchQuery(self,SearchFields: dict,SearchMethod,SearchArgument):
+        """ 
+            Name: actiPyme.Driver._SearchQuery(SearchFields: dict,SearchMethod,SearchArgument)
+
+            Args:   SearchFields, dictionary search method -> query field
+                    SearchMethod, search method (None means no filter)
+                    SearchArgument, what you want to search as string
+
+            Desc: Validates the search method and builds the filter part of the query string
+        """
+        if not self.IsStarted:
+            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+        if SearchMethod is None:
+            return ""
+        Field=SearchFields.get(SearchMethod,"err")
+        if Field=="err":
+            raise Exception('Inappropriate or bad search method')
+        return "&"+Field+"="+quote(str(SearchArgument),safe=',')
+
+    def IterTasks(self,SearchMethod: int=None,SearchArgument: str="",PageSize: int=1000,Prefetch: bool=False):
+        """ 
+            Name: actiPyme.Driver.IterTasks(SearchMethod: int=None, SearchArgument: str="", PageSize: int=1000, Prefetch: bool=False)
+
+            Args:   SearchMethod, same as SearchTasks (None to walk through all the tasks)
+                    SearchArgument, what you want to search as string
+                    PageSize, number of tasks fetched with each request
+                    Prefetch, fetch the next page in background while the current one is consumed
+
+            Desc: Lazy version of SearchTasks following all the result pages. The output is a generator of task JSON objects
+        """
+        Query=self._SearchQuery(self.TaskSearchFields,SearchMethod,SearchArgument)
+        return self._AsRecords(Task,self._IterPages("tasks",Query,PageSize,Prefetch))
+
+    def IterProjects(self,SearchMethod: int=None,SearchArgument: str="",PageSize: int=1000,Prefetch: bool=False):
+        """ 
+            Name: actiPyme.Driver.IterProjects(SearchMethod: int=None, SearchArgument: str="", PageSize: int=1000, Prefetch: bool=False)
+
+            Args:   SearchMethod, same as SearchProjects (None to walk through all the projects)
+                    SearchArgument, what you want to search as string
+                    PageSize, number of projects fetched with each request
+                    Prefetch, fetch the next page in background while the current one is consumed
+
+            Desc: Lazy version of SearchProjects following all the result pages. The output is a generator of project JSON objects
+        """
+        Query=self._SearchQuery(self.ProjectSearchFields,SearchMethod,SearchArgument)
+        return self._AsRecords(Project,self._IterPages("projects",Query,PageSize,Prefetch))
+
+    def IterUsers(self,SearchMethod: int=None,SearchArgument: str="",PageSize: int=1000,Prefetch: bool=False):
+        """ 
+            Name: actiPyme.Driver.IterUsers(SearchMethod: int=None, SearchArgument: str="", PageSize: int=1000, Prefetch: bool=False)
+
+            Args:   SearchMethod, same as SearchUsers (None to walk through all the users)
+                    SearchArgument, what you want to search as string
+                    PageSize, number of users fetched with each request
+                    Prefetch, fetch the next page in background while the current one is consumed
+
+            Desc: Lazy version of SearchUsers following all the result pages. The output is a generator of user JSON objects
+        """
+        Query=self._SearchQuery(self.UserSearchFields,SearchMethod,SearchArgument)
+        return self._AsRecords(User,self._IterPages("users",Query,PageSize,Prefetch))
+
+    def GetTasksInfo(self,TaskIds,Workers: int=4):
+        """ 
+            Name: actiPyme.Driver.GetTasksInfo(TaskIds,Workers: int=4)
+
+            Args:   TaskIds, iterable of task ids (duplicates allowed)
+                    Workers, number of requests sent in parallel
+
+            Desc: Batch version of GetTaskInfo, see actiPyme.BatchLoader. The output is a dictionary task id -> task JSON object
+        """
+        Loader=BatchLoader(self,"tasks",Workers=Workers)
+        Loader.Add(TaskIds)
+        Items=Loader.Load()
+        return {Id: Task.FromDict(Item) for Id,Item in Items.items()} if self.Records else Items
+
+    def GetProjectsInfo(self,ProjectIds,Workers: int=4):
+        """ 
+            Name: actiPyme.Driver.GetProjectsInfo(ProjectIds,Workers: int=4)
+
+            Args:   ProjectIds, iterable of project ids (duplicates allowed)
+                    Workers, number of requests sent in parallel
+
+            Desc: Batch version of GetProjectInfo, see actiPyme.BatchLoader. The output is a dictionary project id -> project JSON object
+        """
+        Loader=BatchLoader(self,"projects",Workers=Workers)
+        Loader.Add(ProjectIds)
+        Items=Loader.Load()
+        return {Id: Project.FromDict(Item) for Id,Item in Items.items()} if self.Records else Items
+
+    def GetUsersInfo(self,UserIds,Workers: int=4):
+        """ 
+            Name: actiPyme.Driver.GetUsersInfo(UserIds,Workers: int=4)
+
+            Args:   UserIds, iterable of user ids (duplicates allowed)
+                    Workers, number of requests sent in parallel
+
+            Desc: Batch version of SearchUsers(2,...), see actiPyme.BatchLoader. The output is a dictionary user id -> user JSON object
+        """
+        Loader=BatchLoader(self,"users",Workers=Workers)
+        Loader.Add(UserIds)
+        Items=Loader.Load()
+        return {Id: User.FromDict(Item) for Id,Item in Items.items()} if self.Records else Items
+    
+    def GetLeaveTime(self, UserId: int,YearFrom: int,MonthFrom: int,DayFrom: int,YearTo: int,MonthTo: int, DayTo: int):
+        """ 
+            Name: actiPyme.Driver.GetLeaveTime(self, UserId: int,YearFrom: int,MonthFrom: int,DayFrom: int,YearTo: int,MonthTo: int, DayTo: int)
+
+            Args:   userId, user number for which you want to read the time sheet
+                    YearFrom, start date you want to query timesheet data
+                    MonthFrom, start date want to query timesheet data
+                    DayFrom, start date want to query timesheet data
+                    YearTo, end date want to query timesheet data
+                    MonthTo, end date want to query timesheet data
+                    DayTo, end date want to query timesheet data
+
+            Desc: This function lets you query the leave time from actitime time sheet. The output is a JSON object
+
+        """
+
+        if  self.IsStarted: 
+            assembler="-"
+            dateFrom=assembler.join([str(YearFrom),str(MonthFrom).zfill(2),str(DayFrom).zfill(2)])
+            dateTo=assembler.join([str(YearTo),str(MonthTo).zfill(2),str(DayTo).zfill(2)])
+            requrl=self.Target+"/leavetime?userIds="+str(UserId)+"&dateFrom="+dateFrom+"&dateTo="+dateTo
+            LeaveData=self._GetJson(requrl)
+        else:
+            LeaveData={}
+            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+
+        return self._AsRecordPage(LeaveCell,LeaveData,'data')
+
+    def GetTimeSheetDateInterval(self,  UserId: int,YearFrom: int,MonthFrom: int,DayFrom: int,YearTo: int,MonthTo: int, DayTo: int):
+        """ 
+            Name: actiPyme.Driver.GetTimeSheetDateInterval(self, UserId: int,YearFrom: int,MonthFrom: int,DayFrom: int,YearTo: int,MonthTo: int, DayTo: int)
+
+            Args:   userId, user number for which you want to read the time sheet
+                    YearFrom, start date you want to query timesheet data
+                    MonthFrom, start date want to query timesheet data
+                    DayFrom, start date want to query timesheet data
+                    YearTo, end date want to query timesheet data
+                    MonthTo, end date want to query timesheet data
+                    DayTo, end date want to query timesheet data
+
+            Desc: This function lets you query the time sheet of a user within a date interval. The output is a JSON object
+
+        """
+        if  self.IsStarted: 
+            assembler="-"
+            dateFrom=assembler.join([str(YearFrom),str(MonthFrom).zfill(2),str(DayFrom).zfill(2)])
+            dateTo=assembler.join([str(YearTo),str(MonthTo).zfill(2),str(DayTo).zfill(2)])
+            requrl=self.Target+"/timetrack?userIds="+str(UserId)+"&dateFrom="+dateFrom+"&dateTo="+dateTo
+            TimesheetData=self._GetJson(requrl)
+        else:
+            TimesheetData={}
+            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+
+        if self.Records and not _IsErrorBody(TimesheetData):
+            TimesheetData=dict(TimesheetData,data=[self._AsRecordDay(Day) for Day in TimesheetData.get('data',[])])
+        return TimesheetData
+
+    def IterTimeSheetDateInterval(self,UserId: int,YearFrom: int,MonthFrom: int,DayFrom: int,YearTo: int,MonthTo: int,DayTo: int):
+        """ 
+            Name: actiPyme.Driver.IterTimeSheetDateInterval(UserId: int,YearFrom: int,MonthFrom: int,DayFrom: int,YearTo: int,MonthTo: int,DayTo: int)
+
+            Args:   see GetTimeSheetDateInterval()
+
+            Desc: Streaming version of GetTimeSheetDateInterval for long intervals. The output is a generator of the
+                  days of the 'data' array ({'userId','date','records',...}), yielded while the response is received
+        """
+        if not self.IsStarted:
+            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+        DateFrom=datetime.date(YearFrom,MonthFrom,DayFrom).isoformat()
+        DateTo=datetime.date(YearTo,MonthTo,DayTo).isoformat()
+        return map(self._AsRecordDay,self._IterDays("timetrack",str(UserId),DateFrom,DateTo))
+
+    def IterLeaveTime(self,UserId: int,YearFrom: int,MonthFrom: int,DayFrom: int,YearTo: int,MonthTo: int,DayTo: int):
+        """ 
+            Name: actiPyme.Driver.IterLeaveTime(UserId: int,YearFrom: int,MonthFrom: int,DayFrom: int,YearTo: int,MonthTo: int,DayTo: int)
+
+            Args:   see GetLeaveTime()
+
+            Desc: Streaming version of GetLeaveTime. The output is a generator of the elements of the 'data' array
+        """
+        if not self.IsStarted:
+            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+        DateFrom=datetime.date(YearFrom,MonthFrom,DayFrom).isoformat()
+        DateTo=datetime.date(YearTo,MonthTo,DayTo).isoformat()
+        return self._AsRecords(LeaveCell,self._IterDays("leavetime",str(UserId),DateFrom,DateTo))
+
+    def _IterDateInterval(self,Resource: str,UserIds: str,DateFrom: str,DateTo: str):
+        """ 
+            Name: actiPyme.Driver._IterDateInterval(Resource: str,UserIds: str,DateFrom: str,DateTo: str)
+
+            Args:   Resource, "timetrack" or "leavetime"
+                    UserIds, comma separated user ids
+                    DateFrom, DateTo, date interval as YYYY-MM-DD
+
+            Desc: Generator of the flat records of a date interval, see _IterDays(). Time track days are flattened in
+                  one record per task: {'userId','date','taskId','time','comment',...}
+        """
+        for Day in self._IterDays(Resource,UserIds,DateFrom,DateTo):
+            if 'records' in Day:
+                for Record in Day['records']:
+                    FlatRecord=dict(Record)
+                    FlatRecord['userId']=Day.get('userId')
+                    FlatRecord['date']=Day.get('date')
+                    yield FlatRecord
+            else:
+                yield Day
+
+    def _IterDays(self,Resource: str,UserIds: str,DateFrom: str,DateTo: str):
+        """ 
+            Name: actiPyme.Driver._IterDays(Resource: str,UserIds: str,DateFrom: str,DateTo: str)
+
+            Args:   see _IterDateInterval()
+
+            Desc: Generator of the elements of the data array of a date interval, as sent by the server (one per user and day).
+                  The server may split the answer, in that case the request is repeated from nextDateFrom.
+        """
+        while True:
+            requrl=self.Target+"/"+Resource+"?userIds="+UserIds+"&dateFrom="+DateFrom+"&dateTo="+DateTo
+            Fields={}
+            yield from self._StreamJson(requrl,'data',Fields)
+            NextDateFrom=Fields.get('nextDateFrom')
+            if not NextDateFrom or NextDateFrom<=DateFrom or NextDateFrom>DateTo:
+                break
+            DateFrom=NextDateFrom
+
+    @staticmethod
+    def _CheckChunking(UserBatch: int,WindowDays: int,Workers: int):
+        """ 
+            Name: actiPyme.Driver._CheckChunking(UserBatch: int,WindowDays: int,Workers: int)
+
+            Desc: Checks the chunking arguments of the bulk reads before anything is fetched: a window of no days would
+                  never advance
+        """
+        for Name,Value in (("UserBatch",UserBatch),("WindowDays",WindowDays),("Workers",Workers)):
+            if int(Value)<=0:
+                raise ValueError(Name+" must be a positive integer, got "+repr(Value))
+
+    def _FetchChunked(self,Resource: str,KeyFields: tuple,UserIds,DateFrom,DateTo,UserBatch: int,WindowDays: int,Workers: int):
+        """ 
+            Name: actiPyme.Driver._FetchChunked(Resource,KeyFields,UserIds,DateFrom,DateTo,UserBatch,WindowDays,Workers))
+
+            Args:   see FetchTimeTrack()
+
+            Desc: Splits the query in (user batch x date window) chunks, fetches them on a thread pool and yields
+                  the records chunk after chunk, in chunk order. Every chunk hands its records over while they are decoded
+                  through a small bounded queue, so the records of the first chunk come out while its response is still
+                  being received and at most StreamQueueBatches x StreamBatchRecords records of each chunk in flight are
+                  held in memory. Duplicated records (same KeyFields) are dropped, the first one is kept.
+        """
+        if not self.IsStarted:
+            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+        DateFrom=_AsDate(DateFrom)
+        DateTo=_AsDate(DateTo)
+        UserIds=list(dict.fromkeys(str(UserId) for UserId in UserIds))
+        Batches=[",".join(UserIds[Pos:Pos+UserBatch]) for Pos in range(0,len(UserIds),UserBatch)]
+        Windows=[]
+        WindowStart=DateFrom
+        while WindowStart<=DateTo:
+            WindowEnd=min(WindowStart+datetime.timedelta(days=WindowDays-1),DateTo)
+            Windows.append((WindowStart.isoformat(),WindowEnd.isoformat()))
+            WindowStart=WindowEnd+datetime.timedelta(days=1)
+        Chunks=[(Batch,Window) for Batch in Batches for Window in Windows]
+
+        Stopped=threading.Event()
+
+        def Put(Output,Item):
+            # gives up when the consumer has gone away, so that no worker stays blocked on a full queue
+            while not Stopped.is_set():
+                try:
+                    Output.put(Item,timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def FetchChunk(Chunk,Output):
+            Batch,(WindowFrom,WindowTo)=Chunk
+            Seen=set()
+            Records=[]
+            try:
+                for Record in self._IterDateInterval(Resource,Batch,WindowFrom,WindowTo):
+                    Key=tuple(Record.get(Field) for Field in KeyFields)
+                    if Key in Seen:
+                        continue
+                    Seen.add(Key)
+                    Records.append(Record)
+                    if len(Records)>=self.StreamBatchRecords:
+                        if not Put(Output,Records):
+                            return
+                        Records=[]
+                if Records and not Put(Output,Records):
+                    return
+                Put(Output,None)
+            except BaseException as Err:
+                Put(Output,Err)
+
+        def Submit(Chunk):
+            Output=queue.Queue(maxsize=self.StreamQueueBatches)
+            Executor.submit(FetchChunk,Chunk,Output)
+            return Output
+
+        # a bounded number of chunks is in flight, so memory does not grow with the interval. The oldest chunk is
+        # always running (the pool runs the chunks in submission order), so waiting on its queue cannot deadlock
+        Executor=ThreadPoolExecutor(max_workers=Workers)
+        try:
+            ChunkIter=iter(Chunks)
+            Pending=deque(Submit(Chunk) for Chunk in itertools.islice(ChunkIter,2*Workers))
+            while Pending:
+                Output=Pending.popleft()
+                NextChunk=next(ChunkIter,None)
+                if NextChunk is not None:
+                    Pending.append(Submit(NextChunk))
+                while True:
+                    Records=Output.get()
+                    if Records is None:
+                        break
+                    if isinstance(Records,BaseException):
+                        raise Records
+                    yield from Records
+        finally:
+            Stopped.set()
+            Executor.shutdown(wait=False,cancel_futures=True)
+
+    def FetchTimeTrack(self,UserIds,DateFrom,DateTo,UserBatch: int=50,WindowDays: int=31,Workers: int=4):
+        """ 
+            Name: actiPyme.Driver.FetchTimeTrack(UserIds,DateFrom,DateTo,UserBatch: int=50,WindowDays: int=31,Workers: int=4)
+
+            Args:   UserIds, iterable of user ids
+                    DateFrom, DateTo, date interval (datetime.date or YYYY-MM-DD string), both included
+                    UserBatch, number of users asked with each request
+                    WindowDays, number of days asked with each request
+                    Workers, number of requests sent in parallel
+
+            Desc: Bulk version of GetTimeSheetDateInterval for many users and long intervals. The query is split in
+                  (user batch x date window) chunks fetched concurrently. The output is a generator of flat records
+                  {'userId','date','taskId','time','comment',...}, one per user, day and task, without duplicates.
+                  UserBatch, WindowDays and Workers must be positive (ValueError)
+        """
+        self._CheckChunking(UserBatch,WindowDays,Workers)
+        return self._AsRecords(TimeTrackCell,self._FetchChunked("timetrack",('userId','date','taskId'),UserIds,DateFrom,DateTo,UserBatch,WindowDays,Workers))
+
+    def FetchLeaveTime(self,UserIds,DateFrom,DateTo,UserBatch: int=50,WindowDays: int=31,Workers: int=4):
+        """ 
+            Name: actiPyme.Driver.FetchLeaveTime(UserIds,DateFrom,DateTo,UserBatch: int=50,WindowDays: int=31,Workers: int=4)
+
+            Args:   see FetchTimeTrack()
+
+            Desc: Bulk version of GetLeaveTime for many users and long intervals. The output is a generator of leave
+                  records {'userId','date','leaveTypeId','leaveTime',...} without duplicates
+        """
+        self._CheckChunking(UserBatch,WindowDays,Workers)
+        return self._AsRecords(LeaveCell,self._FetchChunked("leavetime",('userId','date','leaveTypeId'),UserIds,DateFrom,DateTo,UserBatch,WindowDays,Workers))
+
+
+class AsyncDriver(object):
+    """ 
+    Name: actiPyme.AsyncDriver(Target,actitimeUserName,actitimePsw,MaxConcurrency=10,**DriverArgs)
+
+    Args:   Target, url of the actitime server
+            actitimeUserName, account user name
+            actitimePsw, account password
+            MaxConcurrency, max number of requests in flight at the same time
+            DriverArgs, any other keyword argument accepted by actiPyme.Driver (PoolSize, Timeout...)
+
+    Desc: This is the asyncio counterpart of actiPyme.Driver. Every method is a coroutine with the same
+          arguments and output of the Driver method with the same name, so many calls can be awaited together:
+
+                Drv=actiPyme.AsyncDriver(url,user,psw,MaxConcurrency=16)
+                await Drv.Start()
+                Tasks=await asyncio.gather(*[Drv.GetTaskInfo(Id) for Id in TaskIds])
+                await Drv.Stop()
+
+          Calls run on a worker thread pool sharing the keep-alive connection pool of the wrapped Driver,
+          and a single semaphore caps the number of requests in flight.
+    
+    """
+    def __init__(self,Target="",actitimeUserName="",actitimePsw="",MaxConcurrency=10,**DriverArgs):
+        DriverArgs.setdefault('PoolSize',MaxConcurrency)
+        self.Driver=Driver(Target,actitimeUserName,actitimePsw,**DriverArgs)
+        self.MaxConcurrency=MaxConcurrency
+        self._Executor=None
+        self._Semaphore=None
+        self._Loop=None
+
+    @property
+    def IsStarted(self):
+        return self.Driver.IsStarted
+
+    @property
+    def IdNumber(self):
+        return self.Driver.IdNumber
+
+    @property
+    def IdName(self):
+        return self.Driver.IdName
+
+    @property
+    def IdSurname(self):
+        return self.Driver.IdSurname
+
+    async def __aenter__(self):
+        await self.Start()
+        return self
+
+    async def __aexit__(self,*ExcInfo):
+        await self.Stop()
+
+    async def _Call(self,Method,*Args):
+        """ 
+            Name: actiPyme.AsyncDriver._Call(Method,*Args)
+
+            Args:   Method, bound method of the wrapped Driver
+                    Args, positional arguments of the method
+
+            Desc: Runs a blocking Driver method on the worker pool, waiting for a free slot of the semaphore first.
+        """
+        # already imported by the running event loop
+        import asyncio
+        Loop=asyncio.get_running_loop()
+        if self._Semaphore is None or self._Loop is not Loop:
+            self._Semaphore=asyncio.Semaphore(self.MaxConcurrency)
+            self._Loop=Loop
+        if self._Executor is None:
+            self._Executor=ThreadPoolExecutor(max_workers=self.MaxConcurrency,thread_name_prefix='actiPyme')
+        async with self._Semaphore:
+            return await Loop.run_in_executor(self._Executor,functools.partial(Method,*Args))
+
+    async def Start(self):
+        """ 
+            Name: actiPyme.AsyncDriver.Start()
+
+            Desc: Coroutine version of actiPyme.Driver.Start()
+        """
+        return await self._Call(self.Driver.Start)
+
+    async def Stop(self):
+        """ 
+            Name: actiPyme.AsyncDriver.Stop()
+
+            Desc: Coroutine version of actiPyme.Driver.Stop(). The worker pool is released too.
+        """
+        self.Driver.Stop()
+        if self._Executor is not None:
+            self._Executor.shutdown(wait=False)
+            self._Executor=None
+
+    async def CustomerList(self):
+        """ 
+            Name: actiPyme.AsyncDriver.CustomerList()
+
+            Desc: Coroutine version of actiPyme.Driver.CustomerList()
+        """
+        return await self._Call(self.Driver.CustomerList)
+
+    async def LeaveTypesList(self):
+        """ 
+            Name: actiPyme.AsyncDriver.LeaveTypesList()
+
+            Desc: Coroutine version of actiPyme.Driver.LeaveTypesList()
+        """
+        return await self._Call(self.Driver.LeaveTypesList)
+
+    async def SearchTasks(self,SearchMethod: int,SearchArgument: str):
+        """ 
+            Name: actiPyme.AsyncDriver.SearchTasks(SearchMethod: int, SearchArgument: str)
+
+            Desc: Coroutine version of actiPyme.Driver.SearchTasks()
+        """
+        return await self._Call(self.Driver.SearchTasks,SearchMethod,SearchArgument)
+
+    async def SearchProjects(self,SearchMethod: int,SearchArgument: str):
+        """ 
+            Name: actiPyme.AsyncDriver.SearchProjects(SearchMethod: int, SearchArgument: str)
+
+            Desc: Coroutine version of actiPyme.Driver.SearchProjects()
+        """
+        return await self._Call(self.Driver.SearchProjects,SearchMethod,SearchArgument)
+
+    async def SearchUsers(self,SearchMethod: int,SearchArgument: str):
+        """ 
+            Name: actiPyme.AsyncDriver.SearchUsers(SearchMethod: int, SearchArgument: str)
+
+            Desc: Coroutine version of actiPyme.Driver.SearchUsers()
+        """
+        return await self._Call(self.Driver.SearchUsers,SearchMethod,SearchArgument)
+
+    async def GetDayTimeTrack(self,usrIds: int,Year: int,Month: int,Day: int,TaskId: int):
+        """ 
+            Name: actiPyme.AsyncDriver.GetDayTimeTrack(usrIds: int, Year: int,Month: int,Day: int,TaskId:int)
+
+            Desc: Coroutine version of actiPyme.Driver.GetDayTimeTrack()
+        """
+        return await self._Call(self.Driver.GetDayTimeTrack,usrIds,Year,Month,Day,TaskId)
+
+    async def WriteDayTimeTrack(self,usrIds: int,Year: int,Month: int,Day: int,TaskId: int,TimeAsMinute: int,Comment: str):
+        """ 
+            Name: actiPyme.AsyncDriver.WriteDayTimeTrack(usrIds: int, Year: int,Month: int,Day: int,TaskId:int,TimeAsMinute: int,Comment: str)
+
+            Desc: Coroutine version of actiPyme.Driver.WriteDayTimeTrack()
+        """
+        return await self._Call(self.Driver.WriteDayTimeTrack,usrIds,Year,Month,Day,TaskId,TimeAsMinute,Comment)
+
+    async def GetTaskInfo(self,TaskId: int):
+        """ 
+            Name: actiPyme.AsyncDriver.GetTaskInfo(TaskId:int)
+
+            Desc: Coroutine version of actiPyme.Driver.GetTaskInfo()
+        """
+        return await self._Call(self.Driver.GetTaskInfo,TaskId)
+
+    async def GetActiTimeInfo(self):
+        """ 
+            Name: actiPyme.AsyncDriver.GetActiTimeInfo()
+
+            Desc: Coroutine version of actiPyme.Driver.GetActiTimeInfo()
+        """
+        return await self._Call(self.Driver.GetActiTimeInfo)
+
+    async def DepartmentList(self):
+        """ 
+            Name: actiPyme.AsyncDriver.DepartmentList()
+
+            Desc: Coroutine version of actiPyme.Driver.DepartmentList()
+        """
+        return await self._Call(self.Driver.DepartmentList)
+
+    async def GetDepartmentInfo(self,DepartmentId: int):
+        """ 
+            Name: actiPyme.AsyncDriver.GetDepartmentInfo(DepartmentId: int)
+
+            Desc: Coroutine version of actiPyme.Driver.GetDepartmentInfo()
+        """
+        return await self._Call(self.Driver.GetDepartmentInfo,DepartmentId)
+
+    async def GetProjectInfo(self,ProjectId: int):
+        """ 
+            Name: actiPyme.AsyncDriver.GetProjectInfo(ProjectId: int)
+
+            Desc: Coroutine version of actiPyme.Driver.GetProjectInfo()
+        """
+        return await self._Call(self.Driver.GetProjectInfo,ProjectId)
+
+    async def GetLeaveTime(self,UserId: int,YearFrom: int,MonthFrom: int,DayFrom: int,YearTo: int,MonthTo: int,DayTo: int):
+        """ 
+            Name: actiPyme.AsyncDriver.GetLeaveTime(UserId: int,YearFrom: int,MonthFrom: int,DayFrom: int,YearTo: int,MonthTo: int, DayTo: int)
+
+            Desc: Coroutine version of actiPyme.Driver.GetLeaveTime()
+        """
+        return await self._Call(self.Driver.GetLeaveTime,UserId,YearFrom,MonthFrom,DayFrom,YearTo,MonthTo,DayTo)
+
+    async def GetTimeSheetDateInterval(self,UserId: int,YearFrom: int,MonthFrom: int,DayFrom: int,YearTo: int,MonthTo: int,DayTo: int):
+        """ 
+            Name: actiPyme.AsyncDriver.GetTimeSheetDateInterval(UserId: int,YearFrom: int,MonthFrom: int,DayFrom: int,YearTo: int,MonthTo: int, DayTo: int)
+
+            Desc: Coroutine version of actiPyme.Driver.GetTimeSheetDateInterval()
+        """
+        return await self._Call(self.Driver.GetTimeSheetDateInterval,UserId,YearFrom,MonthFrom,DayFrom,YearTo,MonthTo,DayTo)
+
+
+class AbfParseError(ValueError):
+    """ 
+    Name: actiPyme.AbfParseError(Message,LineNumber)
+
+    Args:   Message, description of the formatting error
+            LineNumber, line of the .abf file where the error was found (1 based)
+
+    Desc: Error raised by AbfParser when the batch file is formatted in the wrong manner
+    
+    """
+    def __init__(self,Message,LineNumber):
+        self.LineNumber=LineNumber
+        super().__init__(Message+" (line "+str(LineNumber)+")")
+
+
+def _ParseAbfLines(Lines,FirstLineNumber=1,RowLimit=None):
+    """ 
+        Name: actiPyme._ParseAbfLines(Lines,FirstLineNumber=1,RowLimit=None)
+
+        Args:   Lines, iterable over the lines of an .abf file
+                FirstLineNumber, number of the first line (used for error reporting)
+                RowLimit, optional cap on the number of time sheet rows of one entry
+
+        Desc: Single pass parser of the actitime batch format. This is a generator of events:
+              ("row", user, psw, row) for every time sheet row and ("end", user, psw, None) at each END ENTRY.
+              Outside the entries only blank lines and comments are allowed. Only the current line is held in memory.
+    """
+    State="OUT"
+    User=""
+    Psw=""
+    RowCounter=0
+    LineNumber=FirstLineNumber-1
+    for LineNumber,InpLine in enumerate(Lines,FirstLineNumber):
+        if InpLine[:1]=="%":
+            continue
+        Command=InpLine.rstrip("\r\n").split(';')
+        Tag=Command[0]
+        if Tag=="" and len(Command)==1:
+            # blank line
+            continue
+        if State=="TIMESHEET":
+            if Tag=="END TIMESHEET":
+                State="END"
+                continue
+            if Tag in ("START ENTRY","END ENTRY","START TIMESHEET"):
+                raise AbfParseError("Input file formatted in the wrong manner. Expected END TIMESHEET before "+Tag,LineNumber)
+            if RowLimit is not None and RowCounter>=RowLimit:
+                raise AbfParseError("Too many time sheet rows. The limit is "+str(RowLimit),LineNumber)
+            try:
+                Row={'year': int(Command[0]),'month': int(Command[1]),'day': int(Command[2]),'task': int(Command[3]),'minutes': int(Command[4])}
+            except (ValueError,IndexError):
+                raise AbfParseError("Bad time sheet row. Expected year;month;day;task;minutes; but got "+repr(InpLine.rstrip("\r\n")),LineNumber) from None
+            RowCounter+=1
+            yield ("row",User,Psw,Row)
+        elif State=="OUT":
+            if Tag=="START ENTRY":
+                State="USERNAME"
+            elif InpLine.strip():
+                # a mistyped START ENTRY would silently drop the whole entry
+                raise AbfParseError("Input file formatted in the wrong manner. Expected START ENTRY but got "+repr(InpLine.rstrip("\r\n")),LineNumber)
+        elif State=="USERNAME":
+            if Tag!="USERNAME" or len(Command)<2:
+                raise AbfParseError("Input file formatted in the wrong manner. Expected USERNAME after START ENTRY",LineNumber)
+            User=Command[1]
+            State="PASSWORD"
+        elif State=="PASSWORD":
+            if Tag!="PASSWORD" or len(Command)<2:
+                raise AbfParseError("Input file formatted in the wrong manner. Expected PASSWORD after USERNAME",LineNumber)
+            Psw=Command[1]
+            State="START TIMESHEET"
+        elif State=="START TIMESHEET":
+            if Tag!="START TIMESHEET":
+                raise AbfParseError("Input file formatted in the wrong manner. Expected START TIMESHEET after PASSWORD",LineNumber)
+            RowCounter=0
+            State="TIMESHEET"
+        elif State=="END":
+            if Tag!="END ENTRY":
+                raise AbfParseError("Input file formatted in the wrong manner. Expected END ENTRY after END TIMESHEET",LineNumber)
+            yield ("end",User,Psw,None)
+            State="OUT"
+    if State!="OUT":
+        raise AbfParseError("Unexpected end of file. The last entry is not closed by END ENTRY",LineNumber)
+
+
+def _ParseAbfChunk(FileName: str,Start: int,End: int,Encoding: str,RowLimit=None):
+    """ 
+        Name: actiPyme._ParseAbfChunk(FileName: str,Start: int,End: int,Encoding: str,RowLimit=None)
+
+        Args:   FileName, .abf file
+                Start, End, byte range of the chunk, starting at a START ENTRY line
+                Encoding, text encoding of the file
+                RowLimit, see _ParseAbfLines()
+
+        Desc: Worker of AbfParser.IterEntries(Workers>1), run in a child process. The chunk is read from a memory map
+              of the file. The output is (entries, number of lines of the chunk); entries is None when the chunk does
+              not parse on its own, the caller then parses the file sequentially from Start to report the error
+    """
+    with open(FileName,"rb") as File, mmap.mmap(File.fileno(),0,access=mmap.ACCESS_READ) as Map:
+        Lines=io.TextIOWrapper(io.BytesIO(Map[Start:End]),encoding=Encoding).readlines()
+    Entries=[]
+    TimeSheet=[]
+    try:
+        for Event,User,Psw,Row in _ParseAbfLines(Lines,RowLimit=RowLimit):
+            if Event=="row":
+                TimeSheet.append(Row)
+            else:
+                Entries.append({'user': User,'psw': Psw,'timesheet': TimeSheet})
+                TimeSheet=[]
+    except AbfParseError:
+        return None,len(Lines)
+    return Entries,len(Lines)
+
+
+class AbfParser(object):
+    """ 
+    Name: actiPyme.AbfParser(FileName)
+
+    Args:   FileName, actitime batch format (.abf) file to be read
+
+    Desc:   This class implements the routines to load actitime time track data using a batch file.
+            The batch file should be formatted as described below (comments are with % at the start of line)
+
+                % actitime batch format file (.abf)
+                % comments are with the percentage charachter
+                % A. Lavatelli - 2019
+                %First entry
+                START ENTRY;
+                USERNAME;john.doe;
+                PASSWORD;FooBar18;
+                START TIMESHEET;
+                % format the timesheet as follows: year;month;day;task;minutes;
+                2019;8;19;558;180;
+                2019;8;19;13619;240;
+                END TIMESHEET;
+                END ENTRY;
+                %Here another entry
+                START ENTRY;
+                USERNAME;pippo.balera;
+                PASSWORD;ggghhhh;
+                START TIMESHEET;
+                2019;7;12;108;100;
+                2019;7;13;16509;70;
+                2019;8;1;21;40;
+                2019;8;3;009;30;
+                END TIMESHEET;
+                END ENTRY;
+    
+    """
+    def __init__ (self,FileName):
+        self.FileName=FileName
+        # try to open file
+        try:
+            self.InputFile=open(self.FileName,"r")
+        except:
+            raise Exception('Impossible to open file')
+
+        # optional cap on the time sheet rows of one entry (None means no limit)
+        self.TimeSheetRowLimit=None
+
+    def _Chunks(self,ChunkSize: int):
+        """ 
+            Name: actiPyme.AbfParser._Chunks(ChunkSize: int)
+
+            Args:  ChunkSize, approximate size of a chunk in bytes
+
+            Desc: Splits the file in byte ranges of about ChunkSize starting at a START ENTRY line, so that every
+                  chunk holds whole entries. The output is the list of (start, end) ranges
+        """
+        Size=os.path.getsize(self.FileName)
+        if Size==0:
+            return []
+        Bounds=[0]
+        with open(self.FileName,"rb") as File, mmap.mmap(File.fileno(),0,access=mmap.ACCESS_READ) as Map:
+            Pos=ChunkSize
+            while Pos<Size:
+                Pos=Map.find(b"\nSTART ENTRY",Pos-1)
+                if Pos<0:
+                    break
+                Bounds.append(Pos+1)
+                Pos+=1+ChunkSize
+        Bounds.append(Size)
+        return list(zip(Bounds[:-1],Bounds[1:]))
+
+    def _IterEntriesParallel(self,Workers: int,ChunkSize: int):
+        """ 
+            Name: actiPyme.AbfParser._IterEntriesParallel(Workers: int,ChunkSize: int)
+
+            Args:  see IterEntries()
+
+            Desc: Parses the chunks of the file (see _Chunks()) on a process pool and yields their entries in file order.
+                  A bounded number of chunks is in flight. When a chunk does not parse, the file is parsed sequentially
+                  from that chunk on, so the entries and the error are the same of the single process parser.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        Encoding=self.InputFile.encoding
+        LineNumber=1
+        FailedAt=None
+        Executor=ProcessPoolExecutor(max_workers=Workers)
+
+        def Submit(Chunk):
+            return Chunk[0],Executor.submit(_ParseAbfChunk,self.FileName,Chunk[0],Chunk[1],Encoding,self.TimeSheetRowLimit)
+
+        try:
+            ChunkIter=iter(self._Chunks(ChunkSize))
+            Pending=deque(Submit(Chunk) for Chunk in itertools.islice(ChunkIter,2*Workers))
+            while Pending:
+                Start,Parsed=Pending.popleft()
+                Entries,Lines=Parsed.result()
+                if Entries is None:
+                    FailedAt=Start
+                    break
+                NextChunk=next(ChunkIter,None)
+                if NextChunk is not None:
+                    Pending.append(Submit(NextChunk))
+                yield from Entries
+                LineNumber+=Lines
+        finally:
+            Executor.shutdown(wait=False,cancel_futures=True)
+        if FailedAt is not None:
+            with open(self.FileName,"rb") as File:
+                File.seek(FailedAt)
+                yield from self._IterEntriesOf(io.TextIOWrapper(File,encoding=Encoding),LineNumber)
+
+    def _IterEntriesOf(self,Lines,FirstLineNumber: int=1):
+        """ 
+            Name: actiPyme.AbfParser._IterEntriesOf(Lines,FirstLineNumber: int=1)
+
+            Args:  see _ParseAbfLines()
+
+            Desc: Generator of the entries of a sequence of lines
+        """
+        TimeSheet=[]
+        for Event,User,Psw,Row in _ParseAbfLines(Lines,FirstLineNumber,self.TimeSheetRowLimit):
+            if Event=="row":
+                TimeSheet.append(Row)
+            else:
+                yield {'user': User,'psw': Psw,'timesheet': TimeSheet}
+                TimeSheet=[]
+
+    def IterEntries(self,Workers: int=1,ChunkSize: int=32*1024*1024):
+        """ 
+            Name: actiPyme.AbfParser.IterEntries(Workers: int=1,ChunkSize: int=32*1024*1024)
+
+            Args:   Workers, number of parsing processes. With more than one the file is memory mapped, split on the
+                    START ENTRY lines in chunks of about ChunkSize bytes and the chunks are parsed in parallel
+                    ChunkSize, see Workers
+
+            Desc: Parses the file, yielding one entry at a time as {'user','psw','timesheet'}, in file order.
+                  Only the entry being parsed (the chunks in flight with Workers>1) is held in memory.
+                  Errors are raised as AbfParseError with the line number.
+        """
+        if Workers>1:
+            return self._IterEntriesParallel(Workers,ChunkSize)
+        return self._IterEntriesOf(self.InputFile)
+
+    def IterRows(self,Workers: int=1,ChunkSize: int=32*1024*1024):
+        """ 
+            Name: actiPyme.AbfParser.IterRows(Workers: int=1,ChunkSize: int=32*1024*1024)
+
+            Args:  see IterEntries()
+
+            Desc: Parses the file, yielding one time sheet row at a time as
+                  {'user','psw','year','month','day','task','minutes'}. Memory use does not depend on the file size.
+                  Errors are raised as AbfParseError with the line number.
+        """
+        if Workers>1:
+            for Entry in self._IterEntriesParallel(Workers,ChunkSize):
+                for Row in Entry['timesheet']:
+                    Row['user']=Entry['user']
+                    Row['psw']=Entry['psw']
+                    yield Row
+            return
+        for Event,User,Psw,Row in _ParseAbfLines(self.InputFile,RowLimit=self.TimeSheetRowLimit):
+            if Event=="row":
+                Row['user']=User
+                Row['psw']=Psw
+                yield Row
+
+    def Read(self,Workers: int=1,ChunkSize: int=32*1024*1024):
+        """ 
+            Name: actiPyme.AbfParser.Read(Workers: int=1,ChunkSize: int=32*1024*1024)
+
+            Args:  see IterEntries()
+
+            Desc: Parses the whole file. The output is the list of entries, see IterEntries()
+        """
+        return list(self.IterEntries(Workers,ChunkSize))
+
+    def Compile(self,CacheName: str=None,Workers: int=1,ChunkSize: int=32*1024*1024):
+        """ 
+            Name: actiPyme.AbfParser.Compile(CacheName: str=None,Workers: int=1,ChunkSize: int=32*1024*1024)
+
+            Args:   CacheName, binary cache file to write (default: the .abf file name + ".abfc")
+                    Workers, ChunkSize, see IterEntries()
+
+            Desc: Parses the file and saves the batch in the binary format of AbfBatch. The output is the opened AbfBatch
+        """
+        CacheName=CacheName if CacheName is not None else self.FileName+".abfc"
+        # the whole file is compiled, whatever was already read
+        self.InputFile.seek(0)
+        AbfBatch.Write(CacheName,self.FileName,self.IterEntries(Workers,ChunkSize))
+        return AbfBatch(CacheName)
+
+    def Cached(self,CacheName: str=None,Workers: int=1,ChunkSize: int=32*1024*1024):
+        """ 
+            Name: actiPyme.AbfParser.Cached(CacheName: str=None,Workers: int=1,ChunkSize: int=32*1024*1024)
+
+            Args:  see Compile()
+
+            Desc: The output is the AbfBatch of the file: the binary cache is memory mapped when it was compiled from
+                  the current content of the file, otherwise the file is parsed and the cache is written again.
+                  A batch processed many times (validation, dry run, upload) is parsed only once:
+
+                      Batch=actiPyme.AbfParser("month.abf").Cached()
+                      Report=Uploader.Upload(Batch.IterEntries())
+        """
+        CacheName=CacheName if CacheName is not None else self.FileName+".abfc"
+        if os.path.exists(CacheName):
+            try:
+                Batch=AbfBatch(CacheName)
+            except ValueError:
+                Batch=None
+            if Batch is not None:
+                if Batch.IsCompiledFrom(self.FileName):
+                    return Batch
+                Batch.Close()
+        return self.Compile(CacheName,Workers,ChunkSize)
+
+    def Close(self):
+        self.InputFile.close()
+
+
+def _FileHash(FileName: str):
+    """ 
+        Name: actiPyme._FileHash(FileName: str)
+
+        Args:  FileName, file to be hashed
+
+        Desc: The output is the SHA-256 digest of the file content
+    """
+    Hash=hashlib.sha256()
+    with open(FileName,"rb") as File:
+        for Block in iter(lambda: File.read(1024*1024),b""):
+            Hash.update(Block)
+    return Hash.digest()
+
+
+def _AbfRowLine(FileName: str,EntryIndex: int,RowIndex: int):
+    """ 
+        Name: actiPyme._AbfRowLine(FileName: str,EntryIndex: int,RowIndex: int)
+
+        Args:   FileName, .abf file
+                EntryIndex, RowIndex, entry number and time sheet row number within the entry (0 based)
+
+        Desc: Finds the line of a time sheet row, for error reporting. The output is the line number (1 based, 0 if not found)
+    """
+    LineNumber=[0]
+    def Lines(File):
+        for LineNumber[0],Line in enumerate(File,1):
+            yield Line
+    Entry=0
+    Row=0
+    with open(FileName,"r",encoding="utf-8",errors="replace") as File:
+        try:
+            for Event,_,_,_ in _ParseAbfLines(Lines(File)):
+                if Event=="row":
+                    if Entry==EntryIndex and Row==RowIndex:
+                        # the parser yields a row right after reading its line
+                        return LineNumber[0]
+                    Row+=1
+                else:
+                    Entry+=1
+                    Row=0
+        except AbfParseError:
+            pass
+    return 0
+
+
+class AbfBatch(object):
+    """ 
+    Name: actiPyme.AbfBatch(CacheName)
+
+    Args:   CacheName, binary cache file written by AbfParser.Compile()
+
+    Desc:   Parsed .abf batch loaded from its binary cache. The file is memory mapped and the time sheet columns are
+            exposed without copies as typed memoryviews (they can be wrapped with numpy.frombuffer() as well):
+                Year (int16), Month (int8), Day (int8), Task (int64), Minutes (int32), one item per row
+                Offsets (uint64), rows of entry i are Offsets[i]:Offsets[i+1]
+                Credentials, list of (user, psw) of every entry
+            The layout is a fixed header (magic, version, row and entry counts, source SHA-256, size and mtime),
+            then the 8 byte aligned columns and the credentials as JSON. The cache holds the passwords of the
+            batch just like the .abf file, so it has to be protected the same way.
+    
+    """
+    Magic=b"ABFC"
+    Version=1
+    # magic, version, little endian flag, rows, entries, source SHA-256, source size, source mtime (ns)
+    Header=struct.Struct("<4sHHQQ32sQq")
+    # (attribute, typecode) in file order
+    Columns=(('Task','q'),('Minutes','i'),('Year','h'),('Month','b'),('Day','b'))
+
+    def __init__(self,CacheName: str):
+        self.CacheName=CacheName
+        with open(CacheName,"rb") as File:
+            if os.fstat(File.fileno()).st_size<self.Header.size:
+                raise ValueError("Not an .abf cache file: "+CacheName)
+            self._Map=mmap.mmap(File.fileno(),0,access=mmap.ACCESS_READ)
+        self._Views=[]
+        try:
+            Magic,Version,Little,Rows,Entries,self.SourceHash,self.SourceSize,self.SourceMtime=self.Header.unpack_from(self._Map,0)
+            if Magic!=self.Magic or Version!=self.Version or bool(Little)!=(sys.byteorder=="little"):
+                raise ValueError("Not an .abf cache file of this version: "+CacheName)
+            Pos=self.Header.size
+            self.Offsets,Pos=self._View(Pos,'Q',Entries+1)
+            for Name,TypeCode in self.Columns:
+                View,Pos=self._View(Pos,TypeCode,Rows)
+                setattr(self,Name,View)
+            self.Credentials=[tuple(Pair) for Pair in json.loads(self._Map[Pos:].decode("utf-8"))]
+        except Exception:
+            self.Close()
+            raise
+
+    def _View(self,Pos: int,TypeCode: str,Count: int):
+        Size=struct.calcsize(TypeCode)*Count
+        if Pos+Size>len(self._Map):
+            raise ValueError("Truncated .abf cache file: "+self.CacheName)
+        View=memoryview(self._Map)[Pos:Pos+Size].cast(TypeCode)
+        self._Views.append(View)
+        return View,Pos+Size+(-Size)%8
+
+    @classmethod
+    def Write(cls,CacheName: str,SourceName: str,Entries):
+        """ 
+            Name: actiPyme.AbfBatch.Write(CacheName: str,SourceName: str,Entries)
+
+            Args:   CacheName, binary cache file to write
+                    SourceName, .abf file the entries come from
+                    Entries, iterable of entries {'user','psw','timesheet'} (see AbfParser.IterEntries())
+
+            Desc: Writes the cache file, readable by the owner only since it holds the passwords. The file is written
+                  aside and renamed, so a cache is never left half written.
+                  Values not fitting their column (see Columns) raise AbfParseError
+        """
+        Stat=os.stat(SourceName)
+        SourceHash=_FileHash(SourceName)
+        Offsets=array.array('Q',[0])
+        Data={Name: array.array(TypeCode) for Name,TypeCode in cls.Columns}
+        Credentials=[]
+        for Entry in Entries:
+            for RowIndex,Row in enumerate(Entry['timesheet']):
+                try:
+                    Data['Task'].append(Row['task'])
+                    Data['Minutes'].append(Row['minutes'])
+                    Data['Year'].append(Row['year'])
+                    Data['Month'].append(Row['month'])
+                    Data['Day'].append(Row['day'])
+                except OverflowError:
+                    Fields=", ".join(Field+"="+str(Row[Field]) for Field in ("year","month","day","task","minutes"))
+                    raise AbfParseError("Time sheet row out of the range of the binary cache ("+Fields+") in the entry of "+
+                                        repr(Entry['user']),_AbfRowLine(SourceName,len(Offsets)-1,RowIndex)) from None
+            Offsets.append(len(Data['Task']))
+            Credentials.append((Entry['user'],Entry['psw']))
+        # the file holds the passwords of the entries: it is readable by the owner only (mkstemp creates it 0600),
+        # and its temporary name is unique, so processes compiling the same batch do not clash
+        Fd,TempName=tempfile.mkstemp(prefix=os.path.basename(CacheName)+".",suffix=".tmp",dir=os.path.dirname(os.path.abspath(CacheName)))
+        try:
+            with os.fdopen(Fd,"wb") as File:
+                File.write(cls.Header.pack(cls.Magic,cls.Version,sys.byteorder=="little",len(Data['Task']),len(Credentials),
+                                           SourceHash,Stat.st_size,Stat.st_mtime_ns))
+                for Column in [Offsets]+[Data[Name] for Name,_ in cls.Columns]:
+                    Column.tofile(File)
+                    File.write(b"\0"*((-len(Column)*Column.itemsize)%8))
+                File.write(json.dumps(Credentials).encode("utf-8"))
+            os.replace(TempName,CacheName)
+        except BaseException:
+            os.remove(TempName)
+            raise
+
+    def IsCompiledFrom(self,SourceName: str):
+        """ 
+            Name: actiPyme.AbfBatch.IsCompiledFrom(SourceName: str)
+
+            Args:  SourceName, .abf file
+
+            Desc: Tells whether the cache holds the current content of the file. When size and modification time
+                  are the recorded ones the file is not read again, otherwise its SHA-256 is compared
+        """
+        try:
+            Stat=os.stat(SourceName)
+        except OSError:
+            return False
+        if Stat.st_size!=self.SourceSize:
+            return False
+        if Stat.st_mtime_ns==self.SourceMtime:
+            return True
+        return _FileHash(SourceName)==self.SourceHash
+
+    def __len__(self):
+        return len(self.Credentials)
+
+    def RowCount(self):
+        return len(self.Task)
+
+    def Entry(self,Index: int):
+        """ 
+            Name: actiPyme.AbfBatch.Entry(Index: int)
+
+            Args:  Index, entry number (0 based, in file order)
+
+            Desc: The output is the entry as {'user','psw','timesheet'}, the same of AbfParser.IterEntries()
+        """
+        Start,End=self.Offsets[Index],self.Offsets[Index+1]
+        User,Psw=self.Credentials[Index]
+        Rows=zip(self.Year[Start:End].tolist(),self.Month[Start:End].tolist(),self.Day[Start:End].tolist(),
+                 self.Task[Start:End].tolist(),self.Minutes[Start:End].tolist())
+        return {'user': User,'psw': Psw,
+                'timesheet': [{'year': Year,'month': Month,'day': Day,'task': Task,'minutes': Minutes} for Year,Month,Day,Task,Minutes in Rows]}
+
+    def IterEntries(self):
+        """ 
+            Name: actiPyme.AbfBatch.IterEntries()
+
+            Args:  Void
+
+            Desc: Generator of the entries, see Entry()
+        """
+        for Index in range(len(self)):
+            yield self.Entry(Index)
+
+    def IterRows(self):
+        """ 
+            Name: actiPyme.AbfBatch.IterRows()
+
+            Args:  Void
+
+            Desc: Generator of the rows, the same of AbfParser.IterRows()
+        """
+        for Entry in self.IterEntries():
+            for Row in Entry['timesheet']:
+                Row['user']=Entry['user']
+                Row['psw']=Entry['psw']
+                yield Row
+
+    def Read(self):
+        """ 
+            Name: actiPyme.AbfBatch.Read()
+
+            Args:  Void
+
+            Desc: The output is the list of entries, the same of AbfParser.Read()
+        """
+        return list(self.IterEntries())
+
+    def Close(self):
+        for View in self._Views:
+            View.release()
+        self._Views=[]
+        self._Map.close()
+
+
+class DriverPool(object):
+    """ 
+    Name: actiPyme.DriverPool(MaxDrivers=64,IdleTimeout=300.0,MaxConnections=None,**DriverArgs)
+
+    Args:   MaxDrivers, max number of drivers kept by the pool
+            IdleTimeout, seconds after which a driver not in use is stopped
+            MaxConnections, max number of connections of all the drivers (PoolSize each); None for no cap
+            DriverArgs, any other keyword argument accepted by actiPyme.Driver (PoolSize, Limiter, Timeout...)
+
+    Desc:   Thread safe pool of started drivers keyed by (target, user name), for programs writing under the credentials
+            of many users (see BulkUploader). A driver is handed out by Acquire() and given back by Release(); in the
+            meantime it is never stopped. Drivers not in use are stopped when idle for IdleTimeout and, least recently
+            used first, when a new driver would exceed MaxDrivers or MaxConnections. Acquire() waits for a driver to be
+            released when all of them are in use and there is no room. The handshake of a user is done once, until
+            its driver is stopped:
+
+                Pool=actiPyme.DriverPool(MaxConnections=200,PoolSize=4)
+                with Pool.Lease(url,user,psw) as Drv:
+                    Drv.WriteDayTimeTrack(Drv.IdNumber,2024,1,15,558,240,"")
+    
+    """
+    def __init__(self,MaxDrivers: int=64,IdleTimeout: float=300.0,MaxConnections: int=None,**DriverArgs):
+        self.MaxDrivers=MaxDrivers
+        self.IdleTimeout=IdleTimeout
+        self.MaxConnections=MaxConnections
+        self.DriverArgs=DriverArgs
+        # connections of one driver
+        self.DriverConnections=DriverArgs.get('PoolSize',10)
+        # (target, user) -> {'driver','psw','lock','leases','idle_since','retired','error'}, least recently used first
+        self._Slots=OrderedDict()
+        self._Leased={}
+        self._Connections=0
+        self._Condition=threading.Condition()
+
+    def _HasRoom(self):
+        if len(self._Slots)>=self.MaxDrivers:
+            return False
+        if self.MaxConnections is None or self._Connections==0:
+            return True
+        return self._Connections+self.DriverConnections<=self.MaxConnections
+
+    def _Retire(self,Key,Slot):
+        # the slot leaves the pool, its driver is stopped once not in use
+        if self._Slots.get(Key) is Slot:
+            del self._Slots[Key]
+        Slot['retired']=True
+        if Slot['leases']==0:
+            self._Stop(Slot)
+
+    def _Stop(self,Slot):
+        Slot['driver'].Stop()
+        self._Connections-=self.DriverConnections
+        self._Condition.notify_all()
+
+    def _EvictOne(self):
+        for Key,Slot in self._Slots.items():
+            if Slot['leases']==0:
+                self._Retire(Key,Slot)
+                return True
+        return False
+
+    def _SweepIdle(self):
+        if self.IdleTimeout is None:
+            return
+        Deadline=time.monotonic()-self.IdleTimeout
+        for Key,Slot in list(self._Slots.items()):
+            if Slot['leases']==0 and Slot['idle_since']<Deadline:
+                self._Retire(Key,Slot)
+
+    def Acquire(self,Target: str,User: str,Psw: str,Timeout: float=None):
+        """ 
+            Name: actiPyme.DriverPool.Acquire(Target: str,User: str,Psw: str,Timeout: float=None)
+
+            Args:   Target, url of the actitime server
+                    User, Psw, account credentials
+                    Timeout, max seconds to wait for room in the pool (None waits forever)
+
+            Desc: The output is the started driver of the user, to be given back with Release(). A new password for the
+                  same user replaces the pooled driver. Handshake errors are raised (see Driver.Handshake()) and the
+                  driver is dropped, so the next Acquire() tries again. Raises TimeoutError when no room was made in time
+        """
+        Key=(Target,User)
+        Deadline=None if Timeout is None else time.monotonic()+Timeout
+        with self._Condition:
+            self._SweepIdle()
+            Slot=self._Slots.get(Key)
+            if Slot is not None and Slot['psw']!=Psw:
+                self._Retire(Key,Slot)
+                Slot=None
+            while Slot is None:
+                if self._HasRoom() or self._EvictOne():
+                    if self._HasRoom():
+                        Slot={'driver': Driver(Target,User,Psw,**self.DriverArgs),'psw': Psw,'lock': threading.Lock(),
+                              'leases': 0,'idle_since': time.monotonic(),'retired': False,'error': None}
+                        self._Slots[Key]=Slot
+                        self._Connections+=self.DriverConnections
+                        break
+                    continue
+                Left=None if Deadline is None else Deadline-time.monotonic()
+                if Left is not None and Left<=0:
+                    raise TimeoutError("No room in the driver pool")
+                self._Condition.wait(Left)
+                # another thread may have opened the driver meanwhile
+                Slot=self._Slots.get(Key)
+                if Slot is not None and Slot['psw']!=Psw:
+                    self._Retire(Key,Slot)
+                    Slot=None
+            self._Slots.move_to_end(Key)
+            Slot['leases']+=1
+            self._Leased[id(Slot['driver'])]=Slot
+        with Slot['lock']:
+            if Slot['error'] is not None:
+                # the handshake failed in another thread
+                self.Release(Slot['driver'])
+                raise Slot['error']
+            if not Slot['driver'].IsStarted:
+                try:
+                    Slot['driver'].Handshake()
+                except Exception as Err:
+                    Slot['error']=Err
+                    with self._Condition:
+                        self._Retire(Key,Slot)
+                    self.Release(Slot['driver'])
+                    raise
+        return Slot['driver']
+
+    def Release(self,Drv):
+        """ 
+            Name: actiPyme.DriverPool.Release(Drv)
+
+            Args:  Drv, driver returned by Acquire()
+
+            Desc: Gives a driver back to the pool
+        """
+        with self._Condition:
+            Slot=self._Leased.get(id(Drv))
+            if Slot is None:
+                return
+            Slot['leases']-=1
+            if Slot['leases']==0:
+                del self._Leased[id(Drv)]
+                Slot['idle_since']=time.monotonic()
+                if Slot['retired']:
+                    self._Stop(Slot)
+                else:
+                    self._Condition.notify_all()
+
+    @contextlib.contextmanager
+    def Lease(self,Target: str,User: str,Psw: str,Timeout: float=None):
+        """ 
+            Name: actiPyme.DriverPool.Lease(Target: str,User: str,Psw: str,Timeout: float=None)
+
+            Args:  see Acquire()
+
+            Desc: Context manager version of Acquire()/Release()
+        """
+        Drv=self.Acquire(Target,User,Psw,Timeout)
+        try:
+            yield Drv
+        finally:
+            self.Release(Drv)
+
+    def Sweep(self):
+        """ 
+            Name: actiPyme.DriverPool.Sweep()
+
+            Args:  Void
+
+            Desc: Stops the drivers idle for more than IdleTimeout. This is done by every Acquire() as well,
+                  long running services should call it periodically when the pool may stay unused
+        """
+        with self._Condition:
+            self._SweepIdle()
+
+    def Connections(self):
+        """ 
+            Name: actiPyme.DriverPool.Connections()
+
+            Args:  Void
+
+            Desc: The output is the number of connections the open drivers may hold
+        """
+        with self._Condition:
+            return self._Connections
+
+    def __len__(self):
+        return len(self._Slots)
+
+    def Close(self):
+        """ 
+            Name: actiPyme.DriverPool.Close()
+
+            Args:  Void
+
+            Desc: Stops every driver of the pool. The drivers in use are stopped when released
+        """
+        with self._Condition:
+            for Key,Slot in list(self._Slots.items()):
+                self._Retire(Key,Slot)
+
+
+class BulkUploader(object):
+    """ 
+    Name: actiPyme.BulkUploader(Target,Workers=8,QueueSize=None,Limiter=None,Pool=None,**DriverArgs)
+
+    Args:   Target, url of the actitime server
+            Workers, number of concurrent writers
+            QueueSize, max number of rows waiting for the writers (default 4 x Workers)
+            Limiter, actiPyme.AdaptiveLimiter shared by all the drivers (default: from 4 up to Workers requests in flight)
+            Pool, actiPyme.DriverPool the drivers are taken from. Pass one to keep the drivers started across uploaders
+                  and batches (its own DriverArgs then apply); by default the uploader opens a pool of its own
+            DriverArgs, any other keyword argument accepted by actiPyme.Driver (PoolSize, Timeout...)
+
+    Desc:   This class uploads the time sheets of an actitime batch file (see AbfParser).
+            Rows are written with WriteDayTimeTrack by a pool of worker threads, each row under the credentials
+            of its own entry. One driver (one authenticated, connection-pooled session) is taken from the DriverPool for
+            every USERNAME/PASSWORD pair and reused by all the rows of that user. Every cell (user, day, task) always goes
+            to the same writer, so when a cell appears more than once the last row wins, as with sequential writes.
+            The queues between the reader and the writers are bounded, so a streamed file is never loaded all at once. All the drivers share one adaptive
+            limiter: the number of PATCH in flight grows while the server keeps up and is cut when it throttles:
+
+                Uploader=actiPyme.BulkUploader(url,Workers=16)
+                Report=Uploader.Upload(actiPyme.AbfParser("month.abf").IterEntries())
+                Uploader.Close()
+    
+    """
+    def __init__(self,Target="",Workers=8,QueueSize=None,Limiter=None,Pool=None,**DriverArgs):
+        self.Target=Target
+        self.Workers=Workers
+        self.QueueSize=QueueSize if QueueSize is not None else 4*Workers
+        self.Limiter=Limiter if Limiter is not None else AdaptiveLimiter(Initial=min(4,Workers),Maximum=Workers)
+        self.DriverArgs=dict(DriverArgs,Limiter=self.Limiter)
+        self._OwnPool=Pool is None
+        self.Pool=DriverPool(MaxDrivers=max(64,Workers+1),**self.DriverArgs) if Pool is None else Pool
+        # handshake errors by user, so that the rows of a user with bad credentials fail without a request each
+        self._Failed={}
+        self._FailedLock=threading.Lock()
+
+    @contextlib.contextmanager
+    def _DriverFor(self,User: str,Psw: str):
+        """ 
+            Name: actiPyme.BulkUploader._DriverFor(User: str,Psw: str)
+
+            Args:   User, account user name
+                    Psw, account password
+
+            Desc: Context manager leasing the started driver of a user from the pool. A failed handshake is re-raised for every row of the user.
+        """
+        Key=(User,Psw)
+        with self._FailedLock:
+            Error=self._Failed.get(Key)
+        if Error is not None:
+            raise Error
+        try:
+            Drv=self.Pool.Acquire(self.Target,User,Psw)
+        except Exception as Err:
+            with self._FailedLock:
+                self._Failed.setdefault(Key,Err)
+            raise
+        try:
+            yield Drv
+        finally:
+            self.Pool.Release(Drv)
+
+    def _PlannedRows(self,Entries,Comment):
+        """ 
+            Name: actiPyme.BulkUploader._PlannedRows(Entries,Comment)
+
+            Args:  see Upload()
+
+            Desc: Runs a WritePlanner on every group of consecutive rows of the same user. The output is a generator of
+                  rows carrying 'action' and 'merged', or 'error' when the user could not be planned
+        """
+        for (User,Psw),Rows in itertools.groupby(_IterUploadRows(Entries),key=lambda Row: (Row['user'],Row['psw'])):
+            Rows=list(Rows)
+            if Comment is not None:
+                for Row in Rows:
+                    Row.setdefault('comment',Comment)
+            try:
+                with self._DriverFor(User,Psw) as Drv:
+                    Plan=WritePlanner(Drv,Workers=min(4,self.Workers)).Plan(Rows)
+            except Exception as Err:
+                for Row in Rows:
+                    yield dict(Row,error=str(Err))
+                continue
+            for Cell in Plan:
+                Day=_AsDate(Cell['date'])
+                yield {'user': User,'psw': Psw,'year': Day.year,'month': Day.month,'day': Day.day,'task': Cell['taskId'],'minutes': Cell['minutes'],
+                       'comment': Cell['comment'],'action': Cell['action'],'merged': Cell['merged']}
+
+    def Upload(self,Entries,Comment: str=None,SkipUnchanged: bool=False):
+        """ 
+            Name: actiPyme.BulkUploader.Upload(Entries,Comment: str=None,SkipUnchanged: bool=False)
+
+            Args:   Entries, iterable of entries (AbfParser.Read() or AbfParser.IterEntries()) or of rows (AbfParser.IterRows())
+                    Comment, comment posted with every row without its own 'comment' key (None: empty comment, or the
+                             comment already on the server when SkipUnchanged is set)
+                    SkipUnchanged, plan the writes of every entry with actiPyme.WritePlanner: duplicated cells are merged
+                                   and the cells already holding the same minutes and comment are not sent
+
+            Desc: Writes all the rows and returns the report in input order, one dictionary per row (per merged cell with SkipUnchanged):
+                  {'user','year','month','day','task','minutes','action','merged','ok','error','response'}
+                  with action "write" (or "create", "update", "unchanged" with SkipUnchanged)
+        """
+        # one queue per writer: the rows of a cell are written in input order by the same thread
+        RowQueues=[queue.Queue(maxsize=max(1,-(-self.QueueSize//self.Workers))) for _ in range(self.Workers)]
+        Report={}
+        ReportLock=threading.Lock()
+
+        def Writer(RowQueue):
+            while True:
+                Item=RowQueue.get()
+                if Item is None:
+                    break
+                Index,Row=Item
+                Result={'user': Row.get('user'),'year': Row.get('year'),'month': Row.get('month'),'day': Row.get('day'),'task': Row.get('task'),
+                        'minutes': Row.get('minutes'),'action': Row.get('action',"write"),'merged': Row.get('merged',1),'ok': False,'error': "",'response': None}
+                try:
+                    if 'error' in Row:
+                        Result['error']=Row['error']
+                    elif Result['action']=="unchanged":
+                        Result['ok']=True
+                    else:
+                        with self._DriverFor(Row['user'],Row['psw']) as Drv:
+                            Result['response']=Drv.WriteDayTimeTrack(Drv.IdNumber,Row['year'],Row['month'],Row['day'],Row['task'],Row['minutes'],
+                                                                     Row.get('comment',Comment or ""))
+                        Result['ok']=True
+                except KeyError as Err:
+                    Result['error']="Bad row, missing "+str(Err)
+                except Exception as Err:
+                    Result['error']=str(Err)
+                with ReportLock:
+                    Report[Index]=Result
+
+        Threads=[threading.Thread(target=Writer,args=(RowQueue,),daemon=True) for RowQueue in RowQueues]
+        for Thread in Threads:
+            Thread.start()
+        Count=0
+        try:
+            Rows=self._PlannedRows(Entries,Comment) if SkipUnchanged else _IterUploadRows(Entries)
+            for Index,Row in enumerate(Rows):
+                Cell=(Row.get('user'),Row.get('year'),Row.get('month'),Row.get('day'),Row.get('task'))
+                # blocks while the writer of the cell is busy (backpressure)
+                RowQueues[hash(Cell)%self.Workers].put((Index,Row))
+                Count=Index+1
+        finally:
+            for RowQueue in RowQueues:
+                RowQueue.put(None)
+            for Thread in Threads:
+                Thread.join()
+
+        return [Report[Index] for Index in range(Count)]
+
+    def Close(self):
+        """ 
+            Name: actiPyme.BulkUploader.Close()
+
+            Args:  Void
+
+            Desc: Stops every driver opened by the uploader. A pool passed to the constructor is left open
+        """
+        if self._OwnPool:
+            self.Pool.Close()
+        with self._FailedLock:
+            self._Failed={}
+
+
+def _IterUploadRows(Entries):
+    """ 
+        Name: actiPyme._IterUploadRows(Entries)
+
+        Args:   Entries, iterable of .abf entries or of flat rows
+
+        Desc: Flattens .abf entries into rows carrying 'user' and 'psw'. Flat rows are passed through.
+    """
+    for Entry in Entries:
+        if 'timesheet' in Entry:
+            for Row in Entry['timesheet']:
+                FlatRow=dict(Row)
+                FlatRow['user']=Entry['user']
+                FlatRow['psw']=Entry['psw']
+                yield FlatRow
+        else:
+            yield Entry
+
+
+class ResponseCache(object):
+    """ 
+    Name: actiPyme.ResponseCache(TTL=None,MaxEntries=1024)
+
+    Args:   TTL, time to live in seconds by endpoint, overriding DefaultTTL
+            MaxEntries, max number of cached responses
+
+    Desc:   Thread safe, size bounded LRU store of JSON responses used by Driver.EnableCache().
+            Every entry keeps the ETag/Last-Modified validators sent by the server, so that an expired entry can be revalidated.
+    
+    """
+    DefaultTTL={'customers': 600,'leaveTypes': 3600,'departments': 3600,'info': 3600,'tasks': 300,'projects': 300}
+
+    def __init__(self,TTL: dict=None,MaxEntries: int=1024):
+        self.TTL=dict(self.DefaultTTL)
+        if TTL is not None:
+            self.TTL.update(TTL)
+        self.MaxEntries=MaxEntries
+        self._Entries=OrderedDict()
+        self._Lock=threading.Lock()
+
+    def Lookup(self,Key: str):
+        """ 
+            Name: actiPyme.ResponseCache.Lookup(Key: str)
+
+            Args:  Key, url of the resource
+
+            Desc: Returns the entry {'endpoint','data','expires','etag','lastmodified'} (possibly expired) or None
+        """
+        with self._Lock:
+            Entry=self._Entries.get(Key)
+            if Entry is not None:
+                self._Entries.move_to_end(Key)
+            return Entry
+
+    def Store(self,Key: str,Endpoint: str,Data,ETag=None,LastModified=None):
+        """ 
+            Name: actiPyme.ResponseCache.Store(Key: str,Endpoint: str,Data,ETag=None,LastModified=None)
+
+            Args:   Key, url of the resource
+                    Endpoint, name of the endpoint (selects the time to live)
+                    Data, JSON object to be cached
+                    ETag, LastModified, validators sent by the server
+
+            Desc: Adds or refreshes an entry, dropping the least recently used ones above MaxEntries
+        """
+        Entry={'endpoint': Endpoint,'data': Data,'expires': time.monotonic()+self.TTL.get(Endpoint,0),'etag': ETag,'lastmodified': LastModified}
+        with self._Lock:
+            self._Entries[Key]=Entry
+            self._Entries.move_to_end(Key)
+            while len(self._Entries)>self.MaxEntries:
+                self._Entries.popitem(last=False)
+
+    def Invalidate(self,Endpoint: str=None):
+        """ 
+            Name: actiPyme.ResponseCache.Invalidate(Endpoint: str=None)
+
+            Args:  Endpoint, drop only the entries of this endpoint; all the entries when None
+
+            Desc: Removes entries from the cache
+        """
+        with self._Lock:
+            if Endpoint is None:
+                self._Entries.clear()
+            else:
+                for Key in [Key for Key,Entry in self._Entries.items() if Entry['endpoint']==Endpoint]:
+                    del self._Entries[Key]
+
+    def __len__(self):
+        return len(self._Entries)
+
+
+class PersistentCache(object):
+    """ 
+    Name: actiPyme.PersistentCache(Path,TTL=None)
+
+    Args:   Path, SQLite file of the cache (created when missing)
+            TTL, time to live in seconds by endpoint, overriding DefaultTTL. Endpoints without a time to live are not stored
+
+    Desc:   On-disk store of the identity of the user (/users/me) and of the reference lists, shared by the processes
+            using the same file, see Driver(CacheFile=...). Entries are keyed by server, user name and url, and carry
+            an HMAC-SHA256 of the password under a random key kept in the file: a different password never reads them.
+            The HMAC is cheap, so the start-up stays in the milliseconds; the file (key included) is readable by its
+            owner only, and without the key the stored digests cannot be used to guess the password.
+            Short lived scripts skip the handshake and the reference fetches while the entries are fresh:
+
+                Drv=actiPyme.Driver(url,user,psw,CacheFile="~/.actipyme-cache.db")
+                Drv.Start()           # no request when the identity is cached
+                Drv.CustomerList()    # no request when the list is cached
+    
+    """
+    DefaultTTL={'me': 86400,'customers': 600,'leaveTypes': 3600,'departments': 3600,'info': 3600}
+
+    def __init__(self,Path: str,TTL: dict=None):
+        self.Path=os.path.expanduser(Path)
+        self.TTL=dict(self.DefaultTTL)
+        if TTL is not None:
+            self.TTL.update(TTL)
+        # the file holds user identities, it is readable by the owner only
+        os.close(os.open(self.Path,os.O_CREAT|os.O_RDWR,0o600))
+        self._Lock=threading.Lock()
+        self.Connection=sqlite3.connect(self.Path,timeout=10,check_same_thread=False)
+        self.Connection.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (target TEXT, user TEXT, url TEXT, endpoint TEXT, secret BLOB, data TEXT, expires REAL,
+                                                  PRIMARY KEY (target, user, url)) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value BLOB) WITHOUT ROWID;
+        """)
+        with self.Connection:
+            self.Connection.execute("INSERT OR IGNORE INTO settings VALUES ('key', ?)",(os.urandom(32),))
+        self._Key=self.Connection.execute("SELECT value FROM settings WHERE name='key'").fetchone()[0]
+
+    def Secret(self,Target: str,User: str,Psw: str):
+        """ 
+            Name: actiPyme.PersistentCache.Secret(Target: str,User: str,Psw: str)
+
+            Desc: The output is the keyed hash of the password stored with the entries
+        """
+        return hmac.new(self._Key,(Target+"\0"+User+"\0"+Psw).encode("utf-8"),hashlib.sha256).digest()
+
+    def Lookup(self,Target: str,User: str,Secret: bytes,Url: str):
+        """ 
+            Name: actiPyme.PersistentCache.Lookup(Target: str,User: str,Secret: bytes,Url: str)
+
+            Args:   Target, User, server and user name of the driver
+                    Secret, see Secret()
+                    Url, url of the resource
+
+            Desc: The output is the cached JSON object, or None when missing, expired or stored with another password
+        """
+        with self._Lock:
+            Row=self.Connection.execute("SELECT secret, data FROM responses WHERE target=? AND user=? AND url=? AND expires>?",
+                                        (Target,User,Url,time.time())).fetchone()
+        if Row is None or not hmac.compare_digest(Row[0],Secret):
+            return None
+        return json.loads(Row[1])
+
+    def Store(self,Target: str,User: str,Secret: bytes,Url: str,Endpoint: str,Data):
+        """ 
+            Name: actiPyme.PersistentCache.Store(Target: str,User: str,Secret: bytes,Url: str,Endpoint: str,Data)
+
+            Args:   see Lookup()
+                    Endpoint, name of the endpoint (selects the time to live)
+                    Data, JSON object to be cached
+
+            Desc: Adds or refreshes an entry. Nothing is stored for the endpoints without a time to live
+        """
+        TTL=self.TTL.get(Endpoint,0)
+        if TTL<=0:
+            return
+        with self._Lock, self.Connection:
+            self.Connection.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                    (Target,User,Url,Endpoint,Secret,json.dumps(Data),time.time()+TTL))
+
+    def Invalidate(self,Target: str=None,User: str=None,Endpoint: str=None):
+        """ 
+            Name: actiPyme.PersistentCache.Invalidate(Target: str=None,User: str=None,Endpoint: str=None)
+
+            Args:  Target, User, Endpoint, drop only the matching entries; None matches everything
+
+            Desc: Removes entries from the cache
+        """
+        Sql="DELETE FROM responses WHERE (? IS NULL OR target=?) AND (? IS NULL OR user=?) AND (? IS NULL OR endpoint=?)"
+        with self._Lock, self.Connection:
+            self.Connection.execute(Sql,(Target,Target,User,User,Endpoint,Endpoint))
+
+    def Purge(self):
+        """ 
+            Name: actiPyme.PersistentCache.Purge()
+
+            Args:  Void
+
+            Desc: Removes the expired entries
+        """
+        with self._Lock, self.Connection:
+            self.Connection.execute("DELETE FROM responses WHERE expires<=?",(time.time(),))
+
+    def Close(self):
+        self.Connection.close()
+
+
+class ActiIndex(object):
+    """ 
+    Name: actiPyme.ActiIndex(Drv)
+
+    Args:   Drv, a started actiPyme.Driver
+
+    Desc:   In-memory index of tasks, projects and users for offline lookup of names and ids.
+            Build() loads everything with one pass over the paginated endpoints, then lookups by id, email,
+            customer id and project id are dictionary accesses, and names can be searched by words or word prefixes:
+
+                Index=actiPyme.ActiIndex(Drv)
+                Index.Build()
+                Index.SearchTasks("design rev")      # tasks whose name has words starting with "design" and "rev"
+                Index.UserByEmail("john.doe@foo.com")
+
+            Refresh() updates the index in place, either for some ids or for all the items.
+    
+    """
+    Kinds=("tasks","projects","users")
+
+    def __init__(self,Drv):
+        self.Driver=Drv
+        self._Lock=threading.RLock()
+        self._Clear()
+
+    def _Clear(self):
+        self._Items={Kind: {} for Kind in self.Kinds}
+        self._Words={Kind: {} for Kind in self.Kinds}
+        self._SortedWords={Kind: None for Kind in self.Kinds}
+        self._UsersByEmail={}
+        self._TasksByProject={}
+        self._TasksByCustomer={}
+        self._ProjectsByCustomer={}
+
+    @staticmethod
+    def Tokenize(Text: str):
+        """ 
+            Name: actiPyme.ActiIndex.Tokenize(Text: str)
+
+            Args:  Text, any string
+
+            Desc: Splits a string in lower case words. The output is a list of strings
+        """
+        return re.findall(r"\w+",str(Text).lower())
+
+    def _Iter(self,Kind: str,SearchMethod=None,SearchArgument="",PageSize=1000,Prefetch=True):
+        IterMethod={'tasks': self.Driver.IterTasks,'projects': self.Driver.IterProjects,'users': self.Driver.IterUsers}[Kind]
+        return IterMethod(SearchMethod,SearchArgument,PageSize=PageSize,Prefetch=Prefetch)
+
+    def _Text(self,Kind: str,Item: dict):
+        if Kind=="users":
+            return " ".join(str(Item.get(Field) or "") for Field in ("firstName","lastName","fullName","username"))
+        return Item.get('name') or ""
+
+    def _Relations(self,Kind: str,Item: dict):
+        # (relation dictionary, key) pairs the item belongs to
+        if Kind=="tasks":
+            return [(self._TasksByProject,Item.get('projectId')),(self._TasksByCustomer,Item.get('customerId'))]
+        if Kind=="projects":
+            return [(self._ProjectsByCustomer,Item.get('customerId'))]
+        return []
+
+    def Remove(self,Kind: str,Id: int):
+        """ 
+            Name: actiPyme.ActiIndex.Remove(Kind: str,Id: int)
+
+            Args:   Kind, one of "tasks", "projects", "users"
+                    Id, identifier of the item
+
+            Desc: Drops an item from the index
+        """
+        with self._Lock:
+            Item=self._Items[Kind].pop(Id,None)
+            if Item is None:
+                return
+            for Word in set(self.Tokenize(self._Text(Kind,Item))):
+                Ids=self._Words[Kind].get(Word)
+                if Ids is not None:
+                    Ids.discard(Id)
+                    if not Ids:
+                        del self._Words[Kind][Word]
+                        self._SortedWords[Kind]=None
+            for Relation,Key in self._Relations(Kind,Item):
+                if Key in Relation:
+                    Relation[Key].discard(Id)
+            if Kind=="users" and Item.get('email'):
+                self._UsersByEmail.pop(Item['email'].lower(),None)
+
+    def Upsert(self,Kind: str,Item: dict):
+        """ 
+            Name: actiPyme.ActiIndex.Upsert(Kind: str,Item: dict)
+
+            Args:   Kind, one of "tasks", "projects", "users"
+                    Item, JSON object of the item as returned by the server
+
+            Desc: Adds an item to the index, replacing the previous version with the same id
+        """
+        Id=Item['id']
+        with self._Lock:
+            self.Remove(Kind,Id)
+            self._Items[Kind][Id]=Item
+            for Word in set(self.Tokenize(self._Text(Kind,Item))):
+                if Word not in self._Words[Kind]:
+                    self._Words[Kind][Word]=set()
+                    self._SortedWords[Kind]=None
+                self._Words[Kind][Word].add(Id)
+            for Relation,Key in self._Relations(Kind,Item):
+                if Key is not None:
+                    Relation.setdefault(Key,set()).add(Id)
+            if Kind=="users" and Item.get('email'):
+                self._UsersByEmail[Item['email'].lower()]=Id
+
+    def Build(self,PageSize: int=1000,Prefetch: bool=True):
+        """ 
+            Name: actiPyme.ActiIndex.Build(PageSize: int=1000,Prefetch: bool=True)
+
+            Args:   PageSize, number of items fetched with each request
+                    Prefetch, fetch the next page while the current one is indexed
+
+            Desc: Loads all the tasks, projects and users from the server, replacing the content of the index
+        """
+        with self._Lock:
+            self._Clear()
+            for Kind in self.Kinds:
+                for Item in self._Iter(Kind,PageSize=PageSize,Prefetch=Prefetch):
+                    self.Upsert(Kind,Item)
+
+    def Refresh(self,TaskIds=None,ProjectIds=None,UserIds=None,PageSize: int=1000):
+        """ 
+            Name: actiPyme.ActiIndex.Refresh(TaskIds=None,ProjectIds=None,UserIds=None,PageSize: int=1000)
+
+            Args:   TaskIds, ProjectIds, UserIds, lists of ids to be fetched again
+
+            Desc: Updates the index in place. With no ids all the items are fetched again: changed items are replaced,
+                  new ones added and the ones no longer on the server removed. With ids only those items are refreshed
+                  (an id not found on the server is removed).
+        """
+        Selection={'tasks': TaskIds,'projects': ProjectIds,'users': UserIds}
+        FullRefresh=TaskIds is None and ProjectIds is None and UserIds is None
+        for Kind in self.Kinds:
+            Ids=Selection[Kind]
+            if FullRefresh:
+                Items=self._Iter(Kind,PageSize=PageSize)
+                Expected=set(self._Items[Kind])
+            elif Ids:
+                Loader=BatchLoader(self.Driver,Kind)
+                Loader.Add(Ids)
+                Items=Loader.Load().values()
+                Expected=set(int(Id) for Id in Ids)
+            else:
+                continue
+            Seen=set()
+            for Item in Items:
+                self.Upsert(Kind,Item)
+                Seen.add(Item['id'])
+            for Id in Expected-Seen:
+                self.Remove(Kind,Id)
+
+    def _Search(self,Kind: str,Text: str,Prefix: bool):
+        Words=self.Tokenize(Text)
+        if not Words:
+            return []
+        with self._Lock:
+            if Prefix and self._SortedWords[Kind] is None:
+                self._SortedWords[Kind]=sorted(self._Words[Kind])
+            Result=None
+            for Word in Words:
+                if Prefix:
+                    SortedWords=self._SortedWords[Kind]
+                    Ids=set()
+                    Pos=bisect.bisect_left(SortedWords,Word)
+                    while Pos<len(SortedWords) and SortedWords[Pos].startswith(Word):
+                        Ids|=self._Words[Kind][SortedWords[Pos]]
+                        Pos+=1
+                else:
+                    Ids=self._Words[Kind].get(Word,set())
+                Result=Ids if Result is None else Result&Ids
+                if not Result:
+                    return []
+            return [self._Items[Kind][Id] for Id in sorted(Result)]
+
+    def SearchTasks(self,Text: str,Prefix: bool=True):
+        """ 
+            Name: actiPyme.ActiIndex.SearchTasks(Text: str,Prefix: bool=True)
+
+            Args:   Text, words to be found in the task name
+                    Prefix, match the words as prefixes (False for whole words)
+
+            Desc: Offline version of Driver.SearchTasks(1,...): tasks having all the words in their name. The output is a list of task JSON objects
+        """
+        return self._Search("tasks",Text,Prefix)
+
+    def SearchProjects(self,Text: str,Prefix: bool=True):
+        """ 
+            Name: actiPyme.ActiIndex.SearchProjects(Text: str,Prefix: bool=True)
+
+            Args:   Text, words to be found in the project name
+                    Prefix, match the words as prefixes (False for whole words)
+
+            Desc: Offline version of Driver.SearchProjects(1,...). The output is a list of project JSON objects
+        """
+        return self._Search("projects",Text,Prefix)
+
+    def SearchUsers(self,Text: str,Prefix: bool=True):
+        """ 
+            Name: actiPyme.ActiIndex.SearchUsers(Text: str,Prefix: bool=True)
+
+            Args:   Text, words to be found in the user name (first, last, full and user name)
+                    Prefix, match the words as prefixes (False for whole words)
+
+            Desc: Offline version of Driver.SearchUsers(1,...). The output is a list of user JSON objects
+        """
+        return self._Search("users",Text,Prefix)
+
+    def TaskById(self,TaskId: int):
+        """ 
+            Name: actiPyme.ActiIndex.TaskById(TaskId: int)
+
+            Desc: Task JSON object or None
+        """
+        return self._Items["tasks"].get(int(TaskId))
+
+    def ProjectById(self,ProjectId: int):
+        """ 
+            Name: actiPyme.ActiIndex.ProjectById(ProjectId: int)
+
+            Desc: Project JSON object or None
+        """
+        return self._Items["projects"].get(int(ProjectId))
+
+    def UserById(self,UserId: int):
+        """ 
+            Name: actiPyme.ActiIndex.UserById(UserId: int)
+
+            Desc: User JSON object or None
+        """
+        return self._Items["users"].get(int(UserId))
+
+    def UserByEmail(self,Email: str):
+        """ 
+            Name: actiPyme.ActiIndex.UserByEmail(Email: str)
+
+            Desc: User JSON object or None. The email is case insensitive
+        """
+        with self._Lock:
+            UserId=self._UsersByEmail.get(Email.lower())
+            return None if UserId is None else self._Items["users"].get(UserId)
+
+    def TasksOfProject(self,ProjectId: int):
+        """ 
+            Name: actiPyme.ActiIndex.TasksOfProject(ProjectId: int)
+
+            Desc: List of the task JSON objects of a project
+        """
+        with self._Lock:
+            return [self._Items["tasks"][Id] for Id in sorted(self._TasksByProject.get(int(ProjectId),()))]
+
+    def TasksOfCustomer(self,CustomerId: int):
+        """ 
+            Name: actiPyme.ActiIndex.TasksOfCustomer(CustomerId: int)
+
+            Desc: List of the task JSON objects of a customer
+        """
+        with self._Lock:
+            return [self._Items["tasks"][Id] for Id in sorted(self._TasksByCustomer.get(int(CustomerId),()))]
+
+    def ProjectsOfCustomer(self,CustomerId: int):
+        """ 
+            Name: actiPyme.ActiIndex.ProjectsOfCustomer(CustomerId: int)
+
+            Desc: List of the project JSON objects of a customer
+        """
+        with self._Lock:
+            return [self._Items["projects"][Id] for Id in sorted(self._ProjectsByCustomer.get(int(CustomerId),()))]
+
+    def __len__(self):
+        return sum(len(Items) for Items in self._Items.values())
+
+
+class BatchLoader(object):
+    """ 
+    Name: actiPyme.BatchLoader(Drv,Kind,MaxUrlLength=2000,Workers=4)
 
-    Args:   Target, url of the actitime server
-            actitimeUserName, account user name
-            actitimePsw, account password
+    Args:   Drv, a started actiPyme.Driver
+            Kind, collection to be queried: "tasks", "projects" or "users"
+            MaxUrlLength, max length of each request url
+            Workers, number of requests sent in parallel
 
-    Desc: This is the core driver with communication protocol API
+    Desc:   Resolves many ids with a handful of requests. Ids are collected with Add(), de-duplicated,
+            split in chunks fitting the url length and fetched through the ids= filter of the collection endpoint:
+
+                Loader=actiPyme.BatchLoader(Drv,"tasks")
+                for Row in TimeSheet:
+                    Loader.Add(Row['taskId'])
+                Tasks=Loader.Load()         # {task id: task JSON object}
     
     """
-    def __init__(self,Target="",actitimeUserName="",actitimePsw=""):
-        self.Target=Target
-        self.actitimeUserName=actitimeUserName
-        self.actitimePsw=actitimePsw
-        self.IsStarted=False
-        self.ServerHeaders= {'accept': 'application/json; charset=UTF-8'}
-        self.writeDefheaders={'accept': 'application/json; charset=UTF-8', 'Content-Type': 'application/json' }
-        self.IdNumber=0
-        self.IdName=""
-        self.IdSurname=""
+    Kinds=("tasks","projects","users")
+    # the collection endpoints do not return more than 1000 items per page
+    MaxIdsPerRequest=1000
 
-    def Start(self):
+    def __init__(self,Drv,Kind: str,MaxUrlLength: int=2000,Workers: int=4):
+        if Kind not in self.Kinds:
+            raise Exception('Inappropriate or bad batch kind. Use one of '+", ".join(self.Kinds))
+        self.Driver=Drv
+        self.Kind=Kind
+        self.MaxUrlLength=MaxUrlLength
+        self.Workers=Workers
+        self._Pending={}
+
+    def Add(self,*Ids):
         """ 
-            Name: actiPyme.Driver.Start()
+            Name: actiPyme.BatchLoader.Add(*Ids)
 
-            Args:  Void
+            Args:  Ids, ids or iterables of ids
 
-            Desc: This method starts up the driver. Handshake is performed by means of user self identification.
-        """        
-        requrl=self.Target
-        requrl+="/users/me"
-        try:
-            MyIdReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw),timeout=3)
-            MyIdReq.raise_for_status()   
-        except requests.exceptions.HTTPError as errh:
-            print ("Http Error:",errh)
-            sys.exit(1)
-        except requests.exceptions.ConnectionError as errc:
-            print ("Error Connecting:",errc)
-            sys.exit(1)
-        except requests.exceptions.Timeout as errt:
-            print ("Timeout Error:",errt)
-            sys.exit(1)
-        except requests.exceptions.RequestException as err:
-            print ("Oops: Something Else",err)
-            sys.exit(1)
-        
-        IdData=json.loads(MyIdReq.text)
-        self.IdNumber=IdData['id']
-        self.IdName=IdData['firstName']
-        self.IdSurname=IdData['lastName']
-        self.IsStarted=True
+            Desc: Queues ids for the next Load(). Duplicates are sent once
+        """
+        for Id in Ids:
+            if hasattr(Id,'__iter__') and not isinstance(Id,(str,bytes)):
+                self.Add(*Id)
+            else:
+                self._Pending[str(int(Id))]=None
 
-    def Stop(self):
+    def _Chunks(self,Ids):
         """ 
-            Name: actiPyme.Driver.Stop()
+            Name: actiPyme.BatchLoader._Chunks(Ids)
 
-            Args:  Void
+            Args:  Ids, list of ids as strings
 
-            Desc: This method shuts down the driver. Useful to re initialize the communication.
-        """   
-        self.IdNumber=""
-        self.IdName=""
-        self.IdSurname=""
-        self.IsStarted=False
+            Desc: Splits the ids in comma separated lists keeping every request url within MaxUrlLength
+        """
+        # room left by offset, limit and the ids field
+        Room=self.MaxUrlLength-len(self.Driver.Target+"/"+self.Kind+"?offset=0&limit="+str(self.MaxIdsPerRequest)+"&ids=")
+        Chunk=[]
+        ChunkLength=0
+        for Id in Ids:
+            Length=len(Id)+(1 if Chunk else 0)
+            if Chunk and (ChunkLength+Length>Room or len(Chunk)>=self.MaxIdsPerRequest):
+                yield ",".join(Chunk)
+                Chunk=[]
+                ChunkLength=0
+                Length=len(Id)
+            Chunk.append(Id)
+            ChunkLength+=Length
+        if Chunk:
+            yield ",".join(Chunk)
 
+    def _Fetch(self,Chunk: str):
+        return list(self.Driver._IterPages(self.Kind,"&ids="+Chunk,self.MaxIdsPerRequest,False))
 
-    def CustomerList(self):
+    def Load(self):
         """ 
-            Name: actiPyme.Driver.CustomerList()
+            Name: actiPyme.BatchLoader.Load()
 
             Args:  Void
 
-            Desc: Simply get the info about the customers. The output is a JSON object
+            Desc: Fetches all the queued ids and empties the queue. The output is a dictionary id -> JSON object
+                  (ids not found on the server are missing)
         """
-        if  self.IsStarted:   
-            requrl=self.Target
-            requrl+="/customers"
-            CustReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw))
-            Clients=json.loads(CustReq.text)
-        else:
-            Clients={}
+        if not self.Driver.IsStarted:
             raise Exception('Communication not initialized. Run the Start() command on the driver instance')
-        
-        return Clients
+        Ids=list(self._Pending)
+        self._Pending={}
+        Result={}
+        Chunks=list(self._Chunks(Ids))
+        if len(Chunks)<=1 or self.Workers<=1:
+            Pages=map(self._Fetch,Chunks)
+        else:
+            with ThreadPoolExecutor(max_workers=self.Workers) as Executor:
+                Pages=list(Executor.map(self._Fetch,Chunks))
+        for Items in Pages:
+            for Item in Items:
+                Result[Item['id']]=Item
+        return Result
 
-    def LeaveTypesList(self):
+
+def _AsDate(Value):
+    """ 
+        Name: actiPyme._AsDate(Value)
+
+        Args:  Value, datetime.date, datetime.datetime or YYYY-MM-DD string
+
+        Desc: Normalizes a date argument. The output is a datetime.date
+    """
+    if isinstance(Value,datetime.datetime):
+        return Value.date()
+    if isinstance(Value,datetime.date):
+        return Value
+    return datetime.date.fromisoformat(str(Value))
+
+
+class TimeSheetMirror(object):
+    """ 
+    Name: actiPyme.TimeSheetMirror(Drv,Path,OpenWeeks=2)
+
+    Args:   Drv, a started actiPyme.Driver
+            Path, SQLite file of the local mirror (created if missing)
+            OpenWeeks, number of recent weeks (current week included) that are always fetched again
+
+    Desc:   Local SQLite mirror of time track and leave time records, keyed by user/date/task (user/date/leave type).
+            Sync() remembers which weeks have been fetched for every user, so after the first run only the weeks never
+            seen and the still open ones (current and previous week by default) are asked to the server.
+            Reports read the local store with TimeTrack(), LeaveTime() or Query():
+
+                Mirror=actiPyme.TimeSheetMirror(Drv,"timesheets.db")
+                Mirror.Sync(UserIds,"2024-01-01","2024-12-31")
+                Rows=Mirror.Query("SELECT user_id, SUM(time) FROM timetrack GROUP BY user_id")
+    
+    """
+    def __init__(self,Drv,Path: str,OpenWeeks: int=2):
+        self.Driver=Drv
+        self.Path=Path
+        self.OpenWeeks=OpenWeeks
+        self.Connection=sqlite3.connect(Path)
+        self.Connection.executescript("""
+            CREATE TABLE IF NOT EXISTS timetrack (user_id INTEGER, date TEXT, task_id INTEGER, time INTEGER, comment TEXT,
+                                                  PRIMARY KEY (user_id, date, task_id)) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS leavetime (user_id INTEGER, date TEXT, leave_type_id INTEGER, leave_time INTEGER,
+                                                  PRIMARY KEY (user_id, date, leave_type_id)) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS synced_weeks (kind TEXT, user_id INTEGER, week TEXT, synced_at REAL,
+                                                     PRIMARY KEY (kind, user_id, week)) WITHOUT ROWID;
+        """)
+
+    def _StaleRanges(self,Kind: str,UserIds: list,DateFrom,DateTo,Today):
         """ 
-            Name: actiPyme.Driver.LeaveTypesList()
+            Name: actiPyme.TimeSheetMirror._StaleRanges(Kind,UserIds,DateFrom,DateTo,Today)
 
-            Args:  Void
+            Args:   see Sync()
 
-            Desc: Simply get the info about the leave types. The output is a JSON object
+            Desc: Finds the weeks to be fetched and groups the consecutive weeks needed by the same users.
+                  A closed week is final only when it was synced after it left the open weeks (see _ClosedAt()), a week
+                  last synced while still open is fetched once more. The output is a list of (user ids, date from, date to)
         """
-        if  self.IsStarted:   
-            requrl=self.Target
-            requrl+="/leaveTypes"
-            CustReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw))
-            Leaves=json.loads(CustReq.text)
-        else:
-            Leaves={}
-            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
-        
-        return Leaves
+        OpenFrom=Today-datetime.timedelta(days=Today.weekday()+7*(self.OpenWeeks-1))
+        FirstWeek=DateFrom-datetime.timedelta(days=DateFrom.weekday())
+        Synced={}
+        for UserId,Week,SyncedAt in self.Connection.execute("SELECT user_id, week, synced_at FROM synced_weeks WHERE kind=? AND week>=? AND week<=?",
+                                                            (Kind,FirstWeek.isoformat(),DateTo.isoformat())):
+            if SyncedAt>=self._ClosedAt(datetime.date.fromisoformat(Week)):
+                Synced.setdefault(Week,set()).add(UserId)
+        Ranges=[]
+        Week=FirstWeek
+        while Week<=DateTo:
+            if Week>=OpenFrom:
+                Users=tuple(UserIds)
+            else:
+                Done=Synced.get(Week.isoformat(),set())
+                Users=tuple(UserId for UserId in UserIds if UserId not in Done)
+            RangeFrom=max(Week,DateFrom)
+            RangeTo=min(Week+datetime.timedelta(days=6),DateTo)
+            if Users:
+                if Ranges and Ranges[-1][0]==Users and Ranges[-1][2]+datetime.timedelta(days=1)==RangeFrom:
+                    Ranges[-1][2]=RangeTo
+                else:
+                    Ranges.append([Users,RangeFrom,RangeTo])
+            Week+=datetime.timedelta(days=7)
+        return Ranges
 
-    def SearchTasks(self,SearchMethod: int,SearchArgument: str):
+    def _ClosedAt(self,Week):
         """ 
-            Name: actiPyme.Driver.SearchTasks(SearchMethod: str, SearchArgument: str)
+            Name: actiPyme.TimeSheetMirror._ClosedAt(Week)
 
-            Args:   SearchMethod, specify how you want to search: 1 - By Name; 2 - By task id; 3 - By customer id; 4 - By project id
-                    SearchArgument, what you want to search as string
+            Args:  Week, Monday of the week (datetime.date)
 
-            Desc: This function lets you search for a task inside the actitime database. The output is a JSON object
+            Desc: The output is the local time (seconds since the epoch) when the week leaves the OpenWeeks window
         """
+        return time.mktime((Week+datetime.timedelta(days=7*max(self.OpenWeeks,1))).timetuple())
 
-        MethodDict={1: "ByName", 2: "ByIds", 3: "ByCustomerIds", 4: "ByProjectIds"}
-        if self.IsStarted:
-            #switch on the dictionary   
-            SrcMethTok=MethodDict.get(SearchMethod,"err")
-            if SrcMethTok=="err":
-                SrcResult={}
-                raise Exception('Inappropriate or bad search method')
-            elif SrcMethTok=="ByName":
-                #Here we look for a name
-                requrl=self.Target+"/tasks?offset=0&words="+SearchArgument
-                SrcReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw))
-                SrcResult=json.loads(SrcReq.text)
-            elif SrcMethTok=="ByIds":
-                #Here we look for a task ID
-                requrl=self.Target+"/tasks?offset=0&ids="+SearchArgument
-                SrcReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw))
-                SrcResult=json.loads(SrcReq.text)
-            elif SrcMethTok=="ByCustomerIds":
-                #Here we look for a customer ID
-                requrl=self.Target+"/tasks?offset=0&customerIds="+SearchArgument
-                SrcReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw))
-                SrcResult=json.loads(SrcReq.text)
-            elif SrcMethTok=="ByProjectIds":
-                #Here we look for a project ID
-                requrl=self.Target+"/tasks?offset=0&projectIds="+SearchArgument
-                SrcReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw))
-                SrcResult=json.loads(SrcReq.text)
-            else:
-                SrcResult={}
-                raise Exception('Inappropriate or bad search method')    
-        else:
-            SrcResult={}
-            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+    def Sync(self,UserIds,DateFrom,DateTo,LeaveTime: bool=True,Workers: int=4):
+        """ 
+            Name: actiPyme.TimeSheetMirror.Sync(UserIds,DateFrom,DateTo,LeaveTime: bool=True,Workers: int=4)
 
-        return SrcResult
+            Args:   UserIds, iterable of user ids
+                    DateFrom, DateTo, date interval (datetime.date or YYYY-MM-DD string), both included
+                    LeaveTime, mirror the leave time too
+                    Workers, number of requests sent in parallel
 
-    def SearchProjects(self, SearchMethod: int,SearchArgument: str):
+            Desc: Brings the mirror up to date. Only the weeks not yet mirrored and the open weeks are fetched,
+                  their local records are replaced (so cells deleted on the server disappear). Weeks are Monday to Sunday:
+                  a week only partly inside the interval is not marked as mirrored and is fetched again by the next run.
+                  The output is the number of records written
+        """
+        DateFrom=_AsDate(DateFrom)
+        DateTo=_AsDate(DateTo)
+        UserIds=[int(UserId) for UserId in dict.fromkeys(UserIds)]
+        Today=datetime.date.today()
+        Written=0
+        for Kind in (("timetrack","leavetime") if LeaveTime else ("timetrack",)):
+            for Users,RangeFrom,RangeTo in self._StaleRanges(Kind,UserIds,DateFrom,DateTo,Today):
+                Written+=self._SyncRange(Kind,Users,RangeFrom,RangeTo,Workers)
+        return Written
+
+    def _SyncRange(self,Kind: str,Users: tuple,DateFrom,DateTo,Workers: int):
         """ 
-            Name: actiPyme.Driver.SearchProjects(SearchMethod: str, SearchArgument: str)
+            Name: actiPyme.TimeSheetMirror._SyncRange(Kind,Users,DateFrom,DateTo,Workers)
 
-            Args:   SearchMethod, specify how you want to search: 1 - By Name; 2 - By task id; 3 - By customer id; 
-                    SearchArgument, what you want to search as string
+            Args:   see Sync()
 
-            Desc: This function lets you search for a task inside the actitime database. The output is a JSON object
+            Desc: Replaces the local records of some users within a date interval, in a single transaction
         """
-        MethodDict={1: "ByName", 2: "ByIds", 3: "ByCustomerIds"}
-        if self.IsStarted:
-            #switch on the dictionary   
-            SrcMethTok=MethodDict.get(SearchMethod,"err")
-            if SrcMethTok=="err":
-                SrcResult={}
-                raise Exception('Inappropriate or bad search method')
-            elif SrcMethTok=="ByName":
-                #Here we look for a name
-                requrl=self.Target+"/projects?offset=0&words="+SearchArgument
-                SrcReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw))
-                SrcResult=json.loads(SrcReq.text)
-            elif SrcMethTok=="ByIds":
-                #Here we look for a project ID
-                requrl=self.Target+"/projects?offset=0&ids="+SearchArgument
-                SrcReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw))
-                SrcResult=json.loads(SrcReq.text)
-            elif SrcMethTok=="ByCustomerIds":
-                #Here we look for a customer ID
-                requrl=self.Target+"/projects?offset=0&customerIds="+SearchArgument
-                SrcReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw))
-                SrcResult=json.loads(SrcReq.text)
-            else:
-                SrcResult={}
-                raise Exception('Inappropriate or bad search method')    
+        if Kind=="timetrack":
+            Records=self.Driver.FetchTimeTrack(Users,DateFrom,DateTo,Workers=Workers)
+            Rows=((Rec['userId'],Rec['date'],Rec['taskId'],Rec.get('time',0),Rec.get('comment') or "") for Rec in Records)
+            Insert="INSERT OR REPLACE INTO timetrack VALUES (?,?,?,?,?)"
         else:
-            SrcResult={}
-            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+            Records=self.Driver.FetchLeaveTime(Users,DateFrom,DateTo,Workers=Workers)
+            Rows=((Rec['userId'],Rec['date'],Rec.get('leaveTypeId'),Rec.get('leaveTime',0)) for Rec in Records)
+            Insert="INSERT OR REPLACE INTO leavetime VALUES (?,?,?,?)"
+        UserList=",".join(str(int(UserId)) for UserId in Users)
+        SyncedAt=time.time()
+        Weeks=[]
+        Week=DateFrom-datetime.timedelta(days=DateFrom.weekday())
+        while Week<=DateTo:
+            Weeks.extend((Kind,UserId,Week.isoformat(),SyncedAt) for UserId in Users)
+            Week+=datetime.timedelta(days=7)
+        with self.Connection:
+            self.Connection.execute("DELETE FROM "+Kind+" WHERE user_id IN ("+UserList+") AND date>=? AND date<=?",(DateFrom.isoformat(),DateTo.isoformat()))
+            Cursor=self.Connection.executemany(Insert,Rows)
+            # a week is marked as synced only when it has been fetched in full
+            WeekFrom=DateFrom if DateFrom.weekday()==0 else DateFrom+datetime.timedelta(days=7-DateFrom.weekday())
+            WeekTo=DateTo-datetime.timedelta(days=6)
+            self.Connection.executemany("INSERT OR REPLACE INTO synced_weeks VALUES (?,?,?,?)",
+                                        [Row for Row in Weeks if WeekFrom.isoformat()<=Row[2]<=WeekTo.isoformat()])
+        return Cursor.rowcount
+
+    def _Select(self,Kind: str,Columns: str,Keys: tuple,UserIds,DateFrom,DateTo):
+        Sql="SELECT "+Columns+" FROM "+Kind+" WHERE 1=1"
+        Params=[]
+        if UserIds is not None:
+            Sql+=" AND user_id IN ("+",".join(str(int(UserId)) for UserId in UserIds)+")"
+        if DateFrom is not None:
+            Sql+=" AND date>=?"
+            Params.append(_AsDate(DateFrom).isoformat())
+        if DateTo is not None:
+            Sql+=" AND date<=?"
+            Params.append(_AsDate(DateTo).isoformat())
+        Sql+=" ORDER BY user_id, date"
+        return [dict(zip(Keys,Row)) for Row in self.Connection.execute(Sql,Params)]
+
+    def TimeTrack(self,UserIds=None,DateFrom=None,DateTo=None):
+        """ 
+            Name: actiPyme.TimeSheetMirror.TimeTrack(UserIds=None,DateFrom=None,DateTo=None)
+
+            Args:   UserIds, iterable of user ids (all the users when None)
+                    DateFrom, DateTo, optional date interval, both included
+
+            Desc: Reads the mirrored time track. The output is a list of records shaped as the ones of Driver.FetchTimeTrack()
+        """
+        return self._Select("timetrack","user_id, date, task_id, time, comment",('userId','date','taskId','time','comment'),UserIds,DateFrom,DateTo)
+
+    def LeaveTime(self,UserIds=None,DateFrom=None,DateTo=None):
+        """ 
+            Name: actiPyme.TimeSheetMirror.LeaveTime(UserIds=None,DateFrom=None,DateTo=None)
+
+            Args:   see TimeTrack()
+
+            Desc: Reads the mirrored leave time. The output is a list of records shaped as the ones of Driver.FetchLeaveTime()
+        """
+        return self._Select("leavetime","user_id, date, leave_type_id, leave_time",('userId','date','leaveTypeId','leaveTime'),UserIds,DateFrom,DateTo)
+
+    def Query(self,Sql: str,Params=()):
+        """ 
+            Name: actiPyme.TimeSheetMirror.Query(Sql: str,Params=())
+
+            Args:   Sql, any SELECT on the tables timetrack(user_id, date, task_id, time, comment)
+                         and leavetime(user_id, date, leave_type_id, leave_time)
+                    Params, query parameters
+
+            Desc: Runs a query on the local store. The output is a list of tuples
+        """
+        return self.Connection.execute(Sql,Params).fetchall()
+
+    def Close(self):
+        self.Connection.close()
+
+
+def _Numpy():
+    """ 
+        Name: actiPyme._Numpy()
+
+        Args:  Void
+
+        Desc: Imports numpy on first use, numpy is needed only by the analytics classes
+    """
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('numpy is required by actiPyme.TimeTrackFrame. Install it with: pip install numpy') from None
+    return numpy
+
+
+class TimeTrackFrame(object):
+    """ 
+    Name: actiPyme.TimeTrackFrame(UserId,TaskId,Date,Minutes)
+
+    Args:   UserId, TaskId, Date, Minutes, equally long integer sequences, Date as proleptic ordinal (datetime.date.toordinal())
+
+    Desc:   Columnar, numpy backed time track table with vectorized aggregations. Each row is one time track cell
+            (user, task, day, minutes). Frames are usually built from the driver output:
+
+                Frame=actiPyme.TimeTrackFrame.FromRecords(Drv.FetchTimeTrack(UserIds,"2024-01-01","2024-12-31"))
+                Frame.GroupSum(("user","task"))     # {'user': array, 'task': array, 'minutes': array}
+                Frame.WeeklyRollup()                # minutes by user and week
+                Leave=actiPyme.TimeTrackFrame.FromLeaveRecords(Drv.FetchLeaveTime(UserIds,"2024-01-01","2024-12-31"))
+                Frame.JoinLeave(Leave)              # worked and leave minutes by user and day
 
-        return SrcResult
+            In a leave frame the task column holds the leave type id. Aggregation keys are "user", "task", "date",
+            "week" (Monday of the week) and "month". The outputs are dictionaries of numpy arrays, with dates as datetime64.
+            numpy is imported on first use.
+    
+    """
+    EpochOrdinal=datetime.date(1970,1,1).toordinal()
+    Keys=("user","task","date","week","month")
 
+    def __init__(self,UserId,TaskId,Date,Minutes):
+        Np=_Numpy()
+        self.UserId=Np.asarray(UserId,dtype=Np.int64)
+        self.TaskId=Np.asarray(TaskId,dtype=Np.int64)
+        self.Date=Np.asarray(Date,dtype=Np.int32)
+        self.Minutes=Np.asarray(Minutes,dtype=Np.int32)
+        if not len(self.UserId)==len(self.TaskId)==len(self.Date)==len(self.Minutes):
+            raise ValueError("TimeTrackFrame columns must have the same length")
 
+    @classmethod
+    def _FromColumns(cls,Records,TaskField: str,MinutesField: str):
+        UserId=array.array('q')
+        TaskId=array.array('q')
+        Date=array.array('i')
+        Minutes=array.array('i')
+        Ordinals={}
+        for Record in Records:
+            Day=Record['date']
+            Ordinal=Ordinals.get(Day)
+            if Ordinal is None:
+                Ordinal=Ordinals[Day]=_AsDate(Day).toordinal()
+            UserId.append(Record['userId'])
+            TaskId.append(Record.get(TaskField) or 0)
+            Date.append(Ordinal)
+            Minutes.append(Record.get(MinutesField) or 0)
+        return cls(UserId,TaskId,Date,Minutes)
 
-    def GetDayTimeTrack(self,usrIds: int, Year: int,Month: int,Day: int,TaskId:int):
+    @classmethod
+    def FromRecords(cls,Records):
         """ 
-            Name: actiPyme.Driver.GetDayTimeTrack(self,usrIds: int, Year: int,Month: int,Day: int,TaskId:int)
-
-            Args:   usrIds, user number for which you want to read the time sheet
-                    Year, when you want to query timesheet data
-                    Month, when you want to query timesheet data
-                    Day, when you want to query timesheet data
-                    TaskId, the identifier of the task (check actitime website)
+            Name: actiPyme.TimeTrackFrame.FromRecords(Records)
 
-            Desc: This function lets you query the data from actitime time sheet. The output is a JSON object
+            Args:  Records, iterable of flat time track records (Driver.FetchTimeTrack(), TimeSheetMirror.TimeTrack())
 
+            Desc: Builds a frame in a single pass over the records. The output is a TimeTrackFrame
         """
-        if  self.IsStarted: 
-            assembler="-"
-            dateQuery=assembler.join([str(Year),str(Month).zfill(2),str(Day).zfill(2)])
-            requrl=self.Target+"/timetrack/"+str(usrIds)+"/"+dateQuery+"/"+str(TaskId)
-            TtrackReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw))
-            TtrackData=json.loads(TtrackReq.text)   
-        else:
-            TtrackData={}
-            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+        return cls._FromColumns(Records,'taskId','time')
 
-        return TtrackData
+    @classmethod
+    def FromLeaveRecords(cls,Records):
+        """ 
+            Name: actiPyme.TimeTrackFrame.FromLeaveRecords(Records)
 
-    def WriteDayTimeTrack(self,usrIds: int, Year: int,Month: int,Day: int,TaskId:int,TimeAsMinute: int,Comment: str):
+            Args:  Records, iterable of leave records (Driver.FetchLeaveTime(), TimeSheetMirror.LeaveTime())
+
+            Desc: Builds a leave frame, the task column holds the leave type id. The output is a TimeTrackFrame
+        """
+        return cls._FromColumns(Records,'leaveTypeId','leaveTime')
+
+    @classmethod
+    def FromResponse(cls,Response: dict):
         """ 
-            Name: actiPyme.Driver.WriteDayTimeTrack(self,usrIds: int, Year: int,Month: int,Day: int,TaskId:int,TimeAsMinute: int,Comment: str)
+            Name: actiPyme.TimeTrackFrame.FromResponse(Response: dict)
 
-            Args:   usrIds, user number for which you want to write the time sheet
-                    Year, when you want to query timesheet data
-                    Month, when you want to query timesheet data
-                    Day, when you want to query timesheet data
-                    TaskId, the identifier of the task (check actitime website)
-                    TimeAsMinute, time spent on the task in minutes
-                    Comment, comment to the task (empty string if no comment should be posted)
+            Args:  Response, JSON object returned by Driver.GetTimeSheetDateInterval()
 
-            Desc: This function lets you query the data from actitime time sheet. The output is a JSON object 
+            Desc: Builds a frame from the nested day/records response. The output is a TimeTrackFrame
+        """
+        def Flatten():
+            for Day in Response.get('data',[]):
+                for Record in Day.get('records',[]):
+                    yield {'userId': Day['userId'],'date': Day['date'],'taskId': Record.get('taskId'),'time': Record.get('time')}
+        return cls.FromRecords(Flatten())
+
+    def __len__(self):
+        return len(self.Minutes)
+
+    def Days(self):
+        """ 
+            Name: actiPyme.TimeTrackFrame.Days()
 
+            Desc: Dates of the rows as numpy datetime64[D] array
         """
-        if  self.IsStarted:
-            assembler="-"
-            dateQuery=assembler.join([str(Year),str(Month).zfill(2),str(Day).zfill(2)])
-            requrl=self.Target+"/timetrack/"+str(usrIds)+"/"+dateQuery+"/"+str(TaskId)
-            #assemble data in json format
-            dataToWrite= '{"time":' + str(TimeAsMinute) + ',"comment":"' + Comment + '"}'
-            #finally write
-            WtReq=requests.patch(requrl,headers=self.writeDefheaders,data=dataToWrite,auth=(self.actitimeUserName,self.actitimePsw))
-            TtrackData=json.loads(WtReq.text)    
-        else:
-            TtrackData={}
-            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+        return (self.Date-self.EpochOrdinal).astype('datetime64[D]')
 
-        return TtrackData
+    def _KeyColumn(self,Key: str):
+        if Key=="user":
+            return self.UserId
+        if Key=="task":
+            return self.TaskId
+        if Key=="date":
+            return self.Date
+        if Key=="week":
+            # ordinal 1 is a Monday
+            return self.Date-(self.Date-1)%7
+        if Key=="month":
+            return self.Days().astype('datetime64[M]').astype(_Numpy().int64)
+        raise Exception('Inappropriate or bad aggregation key. Use one of '+", ".join(self.Keys))
 
-    def GetTaskInfo(self, TaskId:int):
+    def _KeyOutput(self,Key: str,Values):
+        if Key in ("date","week"):
+            return (Values-self.EpochOrdinal).astype('datetime64[D]')
+        if Key=="month":
+            return Values.astype('datetime64[M]')
+        return Values
+
+    @staticmethod
+    def _Factorize(Columns):
         """ 
-            Name: actiPyme.Driver.GetTaskInfo(self, TaskId:int)
+            Name: actiPyme.TimeTrackFrame._Factorize(Columns)
 
-            Args:   TaskId, the ID number of the task 
+            Args:  Columns, list of equally long integer arrays
 
-            Desc: This function returns the info and the properties of a task. The output is a JSON object
+            Desc: Maps every distinct combination of the columns to a group number.
+                  The output is (group of every row, list of the key columns of every group)
         """
-        if  self.IsStarted: 
-            requrl=self.Target+"/tasks/"+str(TaskId)
-            TaskInfoReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw))
-            TaskInfo=json.loads(TaskInfoReq.text)   
-        else:
-            TaskInfo={}
-            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+        Np=_Numpy()
+        Codes=[]
+        Uniques=[]
+        for Column in Columns:
+            Unique,Code=Np.unique(Column,return_inverse=True)
+            Uniques.append(Unique)
+            Codes.append(Code)
+        Combined=Np.ravel_multi_index(Codes,[max(len(Unique),1) for Unique in Uniques])
+        GroupKeys,Groups=Np.unique(Combined,return_inverse=True)
+        GroupCodes=Np.unravel_index(GroupKeys,[max(len(Unique),1) for Unique in Uniques])
+        return Groups,[Unique[Code] for Unique,Code in zip(Uniques,GroupCodes)]
+
+    def GroupSum(self,By=("user",)):
+        """ 
+            Name: actiPyme.TimeTrackFrame.GroupSum(By=("user",))
 
-        return TaskInfo
+            Args:  By, tuple of aggregation keys: "user", "task", "date", "week", "month"
 
-    def GetActiTimeInfo(self):
+            Desc: Total minutes for every combination of the keys. The output is a dictionary of numpy arrays, one per key plus 'minutes'
+        """
+        Np=_Numpy()
+        By=tuple(By)
+        if len(self)==0:
+            Result={Key: self._KeyOutput(Key,Np.zeros(0,dtype=Np.int64)) for Key in By}
+            Result['minutes']=Np.zeros(0,dtype=Np.int64)
+            return Result
+        Groups,KeyValues=self._Factorize([self._KeyColumn(Key) for Key in By])
+        Result={Key: self._KeyOutput(Key,Values) for Key,Values in zip(By,KeyValues)}
+        Result['minutes']=Np.bincount(Groups,weights=self.Minutes,minlength=len(KeyValues[0])).astype(Np.int64)
+        return Result
+
+    def WeeklyRollup(self,By=("user",)):
         """ 
-            Name: actiPyme.Driver.GetActiTimeInfo()
+            Name: actiPyme.TimeTrackFrame.WeeklyRollup(By=("user",))
 
-            Args:  Void
+            Args:  By, other aggregation keys
 
-            Desc: Simply get the info about the actitime installation. The output is a JSON object
+            Desc: Total minutes by week (Monday date) and the given keys, see GroupSum()
         """
-        if  self.IsStarted: 
-            requrl=self.Target+"/info/"
-            ActiInfoReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw))
-            ActiInfo=json.loads(ActiInfoReq.text)   
-        else:
-            ActiInfo={}
-            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
-        return ActiInfo
-    
-    def DepartmentList(self):
+        return self.GroupSum(tuple(By)+("week",))
+
+    def MonthlyRollup(self,By=("user",)):
         """ 
-            Name: actiPyme.Driver.DepartmentList()
+            Name: actiPyme.TimeTrackFrame.MonthlyRollup(By=("user",))
 
-            Args:  Void
+            Args:  By, other aggregation keys
 
-            Desc: Simply get the list of all departments. The output is a JSON object
+            Desc: Total minutes by month and the given keys, see GroupSum()
         """
-        if  self.IsStarted: 
-            requrl=self.Target+"/departments/"
-            DepInfoReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw))
-            DepInfo=json.loads(DepInfoReq.text)   
-        else:
-            DepInfo={}
-            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+        return self.GroupSum(tuple(By)+("month",))
 
-        return DepInfo
+    def JoinLeave(self,Leave,By=("user","date")):
+        """ 
+            Name: actiPyme.TimeTrackFrame.JoinLeave(Leave,By=("user","date"))
 
-    def GetDepartmentInfo(self,DepartmentId: int):
+            Args:   Leave, leave frame (TimeTrackFrame.FromLeaveRecords())
+                    By, aggregation keys shared by both frames ("task" is not allowed)
+
+            Desc: Outer join of worked and leave minutes. The output is a dictionary of numpy arrays, one per key plus
+                  'minutes' (worked), 'leave' and 'total'
+        """
+        Np=_Numpy()
+        By=tuple(By)
+        if "task" in By:
+            raise Exception('Inappropriate or bad aggregation key. Worked time and leave time do not share the task key')
+        Columns=[Np.concatenate([self._KeyColumn(Key),Leave._KeyColumn(Key)]) for Key in By]
+        if len(Columns[0])==0:
+            Result=self.GroupSum(By)
+            Result['leave']=Result['total']=Result['minutes']
+            return Result
+        Groups,KeyValues=self._Factorize(Columns)
+        NGroups=len(KeyValues[0])
+        Result={Key: self._KeyOutput(Key,Values) for Key,Values in zip(By,KeyValues)}
+        Result['minutes']=Np.bincount(Groups[:len(self)],weights=self.Minutes,minlength=NGroups).astype(Np.int64)
+        Result['leave']=Np.bincount(Groups[len(self):],weights=Leave.Minutes,minlength=NGroups).astype(Np.int64)
+        Result['total']=Result['minutes']+Result['leave']
+        return Result
+
+
+class WritePlanner(object):
+    """ 
+    Name: actiPyme.WritePlanner(Drv,Workers=4)
+
+    Args:   Drv, a started actiPyme.Driver
+            Workers, number of requests sent in parallel by Apply()
+
+    Desc:   Turns a batch of time sheet rows into the minimal set of WriteDayTimeTrack calls.
+            Rows hitting the same cell (user, day, task) are merged, the last one wins as it would with sequential writes.
+            The current values of the affected range are fetched in bulk and only the cells that actually change are sent:
+
+                Planner=actiPyme.WritePlanner(Drv)
+                Plan=Planner.Plan(Entry['timesheet'])
+                Report=Planner.Apply(Plan)
+
+            Every plan item is {'userId','date','taskId','minutes','comment','oldMinutes','oldComment','merged','action'},
+            with action "create", "update" or "unchanged" and merged the number of input rows folded in the cell.
+    
+    """
+    def __init__(self,Drv,Workers: int=4):
+        self.Driver=Drv
+        self.Workers=Workers
+
+    def Plan(self,Rows,UserId: int=None):
         """ 
-            Name: actiPyme.Driver.GetDepartmentInfo(self,DepartmentId: int)
+            Name: actiPyme.WritePlanner.Plan(Rows,UserId: int=None)
 
-            Args:  DepartmentId, identification number of department
+            Args:   Rows, iterable of rows {'year','month','day','task','minutes'} (AbfParser format), optionally with
+                    'comment' (when missing the comment on the server is kept) and 'userId'
+                    UserId, user of the rows without 'userId' (default: the user of the driver)
 
-            Desc: get the info of one department. The output is a JSON object
+            Desc: Merges the rows and compares them with the server. The output is the list of plan items, in first appearance order
         """
-        if  self.IsStarted: 
-            requrl=self.Target+"/departments/"+str(DepartmentId)
-            DepInfoReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw))
-            DepInfo=json.loads(DepInfoReq.text)   
-        else:
-            DepInfo={}
-            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+        DefaultUser=self.Driver.IdNumber if UserId is None else UserId
+        Cells=OrderedDict()
+        for Row in Rows:
+            Key=(int(Row.get('userId',DefaultUser)),datetime.date(Row['year'],Row['month'],Row['day']).isoformat(),int(Row['task']))
+            Cell=Cells.get(Key)
+            if Cell is None:
+                Cell=Cells[Key]={'userId': Key[0],'date': Key[1],'taskId': Key[2],'minutes': 0,'comment': None,
+                                 'oldMinutes': 0,'oldComment': "",'merged': 0,'action': "create"}
+            Cell['minutes']=int(Row['minutes'])
+            if Row.get('comment') is not None:
+                Cell['comment']=Row['comment']
+            Cell['merged']+=1
+        if not Cells:
+            return []
 
-        return DepInfo
+        Users=sorted(set(Key[0] for Key in Cells))
+        Dates=[Key[1] for Key in Cells]
+        for Record in self.Driver.FetchTimeTrack(Users,min(Dates),max(Dates),Workers=self.Workers):
+            Cell=Cells.get((Record['userId'],Record['date'],Record['taskId']))
+            if Cell is not None:
+                Cell['oldMinutes']=Record.get('time') or 0
+                Cell['oldComment']=Record.get('comment') or ""
+                Cell['action']="update"
 
-    def GetProjectInfo(self, ProjectId: int):
+        for Cell in Cells.values():
+            if Cell['comment'] is None:
+                Cell['comment']=Cell['oldComment']
+            if Cell['minutes']==Cell['oldMinutes'] and Cell['comment']==Cell['oldComment']:
+                Cell['action']="unchanged"
+        return list(Cells.values())
+
+    def Apply(self,Plan):
         """ 
-            Name: actiPyme.Driver.GetProjectInfo(self, ProjectId: int)
+            Name: actiPyme.WritePlanner.Apply(Plan)
 
-            Args:  ProjectId, identification number of the project
+            Args:  Plan, output of Plan()
 
-            Desc: get the info of one project. The output is a JSON object
+            Desc: Sends the changed cells. The output is the plan with 'ok', 'error' and 'response' added to every item
+                  (unchanged cells are reported as ok without being sent)
         """
-        if  self.IsStarted: 
-            requrl=self.Target+"/projects/"+str(ProjectId)
-            ProjInfoReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw))
-            ProjInfo=json.loads(ProjInfoReq.text)   
-        else:
-            ProjInfo={}
-            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+        def Write(Cell):
+            Result=dict(Cell,ok=True,error="",response=None)
+            if Cell['action']=="unchanged":
+                return Result
+            Day=_AsDate(Cell['date'])
+            try:
+                Result['response']=self.Driver.WriteDayTimeTrack(Cell['userId'],Day.year,Day.month,Day.day,Cell['taskId'],Cell['minutes'],Cell['comment'])
+            except Exception as Err:
+                Result['ok']=False
+                Result['error']=str(Err)
+            return Result
 
-        return ProjInfo
+        with ThreadPoolExecutor(max_workers=self.Workers) as Executor:
+            return list(Executor.map(Write,Plan))
 
-    def SearchUsers(self, SearchMethod: int,SearchArgument: str):
+    @staticmethod
+    def Summary(Plan):
         """ 
-            Name: actiPyme.Driver.SearchUsers(SearchMethod: str, SearchArgument: str)
+            Name: actiPyme.WritePlanner.Summary(Plan)
 
-            Args:   SearchMethod, specify how you want to search: 1 - By Full Name; 2 - By user Id; 3 - By department; 4 - By email; 
-                    SearchArgument, what you want to search as string
+            Args:  Plan, output of Plan() or Apply()
 
-            Desc: This function lets you search for a task inside the actitime database. The output is a JSON object
+            Desc: Counts the plan items. The output is {'rows','cells','create','update','unchanged'}
         """
-        MethodDict={1: "ByFullName", 2: "ByIds", 3: "ByDepartment", 4: "ByEmail"}
-        if self.IsStarted:
-            #switch on the dictionary   
-            SrcMethTok=MethodDict.get(SearchMethod,"err")
-            if SrcMethTok=="err":
-                SrcResult={}
-                raise Exception('Inappropriate or bad search method')
-            elif SrcMethTok=="ByFullName":
-                #Here we look for a full name
-                requrl=self.Target+"/users?offset=0&name="+SearchArgument
-                SrcReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw))
-                SrcResult=json.loads(SrcReq.text)
-            elif SrcMethTok=="ByIds":
-                #Here we look for a user ID
-                requrl=self.Target+"/users?offset=0&ids="+SearchArgument
-                SrcReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw))
-                SrcResult=json.loads(SrcReq.text)
-            elif SrcMethTok=="ByDepartment":
-                #Here we look for a department
-                requrl=self.Target+"/users?offset=0&department="+SearchArgument
-                SrcReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw))
-                SrcResult=json.loads(SrcReq.text)
-            elif SrcMethTok=="ByEmail":
-                #Here we look for an email addresss
-                requrl=self.Target+"/users?offset=0&email="+SearchArgument
-                SrcReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw))
-                SrcResult=json.loads(SrcReq.text)
+        Counts={'rows': 0,'cells': len(Plan),'create': 0,'update': 0,'unchanged': 0}
+        for Cell in Plan:
+            Counts['rows']+=Cell['merged']
+            Counts[Cell['action']]+=1
+        return Counts
+
+
+class _NdjsonSink(object):
+    # one JSON object per line
+    def __init__(self,Stream,Fields,Kind):
+        self.Stream=io.TextIOWrapper(Stream,encoding="utf-8",newline="\n")
+        self.Fields=Fields
+
+    def Write(self,Rows):
+        Fields=self.Fields
+        self.Stream.write("".join(json.dumps(dict(zip(Fields,Row)),ensure_ascii=False)+"\n" for Row in Rows))
+
+    def Close(self):
+        self.Stream.flush()
+        self.Stream.detach()
+
+
+class _CsvSink(object):
+    # header line, then one line per record
+    def __init__(self,Stream,Fields,Kind):
+        import csv
+        self.Stream=io.TextIOWrapper(Stream,encoding="utf-8",newline="")
+        self.Writer=csv.writer(self.Stream)
+        self.Writer.writerow(Fields)
+
+    def Write(self,Rows):
+        self.Writer.writerows(("" if Value is None else Value for Value in Row) for Row in Rows)
+
+    def Close(self):
+        self.Stream.flush()
+        self.Stream.detach()
+
+
+class _ColumnarSink(object):
+    # see TimeSheetExporter.ReadColumnar()
+    def __init__(self,Stream,Fields,Kind,Codec=0):
+        self.Stream=Stream
+        self.Fields=Fields
+        self.Codec=Codec
+        Header=json.dumps({'kind': Kind,'fields': [[Field,TimeSheetExporter.ColumnTypes[Field]] for Field in Fields]}).encode("utf-8")
+        Stream.write(TimeSheetExporter.ColumnarMagic+struct.pack("<HHI",TimeSheetExporter.ColumnarVersion,Codec,len(Header))+Header)
+
+    def Write(self,Rows):
+        Payload=[]
+        for Position,Field in enumerate(self.Fields):
+            TypeCode=TimeSheetExporter.ColumnTypes[Field]
+            if TypeCode=="s":
+                Texts=[("" if Row[Position] is None else str(Row[Position])).encode("utf-8") for Row in Rows]
+                Payload.append(array.array('i',map(len,Texts)).tobytes())
+                Payload.append(b"".join(Texts))
+            elif Field=="date":
+                Payload.append(array.array(TypeCode,(_AsDate(Row[Position]).toordinal() for Row in Rows)).tobytes())
             else:
-                SrcResult={}
-                raise Exception('Inappropriate or bad search method')    
-        else:
-            SrcResult={}
-            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+                Payload.append(array.array(TypeCode,(Row[Position] or 0 for Row in Rows)).tobytes())
+        Payload=TimeSheetExporter.ColumnarCodecs[self.Codec][1](b"".join(Payload))
+        self.Stream.write(struct.pack("<QQ",len(Rows),len(Payload))+Payload)
+
+    def Close(self):
+        self.Stream.flush()
 
-        return SrcResult
+
+class TimeSheetExporter(object):
+    """ 
+    Name: actiPyme.TimeSheetExporter(Drv,Workers=4,UserBatch=50,WindowDays=31,ChunkRows=10000,QueueChunks=4)
+
+    Args:   Drv, a started actiPyme.Driver
+            Workers, UserBatch, WindowDays, see Driver.FetchTimeTrack()
+            ChunkRows, number of records written at once
+            QueueChunks, max number of chunks waiting for the writer
+
+    Desc:   Streams time track or leave records of many users and long intervals to a file, in a single pass and with
+            bounded memory. Records come from Driver.FetchTimeTrack()/FetchLeaveTime() and are handed in chunks to a writer
+            thread, so fetching, encoding and compressing overlap. Formats:
+                ndjson, one JSON object per line
+                csv, with a header line
+                columnar, blocks of ChunkRows records with fixed width integer columns (dates as proleptic ordinals,
+                          missing numbers as 0) and length prefixed UTF-8 text columns, read back by ReadColumnar()
+            Compression is "gzip", "bz2" or "xz" (whole file for ndjson/csv, block by block for columnar). Format and
+            compression are guessed from the file name when not given:
+
+                Exporter=actiPyme.TimeSheetExporter(Drv,Workers=8)
+                Exporter.Export("2024.csv.gz",range(1,1001),"2024-01-01","2024-12-31")
+                Exporter.Export("leave-2024.ndjson",range(1,1001),"2024-01-01","2024-12-31",Kind="leavetime")
     
-    def GetLeaveTime(self, UserId: int,YearFrom: int,MonthFrom: int,DayFrom: int,YearTo: int,MonthTo: int, DayTo: int):
-        """ 
-            Name: actiPyme.Driver.GetLeaveTime(self, UserId: int,YearFrom: int,MonthFrom: int,DayFrom: int,YearTo: int,MonthTo: int, DayTo: int)
+    """
+    Fields={'timetrack': ('userId','date','taskId','time','comment'),'leavetime': ('userId','date','leaveTypeId','leaveTime')}
+    # array type codes of the columnar format, "s" for text
+    ColumnTypes={'userId': "q",'date': "i",'taskId': "q",'time': "i",'comment': "s",'leaveTypeId': "q",'leaveTime': "i"}
+    Extensions={'.ndjson': "ndjson",'.jsonl': "ndjson",'.csv': "csv",'.atc': "columnar"}
+    CompressionExtensions={'.gz': "gzip",'.bz2': "bz2",'.xz': "xz"}
+    ColumnarMagic=b"ATCF"
+    ColumnarVersion=1
+    # codec id -> (compression, compress, decompress) of the columnar blocks
+    ColumnarCodecs={0: (None,bytes,bytes),
+                    1: ("gzip",zlib.compress,zlib.decompress),
+                    2: ("bz2",bz2.compress,bz2.decompress),
+                    3: ("xz",lzma.compress,lzma.decompress)}
 
-            Args:   userId, user number for which you want to read the time sheet
-                    YearFrom, start date you want to query timesheet data
-                    MonthFrom, start date want to query timesheet data
-                    DayFrom, start date want to query timesheet data
-                    YearTo, end date want to query timesheet data
-                    MonthTo, end date want to query timesheet data
-                    DayTo, end date want to query timesheet data
+    def __init__(self,Drv,Workers: int=4,UserBatch: int=50,WindowDays: int=31,ChunkRows: int=10000,QueueChunks: int=4):
+        self.Driver=Drv
+        self.Workers=Workers
+        self.UserBatch=UserBatch
+        self.WindowDays=WindowDays
+        self.ChunkRows=ChunkRows
+        self.QueueChunks=QueueChunks
 
-            Desc: This function lets you query the leave time from actitime time sheet. The output is a JSON object
+    @classmethod
+    def GuessFormat(cls,Path: str):
+        """ 
+            Name: actiPyme.TimeSheetExporter.GuessFormat(Path: str)
 
+            Args:  Path, output file name
+
+            Desc: The output is (format, compression) according to the file extensions, e.g. "x.csv.gz" -> ("csv","gzip")
         """
+        Root,Extension=os.path.splitext(Path.lower())
+        Compression=cls.CompressionExtensions.get(Extension)
+        if Compression is not None:
+            Root,Extension=os.path.splitext(Root)
+        return cls.Extensions.get(Extension,"ndjson"),Compression
 
-        if  self.IsStarted: 
-            assembler="-"
-            dateFrom=assembler.join([str(YearFrom),str(MonthFrom).zfill(2),str(DayFrom).zfill(2)])
-            dateTo=assembler.join([str(YearTo),str(MonthTo).zfill(2),str(DayTo).zfill(2)])
-            requrl=self.Target+"/leavetime?userIds="+str(self.IdNumber)+"&dateFrom="+dateFrom+"&dateTo="+dateTo
-            LeaveReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw))
-            LeaveData=json.loads(LeaveReq.text)   
-        else:
-            LeaveData={}
-            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+    @staticmethod
+    def _Compressed(Stream,Format: str,Compression):
+        # the text formats are compressed as a whole, the columnar one block by block
+        if Compression is None or Format=="columnar":
+            return Stream
+        if Compression=="gzip":
+            import gzip
+            return gzip.GzipFile(fileobj=Stream,mode="wb",compresslevel=6)
+        if Compression=="bz2":
+            return bz2.BZ2File(Stream,"wb")
+        if Compression=="xz":
+            return lzma.LZMAFile(Stream,"wb")
+        raise ValueError("Unknown compression "+repr(Compression))
 
-        return LeaveData
+    def _Records(self,Kind: str,UserIds,DateFrom,DateTo):
+        Args=(UserIds,DateFrom,DateTo,self.UserBatch,self.WindowDays,self.Workers)
+        if Kind=="timetrack":
+            return self.Driver.FetchTimeTrack(*Args)
+        if Kind=="leavetime":
+            return self.Driver.FetchLeaveTime(*Args)
+        raise ValueError("Unknown kind "+repr(Kind)+", expected timetrack or leavetime")
 
-    def GetTimeSheetDateInterval(self,  UserId: int,YearFrom: int,MonthFrom: int,DayFrom: int,YearTo: int,MonthTo: int, DayTo: int):
+    def Export(self,Path: str,UserIds,DateFrom,DateTo,Kind: str="timetrack",Format: str=None,Compression: str=None):
         """ 
-            Name: actiPyme.Driver.GetTimeSheetDateInterval(self, UserId: int,YearFrom: int,MonthFrom: int,DayFrom: int,YearTo: int,MonthTo: int, DayTo: int)
-
-            Args:   userId, user number for which you want to read the time sheet
-                    YearFrom, start date you want to query timesheet data
-                    MonthFrom, start date want to query timesheet data
-                    DayFrom, start date want to query timesheet data
-                    YearTo, end date want to query timesheet data
-                    MonthTo, end date want to query timesheet data
-                    DayTo, end date want to query timesheet data
+            Name: actiPyme.TimeSheetExporter.Export(Path,UserIds,DateFrom,DateTo,Kind="timetrack",Format=None,Compression=None)
 
-            Desc: This function lets you query the time sheet of a user within a date interval. The output is a JSON object
+            Args:   Path, output file ("-" for the standard output)
+                    UserIds, iterable of user ids
+                    DateFrom, DateTo, date interval (datetime.date or YYYY-MM-DD string), both included
+                    Kind, "timetrack" or "leavetime"
+                    Format, "ndjson", "csv" or "columnar" (default: from the file name, see GuessFormat())
+                    Compression, None, "gzip", "bz2" or "xz" (default: from the file name)
 
+            Desc: Writes the records of the interval. The file is written aside (owner-only, as it holds time sheets)
+                  and renamed to Path when complete: when the export fails no file is left. The output is the number
+                  of records written
         """
-        if  self.IsStarted: 
-            assembler="-"
-            dateFrom=assembler.join([str(YearFrom),str(MonthFrom).zfill(2),str(DayFrom).zfill(2)])
-            dateTo=assembler.join([str(YearTo),str(MonthTo).zfill(2),str(DayTo).zfill(2)])
-            requrl=self.Target+"/timetrack?userIds="+str(self.IdNumber)+"&dateFrom="+dateFrom+"&dateTo="+dateTo
-            TimesheetReq=requests.get(requrl,headers=self.ServerHeaders,auth=(self.actitimeUserName,self.actitimePsw))
-            TimesheetData=json.loads(TimesheetReq.text)   
+        GuessedFormat,GuessedCompression=self.GuessFormat(Path)
+        Format=Format or GuessedFormat
+        Compression=Compression if Compression is not None else GuessedCompression
+        Fields=self.Fields.get(Kind)
+        if Fields is None:
+            raise ValueError("Unknown kind "+repr(Kind)+", expected timetrack or leavetime")
+        if Format=="columnar":
+            Codecs=[Codec for Codec,Spec in self.ColumnarCodecs.items() if Spec[0]==Compression]
+            if not Codecs:
+                raise ValueError("Unknown compression "+repr(Compression))
+            SinkArgs=(Fields,Kind,Codecs[0])
+        elif Format in ("ndjson","csv"):
+            SinkArgs=(Fields,Kind)
         else:
-            TimesheetData={}
-            raise Exception('Communication not initialized. Run the Start() command on the driver instance')
+            raise ValueError("Unknown format "+repr(Format)+", expected ndjson, csv or columnar")
+        Records=self._Records(Kind,UserIds,DateFrom,DateTo)
 
-        return TimesheetData
+        # the file is written aside and renamed once complete, a failed export leaves no partial file behind
+        if Path=="-":
+            Raw=sys.stdout.buffer
+            TempName=None
+        else:
+            Fd,TempName=tempfile.mkstemp(prefix=os.path.basename(Path)+".",suffix=".tmp",dir=os.path.dirname(os.path.abspath(Path)))
+            Raw=os.fdopen(Fd,"wb")
+        Done=False
+        try:
+            Count=self._Write(Raw,Records,Fields,Format,Compression,SinkArgs)
+            Done=True
+        finally:
+            if TempName is None:
+                Raw.flush()
+            else:
+                Raw.close()
+                if Done:
+                    os.replace(TempName,Path)
+                else:
+                    os.remove(TempName)
+        return Count
 
+    def _Write(self,Raw,Records,Fields: tuple,Format: str,Compression,SinkArgs: tuple):
+        """ 
+            Name: actiPyme.TimeSheetExporter._Write(Raw,Records,Fields,Format,Compression,SinkArgs)
 
-class AbfParser(object):
-    """ 
-    Name: actiPyme.AbfParser(FileName)
+            Args:  see Export()
 
-    Args:   FileName, actitime batch format (.abf) file to be read
+            Desc: Hands the records in chunks to the writer thread. The output is the number of records written
+        """
+        Output=self._Compressed(Raw,Format,Compression)
+        Chunks=queue.Queue(maxsize=self.QueueChunks)
+        Failure=[]
 
-    Desc:   This class implements the routines to load actitime time track data using a batch file.
-            The batch file should be formatted as described below (comments are with % at the start of line)
+        def Writer():
+            try:
+                Sink={'ndjson': _NdjsonSink,'csv': _CsvSink,'columnar': _ColumnarSink}[Format](Output,*SinkArgs)
+                while True:
+                    Chunk=Chunks.get()
+                    if Chunk is None:
+                        break
+                    Sink.Write(Chunk)
+                Sink.Close()
+            except BaseException as Err:
+                Failure.append(Err)
+                # keep draining, so the producer never blocks
+                while Chunks.get() is not None:
+                    pass
 
-                % actitime batch format file (.abf)
-                % comments are with the percentage charachter
-                % A. Lavatelli - 2019
-                %First entry
-                START ENTRY;
-                USERNAME;john.doe;
-                PASSWORD;FooBar18;
-                START TIMESHEET;
-                % format the timesheet as follows: year;month;day;task;minutes;
-                2019;8;19;558;180;
-                2019;8;19;13619;240;
-                END TIMESHEET;
-                END ENTRY;
-                %Here another entry
-                START ENTRY;
-                USERNAME;pippo.balera;
-                PASSWORD;ggghhhh;
-                START TIMESHEET;
-                2019;7;12;108;100;
-                2019;7;13;16509;70;
-                2019;8;1;21;40;
-                2019;8;3;009;30;
-                END TIMESHEET;
-                END ENTRY;
-    
-    """
-    def __init__ (self,FileName):
-        self.FileName=FileName
-        # try to open file
+        Thread=threading.Thread(target=Writer,daemon=True)
+        Thread.start()
+        Count=0
         try:
-            self.InputFile=open(self.FileName,"r")
-        except:
-            raise Exception('Impossible to open file')
+            Chunk=[]
+            for Record in Records:
+                Chunk.append(tuple(Record.get(Field) for Field in Fields))
+                if len(Chunk)>=self.ChunkRows:
+                    Count+=len(Chunk)
+                    # blocks while the writer is behind (backpressure)
+                    Chunks.put(Chunk)
+                    Chunk=[]
+                    if Failure:
+                        break
+            if Chunk and not Failure:
+                Count+=len(Chunk)
+                Chunks.put(Chunk)
+        finally:
+            Chunks.put(None)
+            Thread.join()
+            if Output is not Raw:
+                Output.close()
+        if Failure:
+            raise Failure[0]
+        return Count
 
-        self.TimeSheetRowLimit=1000
-    
-    def Read(self):
-        # remove comment lines
-        ParsedRow=[]
-        for InpLine in self.InputFile:
-            if InpLine[0]!="%":
-                # remove \n
-                JustInp=InpLine.split("\n")[0]
-                ParsedRow.append(JustInp)
-
-        #initialize the data structure
-        timeSheetTemplate={'year': 0,'month':0,'day': 0,'task':0,'minutes':0}
-        actiItem={'user':'','psw':'','timesheet': []}
-        actiData=[]
-        Nrows=len(ParsedRow)
-        WorkRow=0
-        EntryCounter=0
-        #here you parse the input file
-        while WorkRow<Nrows:
-            Command=ParsedRow[WorkRow].split(';')
-            if Command[0]=="START ENTRY":
-                # get username
-                WorkRow+=1
-                Command=ParsedRow[WorkRow].split(';')
-                if Command[0]=="USERNAME":
-                    actiItem['user']=Command[1]
-                else:
-                    raise ValueError("Input file formatted in the wrong manner. Expected USERNAME after START ENTRY")
-                #get psw
-                WorkRow+=1
-                Command=ParsedRow[WorkRow].split(';')
-                if Command[0]=="PASSWORD":
-                    actiItem['psw']=Command[1]
-                else:
-                    raise ValueError("Input file formatted in the wrong manner. Expected PASSWORD after USERNAME")
-                # retrieve time sheet
-                WorkRow+=1
-                Command=ParsedRow[WorkRow].split(';')
-                if Command[0]=="START TIMESHEET":
-                    TimeSheetRowCounter=0
-                    timeSheetList=[]
-                    while Command[0]!="END TIMESHEET":
-                        WorkRow+=1
-                        # put a limit to the while cycle
-                        if TimeSheetRowCounter>self.TimeSheetRowLimit:
-                            raise  ValueError("Too many time sheet rows or maybe something wrong in the formatting of input file. Check the existance of the END TIMESHEET tag")
-                        Command=ParsedRow[WorkRow].split(';')
-                        # dump the time sheet data into the output array
-                        if Command[0]!="END TIMESHEET":
-                            timeSheetList.append(timeSheetTemplate)
-                            timeSheetTemplate["year"]=int(Command[0])
-                            timeSheetTemplate["month"]=int(Command[1])
-                            timeSheetTemplate["day"]=int(Command[2])
-                            timeSheetTemplate["task"]=int(Command[3])
-                            timeSheetTemplate["minutes"]=int(Command[4])
-                            TimeSheetLineAsJsonStr=json.dumps(timeSheetTemplate)
-                            timeSheetList[TimeSheetRowCounter]=json.loads(TimeSheetLineAsJsonStr)
-                            TimeSheetRowCounter+=1
-                    
-                    actiItem["timesheet"]=timeSheetList                  
-                else:
-                    raise ValueError("Input file formatted in the wrong manner. Expected START TIMESHEET after PASSWORD")
-                #update counters
-                WorkRow+=1
-                Command=ParsedRow[WorkRow].split(';')
-                if Command[0]=="END ENTRY":
-                    # dump the acti time entry in the output structure (JSON format)
-                    actiDataAsJsonStr=json.dumps(actiItem)
-                    actiDataAsJsonItem=json.loads(actiDataAsJsonStr)
-                    actiData.append(actiDataAsJsonItem)
-                    EntryCounter+=1
+    @classmethod
+    def ReadColumnar(cls,Path: str):
+        """ 
+            Name: actiPyme.TimeSheetExporter.ReadColumnar(Path: str)
 
-            WorkRow+=1
+            Args:  Path, file written with Format="columnar"
 
-        return(actiData)
+            Desc: Generator of the blocks of the file, one dictionary per block: field -> array.array (list for the
+                  text fields). Dates are proleptic ordinals, ready for TimeTrackFrame:
 
-    def Close(self):
-        self.InputFile.close()
\ No newline at end of file
+                      for Block in actiPyme.TimeSheetExporter.ReadColumnar("2024.atc"):
+                          Frame=actiPyme.TimeTrackFrame(Block['userId'],Block['taskId'],Block['date'],Block['time'])
+        """
+        with open(Path,"rb") as File:
+            Magic=File.read(len(cls.ColumnarMagic))
+            Version,Codec,HeaderSize=struct.unpack("<HHI",File.read(8))
+            if Magic!=cls.ColumnarMagic or Version!=cls.ColumnarVersion or Codec not in cls.ColumnarCodecs:
+                raise ValueError("Not a columnar time sheet export: "+Path)
+            Fields=json.loads(File.read(HeaderSize).decode("utf-8"))['fields']
+            Decompress=cls.ColumnarCodecs[Codec][2]
+            while True:
+                BlockHeader=File.read(16)
+                if not BlockHeader:
+                    break
+                Rows,Size=struct.unpack("<QQ",BlockHeader)
+                Payload=Decompress(File.read(Size))
+                Block={}
+                Pos=0
+                for Field,TypeCode in Fields:
+                    if TypeCode=="s":
+                        Lengths=array.array('i',Payload[Pos:Pos+4*Rows])
+                        Pos+=4*Rows
+                        Texts=[]
+                        for Length in Lengths:
+                            Texts.append(Payload[Pos:Pos+Length].decode("utf-8"))
+                            Pos+=Length
+                        Block[Field]=Texts
+                    else:
+                        Column=array.array(TypeCode)
+                        Size=Column.itemsize*Rows
+                        Column.frombytes(Payload[Pos:Pos+Size])
+                        Pos+=Size
+                        Block[Field]=Column
+                yield Block
@@ -0,0 +1,474 @@
+import sys
+import os
+import json
+import base64
+import time
+import random
+import argparse
+import datetime
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import actiPyme
+
+"""
+
+Name: actiPymeBench.py
+
+Desc: Benchmark suite of the actiPyme driver. It bundles a local stand-in of the actiTIME REST server (MockServer),
+      with configurable latency, error rate and dataset size, and a harness measuring throughput and p50/p99 latency of
+      single calls, paginated searches, bulk reads, bulk uploads and .abf parsing. Run it as:
+
+            python actiPymeBench.py --latency 0.005 --tasks 20000 --users 200
+
+
+"""
+
+class MockDataset(object):
+    """
+    Name: actiPymeBench.MockDataset(Tasks=5000,Projects=200,Customers=20,Users=100,Departments=5,Seed=0)
+
+    Args:   Tasks, Projects, Customers, Users, Departments, number of items of each collection
+            Seed, seed of the generated names and time sheets
+
+    Desc: Deterministic fake actiTIME content served by MockServer. Time track cells are generated on the fly
+          from (user, date) and overridden by the ones written through PATCH
+
+    """
+    def __init__(self,Tasks=5000,Projects=200,Customers=20,Users=100,Departments=5,Seed=0):
+        Rnd=random.Random(Seed)
+        Words=["design","review","build","test","deploy","support","meeting","analysis","training","report"]
+        self.Customers=[{'id': Id,'name': "Customer "+str(Id)} for Id in range(1,Customers+1)]
+        self.Projects=[{'id': Id,'name': "Project "+str(Id)+" "+Rnd.choice(Words),'customerId': Rnd.randint(1,Customers)} for Id in range(1,Projects+1)]
+        self.Tasks=[]
+        for Id in range(1,Tasks+1):
+            Project=self.Projects[Rnd.randrange(Projects)]
+            self.Tasks.append({'id': Id,'name': Rnd.choice(Words)+" "+Rnd.choice(Words)+" "+str(Id),
+                               'projectId': Project['id'],'customerId': Project['customerId'],'status': "open"})
+        self.Departments=[{'id': Id,'name': "Department "+str(Id)} for Id in range(1,Departments+1)]
+        self.Users=[{'id': Id,'firstName': "Name"+str(Id),'lastName': "Surname"+str(Id),'username': "user"+str(Id),
+                     'email': "user"+str(Id)+"@example.com",'departmentId': Rnd.randint(1,Departments)} for Id in range(1,Users+1)]
+        self.LeaveTypes=[{'id': 1,'name': "Vacation"},{'id': 2,'name': "Sick leave"}]
+        self.Written={}
+        self.Lock=threading.Lock()
+
+    def DayRecords(self,UserId: int,Date: datetime.date):
+        """
+            Name: actiPymeBench.MockDataset.DayRecords(UserId: int,Date: datetime.date)
+
+            Desc: Time track records of a user in a day. The output is a list of {'taskId','time','comment'}
+        """
+        Records={}
+        if Date.weekday()<5 and self.Tasks:
+            Seed=UserId*7919+Date.toordinal()
+            for Slot in range(2):
+                TaskId=(Seed+Slot*104729)%len(self.Tasks)+1
+                Records[TaskId]={'taskId': TaskId,'time': 240,'comment': ""}
+        with self.Lock:
+            for (WrUser,WrDate,TaskId),Cell in self.Written.items():
+                if WrUser==UserId and WrDate==Date:
+                    Records[TaskId]={'taskId': TaskId,'time': Cell['time'],'comment': Cell['comment']}
+        return [Record for Record in Records.values() if Record['time']>0]
+
+
+class MockServer(object):
+    """
+    Name: actiPymeBench.MockServer(Dataset=None,Latency=0.0,Jitter=0.0,ErrorRate=0.0,Port=0,RetryAfter=None)
+
+    Args:   Dataset, MockDataset to be served (a default one when None)
+            Latency, seconds added to every response
+            Jitter, random extra latency, up to this number of seconds
+            ErrorRate, fraction of requests answered with 503 Service Unavailable
+            Port, TCP port (a free one when 0)
+            RetryAfter, when set failed requests are answered with 429 Too Many Requests and this Retry-After (seconds)
+
+    Desc: Local stand-in of the actiTIME REST API implementing the endpoints used by actiPyme.Driver.
+          The server runs on a background thread between Start() and Stop(); Url is the Target of the driver
+
+    """
+    def __init__(self,Dataset=None,Latency=0.0,Jitter=0.0,ErrorRate=0.0,Port=0,RetryAfter=None):
+        self.Dataset=Dataset if Dataset is not None else MockDataset()
+        self.Latency=Latency
+        self.Jitter=Jitter
+        self.ErrorRate=ErrorRate
+        self.Port=Port
+        self.RetryAfter=RetryAfter
+        self.Requests=0
+        self.Errors=0
+        self._Random=random.Random(1)
+        self._Lock=threading.Lock()
+        self._Server=None
+        self._Thread=None
+
+    @property
+    def Url(self):
+        return "http://127.0.0.1:"+str(self._Server.server_port)
+
+    def Start(self):
+        """
+            Name: actiPymeBench.MockServer.Start()
+
+            Desc: Starts serving on a background thread. The output is the url of the server
+        """
+        Mock=self
+
+        class Handler(MockHandler):
+            Server=Mock
+
+        self._Server=ThreadingHTTPServer(("127.0.0.1",self.Port),Handler)
+        self._Server.daemon_threads=True
+        self._Thread=threading.Thread(target=self._Server.serve_forever,daemon=True)
+        self._Thread.start()
+        return self.Url
+
+    def Stop(self):
+        """
+            Name: actiPymeBench.MockServer.Stop()
+
+            Desc: Stops the server
+        """
+        if self._Server is not None:
+            self._Server.shutdown()
+            self._Server.server_close()
+            self._Server=None
+
+    def _Fault(self):
+        """
+            Name: actiPymeBench.MockServer._Fault()
+
+            Desc: Sleeps the configured latency and tells whether the request must fail
+        """
+        with self._Lock:
+            self.Requests+=1
+            Delay=self.Latency+(self._Random.random()*self.Jitter if self.Jitter else 0.0)
+            Failed=self.ErrorRate>0 and self._Random.random()<self.ErrorRate
+            if Failed:
+                self.Errors+=1
+        if Delay>0:
+            time.sleep(Delay)
+        return Failed
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """
+    Name: actiPymeBench.MockHandler
+
+    Desc: Request handler of MockServer, the Server class attribute is set by MockServer.Start()
+
+    """
+    protocol_version="HTTP/1.1"
+    # headers and body are written separately, avoid the delayed ACK stall on keep-alive connections
+    disable_nagle_algorithm=True
+    Server=None
+
+    def log_message(self,*Args):
+        pass
+
+    def _Send(self,Data,Status=200,Headers=None):
+        Body=json.dumps(Data).encode("utf-8")
+        self.send_response(Status)
+        for Name,Value in (Headers or {}).items():
+            self.send_header(Name,Value)
+        self.send_header("Content-Type","application/json; charset=UTF-8")
+        self.send_header("Content-Length",str(len(Body)))
+        self.end_headers()
+        self.wfile.write(Body)
+
+    def _Page(self,Items,Query,Filters):
+        for Field,Key in Filters.items():
+            if Field in Query:
+                Values=set(Query[Field][0].split(","))
+                Items=[Item for Item in Items if str(Item.get(Key)) in Values]
+        if "words" in Query or "name" in Query:
+            Words=(Query.get("words") or Query.get("name"))[0].lower().split()
+            Items=[Item for Item in Items if all(Word in (Item.get('name') or Item.get('firstName','')+" "+Item.get('lastName','')).lower() for Word in Words)]
+        Offset=int(Query.get("offset",["0"])[0])
+        Limit=min(int(Query.get("limit",["1000"])[0]),1000)
+        return {'offset': Offset,'limit': Limit,'items': Items[Offset:Offset+Limit]}
+
+    def _Unavailable(self):
+        if self.Server.RetryAfter is not None:
+            return self._Send({'key': "api.error.throttled",'message': "Too many requests"},429,{'Retry-After': str(self.Server.RetryAfter)})
+        return self._Send({'key': "api.error.unavailable",'message': "Service unavailable"},503)
+
+    def _Days(self,Query):
+        DateFrom=datetime.date.fromisoformat(Query["dateFrom"][0])
+        DateTo=datetime.date.fromisoformat(Query["dateTo"][0])
+        UserIds=[int(UserId) for UserId in Query["userIds"][0].split(",")]
+        Day=DateFrom
+        while Day<=DateTo:
+            for UserId in UserIds:
+                yield UserId,Day
+            Day+=datetime.timedelta(days=1)
+
+    def _Me(self):
+        # the user is picked by the user name of the basic authentication
+        Auth=self.headers.get("Authorization","")
+        UserName=""
+        if Auth.startswith("Basic "):
+            UserName=base64.b64decode(Auth[6:]).decode("utf-8","replace").split(":")[0]
+        for User in self.Server.Dataset.Users:
+            if User['username']==UserName:
+                return User
+        return self.Server.Dataset.Users[0] if self.Server.Dataset.Users else {'id': 1,'firstName': "Mock",'lastName': "User"}
+
+    def _ById(self,Items,Id):
+        for Item in Items:
+            if str(Item['id'])==Id:
+                return self._Send(Item)
+        return self._Send({'key': "api.error.not_found",'message': "Not found"},404)
+
+    def do_GET(self):
+        if self.Server._Fault():
+            return self._Unavailable()
+        Url=urlparse(self.path)
+        Query=parse_qs(Url.query)
+        Parts=[Part for Part in Url.path.split("/") if Part]
+        Data=self.Server.Dataset
+        if Parts==["users","me"]:
+            return self._Send(self._Me())
+        if Parts==["tasks"]:
+            return self._Send(self._Page(Data.Tasks,Query,{'ids': 'id','customerIds': 'customerId','projectIds': 'projectId'}))
+        if Parts==["projects"]:
+            return self._Send(self._Page(Data.Projects,Query,{'ids': 'id','customerIds': 'customerId'}))
+        if Parts==["users"]:
+            return self._Send(self._Page(Data.Users,Query,{'ids': 'id','department': 'departmentId','email': 'email'}))
+        if Parts==["customers"]:
+            return self._Send(self._Page(Data.Customers,Query,{}))
+        if Parts==["departments"]:
+            return self._Send(self._Page(Data.Departments,Query,{}))
+        if Parts==["leaveTypes"]:
+            return self._Send(self._Page(Data.LeaveTypes,Query,{}))
+        if Parts==["info"]:
+            return self._Send({'version': "mock",'timeZoneGroupId': 1})
+        if len(Parts)==2 and Parts[0]=="tasks":
+            return self._ById(Data.Tasks,Parts[1])
+        if len(Parts)==2 and Parts[0]=="projects":
+            return self._ById(Data.Projects,Parts[1])
+        if len(Parts)==2 and Parts[0]=="departments":
+            return self._ById(Data.Departments,Parts[1])
+        if Parts==["timetrack"]:
+            Days=[{'userId': UserId,'date': Day.isoformat(),'dayOffset': 0,'records': Data.DayRecords(UserId,Day)} for UserId,Day in self._Days(Query)]
+            return self._Send({'dateFrom': Query["dateFrom"][0],'dateTo': Query["dateTo"][0],'data': Days})
+        if Parts==["leavetime"]:
+            Leaves=[{'userId': UserId,'date': Day.isoformat(),'leaveTypeId': 1,'leaveTime': 480} for UserId,Day in self._Days(Query) if (UserId+Day.toordinal())%23==0]
+            return self._Send({'dateFrom': Query["dateFrom"][0],'dateTo': Query["dateTo"][0],'data': Leaves})
+        if len(Parts)==4 and Parts[0]=="timetrack":
+            Day=datetime.date.fromisoformat(Parts[2])
+            for Record in Data.DayRecords(int(Parts[1]),Day):
+                if str(Record['taskId'])==Parts[3]:
+                    return self._Send({'userId': int(Parts[1]),'date': Parts[2],'taskId': Record['taskId'],'time': Record['time'],'comment': Record['comment']})
+            return self._Send({'userId': int(Parts[1]),'date': Parts[2],'taskId': int(Parts[3]),'time': 0,'comment': ""})
+        return self._Send({'key': "api.error.not_found",'message': "Not found"},404)
+
+    def do_PATCH(self):
+        Length=int(self.headers.get("Content-Length",0))
+        Body=self.rfile.read(Length)
+        if self.Server._Fault():
+            return self._Unavailable()
+        Parts=[Part for Part in urlparse(self.path).path.split("/") if Part]
+        if len(Parts)!=4 or Parts[0]!="timetrack":
+            return self._Send({'key': "api.error.not_found",'message': "Not found"},404)
+        try:
+            Cell=json.loads(Body)
+        except ValueError:
+            return self._Send({'key': "api.error.bad_request",'message': "Malformed JSON"},400)
+        Key=(int(Parts[1]),datetime.date.fromisoformat(Parts[2]),int(Parts[3]))
+        with self.Server.Dataset.Lock:
+            self.Server.Dataset.Written[Key]={'time': Cell.get('time',0),'comment': Cell.get('comment',"")}
+        return self._Send({'userId': Key[0],'date': Parts[2],'taskId': Key[2],'time': Cell.get('time',0),'comment': Cell.get('comment',"")})
+
+
+def WriteAbfFile(FileName: str,Users: int,Days: int,RowsPerDay: int=2,Tasks: int=5000,Start=datetime.date(2019,1,1)):
+    """
+        Name: actiPymeBench.WriteAbfFile(FileName: str,Users: int,Days: int,RowsPerDay: int=2,Tasks: int=5000,Start=datetime.date(2019,1,1))
+
+        Args:   FileName, .abf file to be written
+                Users, number of entries (users user1...userN, password "pass")
+                Days, number of days of every entry
+                RowsPerDay, time sheet rows of every day
+                Tasks, task ids are picked in 1...Tasks
+
+        Desc: Generates an actitime batch file for the benchmarks. The output is the number of time sheet rows
+    """
+    Rows=0
+    with open(FileName,"w") as AbfFile:
+        AbfFile.write("% actitime batch format file (.abf) generated by actiPymeBench\n")
+        for User in range(1,Users+1):
+            AbfFile.write("START ENTRY;\nUSERNAME;user"+str(User)+";\nPASSWORD;pass;\nSTART TIMESHEET;\n")
+            for DayOffset in range(Days):
+                Day=Start+datetime.timedelta(days=DayOffset)
+                for Slot in range(RowsPerDay):
+                    TaskId=(User*31+DayOffset*7+Slot)%Tasks+1
+                    AbfFile.write(str(Day.year)+";"+str(Day.month)+";"+str(Day.day)+";"+str(TaskId)+";"+str(60*(Slot+1))+";\n")
+                    Rows+=1
+            AbfFile.write("END TIMESHEET;\nEND ENTRY;\n")
+    return Rows
+
+
+def Percentile(Samples,Fraction: float):
+    """
+        Name: actiPymeBench.Percentile(Samples,Fraction: float)
+
+        Desc: Nearest rank percentile of a list of numbers (Fraction in 0...1)
+    """
+    if not Samples:
+        return 0.0
+    Ordered=sorted(Samples)
+    return Ordered[min(len(Ordered)-1,max(0,int(round(Fraction*len(Ordered)+0.5))-1))]
+
+
+def Measure(Name: str,Operation,Repeat: int,Items=1):
+    """
+        Name: actiPymeBench.Measure(Name: str,Operation,Repeat: int,Items=1)
+
+        Args:   Name, label of the benchmark
+                Operation, callable run Repeat times; it may return the number of items it processed (an int)
+                Repeat, number of runs
+                Items, items processed by one run when Operation does not return an int
+
+        Desc: Runs a benchmark. The output is {'name','runs','items','seconds','throughput','p50','p99','errors'}
+              with throughput in items per second and latencies in milliseconds
+    """
+    Latencies=[]
+    Processed=0
+    Errors=0
+    Start=time.perf_counter()
+    for _ in range(Repeat):
+        CallStart=time.perf_counter()
+        try:
+            Count=Operation()
+        except Exception:
+            Errors+=1
+            Count=0
+        Latencies.append((time.perf_counter()-CallStart)*1000.0)
+        Processed+=Count if isinstance(Count,int) else Items
+    Seconds=time.perf_counter()-Start
+    return {'name': Name,'runs': Repeat,'items': Processed,'seconds': Seconds,'throughput': Processed/Seconds if Seconds>0 else 0.0,
+            'p50': Percentile(Latencies,0.50),'p99': Percentile(Latencies,0.99),'errors': Errors}
+
+
+def RunBenchmarks(Latency=0.0,Jitter=0.0,ErrorRate=0.0,Tasks=5000,Users=100,Repeat=200,Workers=8,AbfMegabytes=5,RetryAfter=None):
+    """
+        Name: actiPymeBench.RunBenchmarks(Latency=0.0,Jitter=0.0,ErrorRate=0.0,Tasks=5000,Users=100,Repeat=200,Workers=8,AbfMegabytes=5,RetryAfter=None)
+
+        Args:   Latency, Jitter, ErrorRate, RetryAfter, behaviour of the mock server (see MockServer)
+                Tasks, Users, size of the mock dataset
+                Repeat, number of single calls
+                Workers, concurrency of the bulk benchmarks
+                AbfMegabytes, approximate size of the generated .abf file
+
+        Desc: Runs the whole suite against a fresh mock server. The output is the list of results of Measure()
+    """
+    Server=MockServer(MockDataset(Tasks=Tasks,Users=Users),Latency=Latency,Jitter=Jitter,ErrorRate=ErrorRate,RetryAfter=RetryAfter)
+    Url=Server.Start()
+    Results=[]
+    TempDir=tempfile.mkdtemp(prefix="actiPymeBench")
+    try:
+        Drv=actiPyme.Driver(Url,"user1","pass",PoolSize=Workers)
+        Drv.Handshake()
+        Rnd=random.Random(2)
+        Results.append(Measure("GetTaskInfo",lambda: Drv.GetTaskInfo(Rnd.randint(1,Tasks)),Repeat))
+        Results.append(Measure("GetDayTimeTrack",lambda: Drv.GetDayTimeTrack(1,2019,1,Rnd.randint(1,28),Rnd.randint(1,Tasks)),Repeat))
+        Results.append(Measure("IterTasks (all pages)",lambda: sum(1 for _ in Drv.IterTasks(Prefetch=True)),3))
+
+        def IterAboveCap(Prefetch):
+            # PageSize above the 1000 items served per page, every task must still be walked
+            Count=sum(1 for _ in Drv.IterTasks(PageSize=2000,Prefetch=Prefetch))
+            if Count!=Tasks:
+                raise AssertionError("IterTasks returned "+str(Count)+" of "+str(Tasks)+" tasks")
+            return Count
+
+        Results.append(Measure("IterTasks (PageSize 2000, streaming)",lambda: IterAboveCap(False),1))
+        Results.append(Measure("IterTasks (PageSize 2000, prefetch)",lambda: IterAboveCap(True),1))
+        Results.append(Measure("GetTasksInfo (batch of 1000)",lambda: len(Drv.GetTasksInfo(Rnd.sample(range(1,Tasks+1),min(1000,Tasks)),Workers=Workers)),5))
+        Results.append(Measure("FetchTimeTrack (all users, 1 year)",
+                               lambda: sum(1 for _ in Drv.FetchTimeTrack(range(1,Users+1),"2019-01-01","2019-12-31",Workers=Workers)),1))
+        Results.append(Measure("IterTimeSheetDateInterval (1 user, 3 years)",
+                               lambda: sum(1 for _ in Drv.IterTimeSheetDateInterval(1,2019,1,1,2021,12,31)),3))
+        Drv.Stop()
+
+        AbfName=os.path.join(TempDir,"bench.abf")
+        # about 20 bytes per time sheet row
+        RowsPerUser=max(1,AbfMegabytes*1024*1024//20//max(Users,1))
+        WriteAbfFile(AbfName,Users,max(1,RowsPerUser//2),2,Tasks)
+
+        def Parse(Processes=1):
+            Parser=actiPyme.AbfParser(AbfName)
+            Count=sum(1 for _ in Parser.IterRows(Processes,ChunkSize=1024*1024))
+            Parser.Close()
+            return Count
+
+        AbfSize=str(os.path.getsize(AbfName)//1024)+" KiB"
+        Results.append(Measure("AbfParser.IterRows ("+AbfSize+")",Parse,3))
+        Processes=os.cpu_count() or 1
+        if Processes>1:
+            Results.append(Measure("AbfParser.IterRows ("+AbfSize+", "+str(Processes)+" processes)",lambda: Parse(Processes),3))
+        def ParseCached():
+            Parser=actiPyme.AbfParser(AbfName)
+            Batch=Parser.Cached()
+            Parser.Close()
+            Count=sum(1 for _ in Batch.IterRows())
+            Batch.Close()
+            return Count
+
+        # the first call compiles the cache
+        ParseCached()
+
+        Results.append(Measure("AbfBatch.IterRows ("+AbfSize+", binary cache)",ParseCached,3))
+
+        UploadName=os.path.join(TempDir,"upload.abf")
+        WriteAbfFile(UploadName,min(Users,20),10,2,Tasks)
+
+        def Upload():
+            Parser=actiPyme.AbfParser(UploadName)
+            Uploader=actiPyme.BulkUploader(Url,Workers=Workers)
+            Report=Uploader.Upload(Parser.IterEntries())
+            Uploader.Close()
+            Parser.Close()
+            return sum(1 for Row in Report if Row['ok'])
+
+        Results.append(Measure("BulkUploader.Upload (WriteDayTimeTrack)",Upload,1))
+    finally:
+        Server.Stop()
+        for FileName in os.listdir(TempDir):
+            os.remove(os.path.join(TempDir,FileName))
+        os.rmdir(TempDir)
+    return Results
+
+
+def PrintResults(Results,Output=sys.stdout):
+    """
+        Name: actiPymeBench.PrintResults(Results,Output=sys.stdout)
+
+        Desc: Prints the benchmark results as a table
+    """
+    Output.write("%-42s %10s %12s %10s %10s %7s\n"%("benchmark","items","items/s","p50 ms","p99 ms","errors"))
+    for Result in Results:
+        Output.write("%-42s %10d %12.1f %10.2f %10.2f %7d\n"%(Result['name'],Result['items'],Result['throughput'],Result['p50'],Result['p99'],Result['errors']))
+
+
+def Main(Argv=None):
+    Parser=argparse.ArgumentParser(description="Benchmark actiPyme against a local mock actiTIME server")
+    Parser.add_argument("--latency",type=float,default=0.0,help="seconds added to every response")
+    Parser.add_argument("--jitter",type=float,default=0.0,help="random extra latency in seconds")
+    Parser.add_argument("--errors",type=float,default=0.0,help="fraction of requests failing with 503")
+    Parser.add_argument("--retry-after",type=float,default=None,help="fail with 429 and this Retry-After instead of 503")
+    Parser.add_argument("--tasks",type=int,default=5000,help="number of tasks of the dataset")
+    Parser.add_argument("--users",type=int,default=100,help="number of users of the dataset")
+    Parser.add_argument("--repeat",type=int,default=200,help="number of single calls")
+    Parser.add_argument("--workers",type=int,default=8,help="concurrency of the bulk benchmarks")
+    Parser.add_argument("--abf-mb",type=int,default=5,help="size of the generated .abf file in MiB")
+    Parser.add_argument("--json",action="store_true",help="print the results as JSON")
+    Args=Parser.parse_args(Argv)
+    Results=RunBenchmarks(Args.latency,Args.jitter,Args.errors,Args.tasks,Args.users,Args.repeat,Args.workers,Args.abf_mb,Args.retry_after)
+    if Args.json:
+        print(json.dumps(Results,indent=1))
+    else:
+        PrintResults(Results)
+
+
+if __name__=="__main__":
+    Main()
@@ -0,0 +1,68 @@
+import sys
+import os
+import argparse
+import datetime
+
+import actiPyme
+
+"""
+
+Name: actiPymeExport.py
+
+Desc: Command line bulk export of actiTIME time track or leave records to NDJSON, CSV or columnar files (see
+      actiPyme.TimeSheetExporter). Run it as:
+
+            python actiPymeExport.py --target https://actitime.example.com --user admin --from 2024-01-01 --to 2024-12-31 2024.csv.gz
+
+      The password is read from the ACTIPYME_PASSWORD environment variable when --password is not given
+
+
+"""
+
+def PositiveInt(Text: str):
+    """
+        Name: actiPymeExport.PositiveInt(Text: str)
+
+        Desc: argparse type of the chunking options, rejects zero and negative values
+    """
+    Value=int(Text)
+    if Value<=0:
+        raise argparse.ArgumentTypeError("must be a positive integer, got "+Text)
+    return Value
+
+
+def Main(Argv=None):
+    Parser=argparse.ArgumentParser(description="Export actiTIME time track or leave records to NDJSON, CSV or columnar files")
+    Parser.add_argument("output",help="output file, '-' for the standard output")
+    Parser.add_argument("--target",required=True,help="url of the actiTIME server")
+    Parser.add_argument("--user",required=True,help="account user name")
+    Parser.add_argument("--password",default=None,help="account password (default: $ACTIPYME_PASSWORD)")
+    Parser.add_argument("--users",default="all",help="comma separated user ids, or 'all'")
+    Parser.add_argument("--from",dest="date_from",required=True,help="first day, YYYY-MM-DD")
+    Parser.add_argument("--to",dest="date_to",default=datetime.date.today().isoformat(),help="last day, YYYY-MM-DD (default: today)")
+    Parser.add_argument("--kind",choices=("timetrack","leavetime"),default="timetrack",help="records to export")
+    Parser.add_argument("--format",choices=("ndjson","csv","columnar"),default=None,help="output format (default: from the file name)")
+    Parser.add_argument("--compression",choices=("gzip","bz2","xz"),default=None,help="output compression (default: from the file name)")
+    Parser.add_argument("--workers",type=PositiveInt,default=4,help="number of requests sent in parallel")
+    Parser.add_argument("--user-batch",type=PositiveInt,default=50,help="number of users asked with each request")
+    Parser.add_argument("--window-days",type=PositiveInt,default=31,help="number of days asked with each request")
+    Parser.add_argument("--chunk-rows",type=PositiveInt,default=10000,help="number of records written at once")
+    Args=Parser.parse_args(Argv)
+    Password=Args.password if Args.password is not None else os.environ.get("ACTIPYME_PASSWORD","")
+    Drv=actiPyme.Driver(Args.target,Args.user,Password,PoolSize=max(10,Args.workers))
+    Drv.Start()
+    try:
+        if Args.users=="all":
+            UserIds=[User['id'] for User in Drv.IterUsers()]
+        else:
+            UserIds=[int(UserId) for UserId in Args.users.split(",") if UserId.strip()]
+        Exporter=actiPyme.TimeSheetExporter(Drv,Workers=Args.workers,UserBatch=Args.user_batch,WindowDays=Args.window_days,ChunkRows=Args.chunk_rows)
+        Count=Exporter.Export(Args.output,UserIds,Args.date_from,Args.date_to,Args.kind,Args.format,Args.compression)
+    finally:
+        Drv.Stop()
+    sys.stderr.write("%d %s records of %d users written to %s\n"%(Count,Args.kind,len(UserIds),Args.output))
+    return 0
+
+
+if __name__=="__main__":
+    sys.exit(Main())